@@ -0,0 +1,2 @@
+# bench package - offline benchmarks and load tools
+__all__ = []
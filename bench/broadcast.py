@@ -0,0 +1,108 @@
+# bench/broadcast.py
+"""
+Broadcast fan-out benchmark.
+Run from project root:
+    python -m bench.broadcast
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from server.config import settings
+from server.events.broadcaster import Broadcaster
+from server.events.builders import Payload
+from server.state import ServerState
+
+server_state = ServerState()
+broadcaster = Broadcaster(server_state)
+
+
+class FakeSocket:
+    """Stand-in for a Litestar WebSocket that just waits ``delay`` seconds per send."""
+
+    def __init__(self, delay: float, tracker: "Delivery"):
+        self.delay = delay
+        self.tracker = tracker
+
+    async def send_text(self, data: str) -> None:
+        await asyncio.sleep(self.delay)
+        if not self.delay:
+            self.tracker.delivered()
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+class Delivery:
+    """Fires once every fast socket has received the message."""
+
+    def __init__(self, expected: int):
+        self.remaining = expected
+        self.done = asyncio.Event()
+        if expected == 0:
+            self.done.set()
+
+    def delivered(self) -> None:
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.done.set()
+
+
+async def sequential_broadcast(message: Payload) -> None:
+    """The original one-socket-at-a-time fan-out, kept here as the baseline."""
+    for client in list(server_state.all_clients().values()):
+        try:
+            await client["socket"].send_text(message.text)
+        except Exception:
+            pass
+
+
+def setup_clients(count: int, slow: int, tracker: Delivery, slow_delay: float) -> None:
+    for cid in list(server_state.all_clients()):
+        server_state.remove_client(cid)
+    for i in range(count):
+        delay = slow_delay if i < slow else 0.0
+        server_state.register_client(f"bench-{i}", FakeSocket(delay, tracker))
+
+
+async def measure(fn, count: int, slow: int, slow_delay: float, rounds: int) -> tuple[float, float]:
+    """Return mean milliseconds until ``fn`` returns and until every fast socket got the message."""
+    returned = delivered = 0.0
+    for _ in range(rounds):
+        tracker = Delivery(count - slow)
+        setup_clients(count, slow, tracker, slow_delay)
+        start = time.perf_counter()
+        await fn(Payload(lambda: '{"type": "player_update"}', bytes))
+        returned += time.perf_counter() - start
+        await tracker.done.wait()
+        delivered += time.perf_counter() - start
+    return returned / rounds * 1000, delivered / rounds * 1000
+
+
+async def run(args) -> None:
+    settings.SEND_TIMEOUT = args.timeout
+    print(f"{'clients':>8} {'slow':>5} {'sequential ms':>14} {'outbox return ms':>17} {'outbox deliver ms':>18}")
+    for count in args.clients:
+        slow = max(1, count * args.slow_percent // 100) if args.slow_percent else 0
+        _, seq = await measure(sequential_broadcast, count, slow, args.slow_delay, args.rounds)
+        ret, conc = await measure(broadcaster.broadcast, count, slow, args.slow_delay, args.rounds)
+        print(f"{count:>8} {slow:>5} {seq:>14.2f} {ret:>17.3f} {conc:>18.2f}")
+    for cid in list(server_state.all_clients()):
+        server_state.remove_client(cid)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure broadcast latency with fake sockets")
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--slow-percent", type=int, default=5, help="percentage of slow sockets")
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="seconds per send on slow sockets")
+    parser.add_argument("--timeout", type=float, default=0.02, help="per-send timeout (settings.SEND_TIMEOUT)")
+    parser.add_argument("--rounds", type=int, default=5)
+    # dropped clients are expected here, keep the per-client error logs quiet
+    logging.getLogger("server").setLevel(logging.CRITICAL)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
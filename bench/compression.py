@@ -0,0 +1,86 @@
+# bench/compression.py
+"""
+Deflating large frames: bytes saved vs CPU spent, per zlib level, for the
+events that grow with the player count. Each event is deflated once and the
+result shared by every recipient, so the cost column is paid once per event
+and the savings once per client it goes to.
+Run from project root:
+    python -m bench.compression
+    python -m bench.compression --players 10 100 1000 --levels 1 3 6 9
+"""
+import argparse
+import random
+import timeit
+import uuid
+import zlib
+
+from server.events.binary import deflate_frame, inflate_frame
+from server.events.builders import (
+    cached_init_event,
+    chunk_event,
+    delta_event,
+    player_batch_event,
+    player_update_event,
+)
+from server.game.directions import DIRECTIONS
+from server.game.tilemap import random_terrain
+from server.state import ServerState
+
+
+def populate(players: int) -> ServerState:
+    rng = random.Random(1)
+    state = ServerState(1000, 1000)
+    for _ in range(players):
+        pos = state.occupancy.random_free(rng)
+        state.register_client(str(uuid.uuid4()), object(), pos, rng.choice(DIRECTIONS))
+    return state
+
+
+def events(state: ServerState) -> dict:
+    clients = state.all_clients()
+    cid = next(iter(clients))
+    info = clients[cid]
+    slots = list(state.store.slot_by_id.values())
+    entries = [(c, v.slot, v["position"], v["direction"]) for c, v in clients.items()]
+    return {
+        "player_update": player_update_event(cid, info),
+        f"init ({len(slots)})": cached_init_event(cid, info.slot, state.init_cache, slots, len(slots)),
+        f"player_batch ({len(slots) // 4})": player_batch_event({c: clients[c] for c in list(clients)[:len(slots) // 4]}),
+        f"delta, full ({len(slots)})": delta_event(1, 0, entries, []),
+        "chunk (16x16)": chunk_event(3, 4, 16, random_terrain(1, 0.03, 0.2, 16)(3, 4)),
+    }
+
+
+def timed(fn, data: bytes) -> float:
+    number = max(10, 200_000 // max(1, len(data)))
+    return timeit.timeit(fn, number=number) / number * 1e6
+
+
+def run(players: list[int], levels: list[int]) -> None:
+    header = f"{'event':<24} {'proto':<6} {'bytes':>7}" + "".join(f" {f'L{level} bytes':>9} {'us':>6}" for level in levels)
+    print(header + f" {'inflate us':>11}")
+    for count in players:
+        for name, payload in events(populate(count)).items():
+            for proto, data in (("bin", payload.binary), ("json", payload.text.encode())):
+                row = f"{name:<24} {proto:<6} {len(data):>7}"
+                for level in levels:
+                    frame = deflate_frame(data, level)
+                    row += f" {len(frame):>9} {timed(lambda: deflate_frame(data, level), data):>6.1f}"
+                frame = deflate_frame(data, levels[0])
+                assert inflate_frame(frame) == data
+                print(row + f" {timed(lambda: inflate_frame(frame), data):>11.1f}")
+        print()
+    print(f"zlib {zlib.ZLIB_RUNTIME_VERSION}; a frame is only sent deflated if it is at least")
+    print("COMPRESSION_THRESHOLD bytes and deflating actually shrinks it")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time deflating game frames per zlib level")
+    parser.add_argument("--players", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 3, 6, 9])
+    args = parser.parse_args()
+    run(args.players, args.levels)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# bench/events.py
+"""
+Per-event serialization cost: the old Pydantic models vs the msgspec builders.
+Run from project root:
+    python -m bench.events
+"""
+import argparse
+import timeit
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+from bench.protocol import init_event, populate
+from server.events.builders import player_batch_event, player_update_event
+
+
+# --- the previous Pydantic event models, kept here as the baseline ---
+class LegacyInitEvent(BaseModel):
+    type: str = "init"
+    client_id: str
+    player_count: int
+    players: Dict[str, Dict[str, object]]
+
+
+class LegacyPlayerUpdateEvent(BaseModel):
+    type: str = "player_update"
+    id: str
+    position: List[int]
+    direction: str
+
+
+class LegacyPlayerBatchEvent(BaseModel):
+    type: str = "player_batch"
+    players: Dict[str, Dict[str, object]]
+
+
+def legacy_players(clients) -> dict:
+    return {cid: {"position": info["position"], "direction": info["direction"]} for cid, info in clients.items()}
+
+
+def run(players: int, batch: int, recipients: int, number: int) -> None:
+    state = populate(players)
+    clients = state.all_clients()
+    cid = next(iter(clients))
+    info = clients[cid]
+    sample = {k: clients[k] for k in list(clients)[:batch]}
+
+    cases = {
+        "player_update": (
+            lambda: LegacyPlayerUpdateEvent(id=cid, position=info["position"], direction=info["direction"]).model_dump_json(),
+            lambda: player_update_event(cid, info).text,
+        ),
+        f"player_batch ({batch})": (
+            lambda: LegacyPlayerBatchEvent(players=legacy_players(sample)).model_dump_json(),
+            lambda: player_batch_event(sample).text,
+        ),
+        f"init ({players})": (
+            lambda: LegacyInitEvent(client_id=cid, player_count=players, players=legacy_players(clients)).model_dump_json(),
+            lambda: init_event(state, cid).text,
+        ),
+    }
+
+    print(f"{'event':<22} {'pydantic us':>12} {'msgspec us':>11} {'speedup':>8}")
+    for name, (before, after) in cases.items():
+        n = max(1, number // len(before()) * 100)
+        t_before = timeit.timeit(before, number=n) / n * 1e6
+        t_after = timeit.timeit(after, number=n) / n * 1e6
+        print(f"{name:<22} {t_before:>12.2f} {t_after:>11.2f} {t_before / t_after:>7.1f}x")
+
+    # a payload is encoded once no matter how many recipients read it
+    n = max(1, number // 10)
+    shared = timeit.timeit(lambda: [p.text for p in [player_update_event(cid, info)] * recipients], number=n) / n * 1e6
+    print(f"\nplayer_update fanned out to {recipients} recipients: {shared:.2f} us per broadcast")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare Pydantic and msgspec event serialization")
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--recipients", type=int, default=100)
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+    run(args.players, args.batch, args.recipients, args.number)
+
+
+if __name__ == "__main__":
+    main()
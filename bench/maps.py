@@ -0,0 +1,78 @@
+# bench/maps.py
+"""
+Tile map startup and access benchmark: reading a whole map file into memory
+vs memory-mapping it.
+Run from project root:
+    python -m bench.maps
+    python -m bench.maps --map maps/world.map
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from server.game.tilemap import TileMap, random_terrain, write_map
+from server.state import ServerState
+
+
+def timed(fn, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run(path: str, spawns: int, reads: int) -> None:
+    size_mib = os.path.getsize(path) / 2**20
+
+    tracemalloc.start()
+    read_all, data = timed(lambda: open(path, "rb").read())
+    mem_read = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+
+    tracemalloc.start()
+    open_map, tiles = timed(TileMap.open, path)
+    make_state, state = timed(ServerState, 0, 0, tiles)
+    mem_map = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    rng = random.Random(1)
+    spawn, _ = timed(lambda: [state.register_client(f"bot-{i}", None) for i in range(spawns)])
+    points = [(rng.randrange(tiles.width), rng.randrange(tiles.height)) for _ in range(reads)]
+    tile_reads, _ = timed(lambda: [tiles.tile(x, y) for x, y in points])
+    chunk_points = [tiles.chunk_of(x, y) for x, y in points[:reads // 10]]
+    chunk_reads, _ = timed(lambda: [tiles.chunk(cx, cy) for cx, cy in chunk_points])
+
+    print(f"{tiles.width}x{tiles.height} map, {tiles.chunk_size}x{tiles.chunk_size} chunks, {size_mib:.1f} MiB\n")
+    print(f"{'read whole file (ms)':<26} {read_all * 1000:>10.1f}   heap {mem_read / 2**20:.1f} MiB")
+    print(f"{'mmap open (ms)':<26} {open_map * 1000:>10.3f}")
+    print(f"{'room state (ms)':<26} {make_state * 1000:>10.3f}   heap {mem_map / 2**10:.1f} KiB")
+    print(f"{'spawn (us each)':<26} {spawn / spawns * 1e6:>10.2f}")
+    print(f"{'random tile read (us)':<26} {tile_reads / reads * 1e6:>10.2f}")
+    print(f"{'random chunk read (us)':<26} {chunk_reads / len(chunk_points) * 1e6:>10.2f}")
+    tiles.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time loading and reading a chunked tile map")
+    parser.add_argument("--map", help="existing map file (default: generate one in a temp dir)")
+    parser.add_argument("--size", type=int, nargs=2, default=(10_000, 10_000), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--spawns", type=int, default=1_000)
+    parser.add_argument("--reads", type=int, default=100_000)
+    args = parser.parse_args()
+
+    if args.map:
+        run(args.map, args.spawns, args.reads)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.map")
+        width, height = args.size
+        elapsed, _ = timed(write_map, path, width, height, random_terrain(1, 0.03, 0.2, 16))
+        print(f"generated map in {elapsed:.1f}s")
+        run(path, args.spawns, args.reads)
+
+
+if __name__ == "__main__":
+    main()
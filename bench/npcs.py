@@ -0,0 +1,90 @@
+# bench/npcs.py
+"""
+NPC tick benchmark: time per tick of the NumPy NPC engine, split into
+deciding every agent's move in arrays (NpcEngine.advance, "advance") and
+making the moves in the room state (NpcEngine.apply, "apply", still one
+ServerState.move per moved agent), against a tick that moves each agent on
+its own with GameLogic.move_player as players are ("scalar tick"). Every
+column is milliseconds per tick for the whole population.
+Room events are left out; only moves near a local player are sent anyway.
+100k agents don't fit the u16 ids of one room on the wire, but the engine
+runs them all the same.
+Run from project root:
+    python -m bench.npcs
+    python -m bench.npcs --agents 1000 10000 100000 --players 50 --size 1000 1000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from server.game.directions import DIRECTIONS
+from server.game.logic import GameLogic
+from server.game.npcs import NpcEngine
+from server.game.pathfinding import Pathfinder
+from server.game.tilemap import TileMap, random_terrain, write_map
+from server.state import ServerState
+
+MOVE_CHANCE = 0.25
+
+
+def room(path: str, agents: int, players: int) -> tuple[ServerState, NpcEngine]:
+    state = ServerState(tiles=TileMap.open(path))
+    engine = NpcEngine(state, Pathfinder(state.occupancy, 0, 4000), MOVE_CHANCE, 6, 3, 4, seed=1)
+    engine.spawn(agents)
+    for i in range(players):
+        state.register_client(f"player-{i}", object())
+    return state, engine
+
+
+def per_agent(state: ServerState, engine: NpcEngine, ticks: int) -> float:
+    rng = random.Random(1)
+    ids = [state.store.ids[slot] for slot in engine.slots.tolist()]
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for client_id in ids:
+            if rng.random() < MOVE_CHANCE:
+                GameLogic.move_player(state, client_id, rng.choice(DIRECTIONS))
+    return (time.perf_counter() - start) / ticks
+
+
+def run(path: str, counts: list[int], players: int, ticks: int) -> None:
+    print(f"{'agents':>8} {'advance ms':>11} {'apply ms':>9} {'tick ms':>8} {'moves':>7} {'chasing':>8} {'scalar tick ms':>15}")
+    for count in counts:
+        state, engine = room(path, count, players)
+        advance = apply = 0.0
+        moves = chasing = 0
+        for _ in range(ticks):
+            start = time.perf_counter()
+            moved = engine.advance()
+            middle = time.perf_counter()
+            moves += len(engine.apply(moved))
+            apply += time.perf_counter() - middle
+            advance += middle - start
+            chasing += int((engine.target >= 0).sum())
+        baseline = per_agent(state, engine, max(1, ticks // 10))
+        print(
+            f"{len(engine):>8} {advance / ticks * 1000:>11.2f} {apply / ticks * 1000:>9.2f} "
+            f"{(advance + apply) / ticks * 1000:>8.2f} {moves // ticks:>7} {chasing // ticks:>8} {baseline * 1000:>15.2f}"
+        )
+        engine.close()
+        state.tiles.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time NPC ticks for growing numbers of agents")
+    parser.add_argument("--agents", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--players", type=int, default=50, help="local players for agents to chase")
+    parser.add_argument("--size", type=int, nargs=2, default=(1000, 1000), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--ticks", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.map")
+        write_map(path, *args.size, random_terrain(1, 0.03, 0.2, 16))
+        run(path, args.agents, args.players, args.ticks)
+
+
+if __name__ == "__main__":
+    main()
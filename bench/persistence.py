@@ -0,0 +1,111 @@
+# bench/persistence.py
+"""
+State log benchmark: write throughput, event loop stalls while writing, and
+restore time for 100k saved players.
+Run from project root:
+    python -m bench.persistence
+    python -m bench.persistence --players 100000 --batches 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from server.persistence import StateLog
+
+
+async def watched(awaitable, stalls: list[float]) -> float:
+    """Await ``awaitable`` while timing 1 ms sleeps on the same loop.
+
+    Returns how long it took; the worst lateness of those sleeps (how long
+    the loop was blocked meanwhile) goes to ``stalls``.
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(awaitable)
+    start = time.perf_counter()
+    worst = 0.0
+    while not task.done():
+        before = loop.time()
+        await asyncio.sleep(0.001)
+        worst = max(worst, loop.time() - before - 0.001)
+    await task
+    stalls.append(worst)
+    return time.perf_counter() - start
+
+
+def restore(directory: str) -> tuple[float, int]:
+    log = StateLog(directory)
+    start = time.perf_counter()
+    log.open()
+    elapsed = time.perf_counter() - start
+    log._close()
+    return elapsed, len(log.records)
+
+
+async def run(directory: str, players: int, batches: int, batch_size: int) -> None:
+    rng = random.Random(1)
+    keys = [f"world/player-{i}" for i in range(players)]
+    batch_size = min(batch_size, players)  # each player moves at most once per batch
+
+    log = StateLog(directory, compact_bytes=1 << 62)  # compaction is timed separately
+    log.open()
+
+    start = time.perf_counter()
+    for key in keys:
+        log.record(key, rng.randrange(10_000), rng.randrange(10_000), rng.randrange(8))
+    record_time = time.perf_counter() - start
+
+    stalls: list[float] = []
+    first_flush = await watched(log.flush(), stalls)
+
+    # steady state: batches of moves by random players, flushed one by one
+    flushing = 0.0
+    for _ in range(batches):
+        for key in rng.sample(keys, batch_size):
+            log.record(key, rng.randrange(10_000), rng.randrange(10_000), rng.randrange(8))
+        flushing += await watched(log.flush(), stalls)
+    log_bytes = log._log_bytes
+
+    restore_log, _ = restore_copy(directory)
+    compact_time = await watched(log.compact(), stalls)
+    await log.stop()
+
+    restore_snapshot, restored = restore(directory)
+    assert restored == players, restored
+
+    print(f"{players} players, {batches} batches of {batch_size} moves\n")
+    print(f"{'record() (us each)':<34} {record_time / players * 1e6:>10.2f}")
+    print(f"{'flush all players (ms)':<34} {first_flush * 1000:>10.1f}   {players / first_flush / 1000:.0f}k records/s")
+    print(f"{'steady flushes (k records/s)':<34} {batches * batch_size / flushing / 1000:>10.0f}   log {log_bytes / 2**20:.1f} MiB")
+    print(f"{'compact to snapshot (ms)':<34} {compact_time * 1000:>10.1f}")
+    print(f"{'max event loop stall (ms)':<34} {max(stalls) * 1000:>10.2f}")
+    print(f"{'restore from log only (ms)':<34} {restore_log * 1000:>10.1f}")
+    print(f"{'restore from snapshot (ms)':<34} {restore_snapshot * 1000:>10.1f}")
+
+
+def restore_copy(directory: str) -> tuple[float, int]:
+    """Restore from a copy, as the original is still locked and being written."""
+    with tempfile.TemporaryDirectory() as copy:
+        for name in os.listdir(directory):
+            if name != "lock":
+                with open(os.path.join(directory, name), "rb") as src, open(os.path.join(copy, name), "wb") as dst:
+                    dst.write(src.read())
+        return restore(copy)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the append-only state log")
+    parser.add_argument("--players", type=int, default=100_000)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=10_000, help="moves recorded between flushes")
+    args = parser.parse_args()
+    if args.players < 1 or args.batch_size < 1:
+        parser.error("--players and --batch-size must be at least 1")
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory, args.players, args.batches, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
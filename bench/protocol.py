@@ -0,0 +1,83 @@
+# bench/protocol.py
+"""
+JSON vs binary wire protocol: bytes per event and encode/decode cost.
+Run from project root:
+    python -m bench.protocol
+"""
+import argparse
+import json
+import random
+import timeit
+import uuid
+
+from client.core.binary import decode_event
+from server.events.builders import (
+    InitCache,
+    Payload,
+    cached_init_event,
+    player_batch_event,
+    player_join_event,
+    player_leave_event,
+    player_update_event,
+)
+from server.game.directions import DIRECTIONS
+from server.state import ServerState
+
+
+def populate(players: int) -> ServerState:
+    rng = random.Random(1)
+    state = ServerState(1000, 1000)
+    for _ in range(players):
+        pos = state.occupancy.random_free(rng)
+        state.register_client(str(uuid.uuid4()), object(), pos, rng.choice(DIRECTIONS))
+    return state
+
+
+def init_event(state: ServerState, client_id: str) -> Payload:
+    """The init event ``client_id`` would get listing everyone else, built from a cold cache."""
+    slot = state.slot_of(client_id)
+    others = [other for other in state.store.slot_by_id.values() if other != slot]
+    return cached_init_event(client_id, slot, InitCache(state.store), others, state.count())
+
+
+def cases(state: ServerState, batch: int) -> dict:
+    clients = state.all_clients()
+    cid = next(iter(clients))
+    info = clients[cid]
+    sample = {k: clients[k] for k in list(clients)[:batch]}
+    return {
+        "player_update": lambda: player_update_event(cid, info),
+        "player_join": lambda: player_join_event(cid, info),
+        "player_leave": lambda: player_leave_event(cid, info.slot),
+        f"player_batch ({len(sample)})": lambda: player_batch_event(sample),
+        f"init ({len(clients)})": lambda: init_event(state, cid),
+    }
+
+
+def run(players: int, batch: int, number: int) -> None:
+    state = populate(players)
+    print(f"{'event':<22} {'json B':>8} {'bin B':>7} {'json enc us':>12} {'bin enc us':>11} {'json dec us':>12} {'bin dec us':>11}")
+    for name, build in cases(state, batch).items():
+        text, data = build().text, build().binary
+        n = max(1, number // max(1, len(text) // 100))
+        json_enc = timeit.timeit(lambda: build().text, number=n) / n * 1e6
+        bin_enc = timeit.timeit(lambda: build().binary, number=n) / n * 1e6
+        json_dec = timeit.timeit(lambda: json.loads(text), number=n) / n * 1e6
+        bin_dec = timeit.timeit(lambda: decode_event(data), number=n) / n * 1e6
+        print(
+            f"{name:<22} {len(text.encode()):>8} {len(data):>7} "
+            f"{json_enc:>12.2f} {bin_enc:>11.2f} {json_dec:>12.2f} {bin_dec:>11.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the JSON and binary wire protocols")
+    parser.add_argument("--players", type=int, default=100, help="players in the init event")
+    parser.add_argument("--batch", type=int, default=20, help="players in the batch event")
+    parser.add_argument("--number", type=int, default=20_000, help="iterations for small events")
+    args = parser.parse_args()
+    run(args.players, args.batch, args.number)
+
+
+if __name__ == "__main__":
+    main()
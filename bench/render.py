@@ -0,0 +1,188 @@
+# bench/render.py
+"""
+Client rendering benchmark, headless through SDL's dummy video driver.
+Ground: drawing every tile polygon and grid line of the map chunks each
+frame ("per tile", as the client used to) vs blitting blocks pre-rendered
+once by GroundCache ("cached"), while the player walks a few tiles per
+second across the map so new blocks keep being drawn, like in play.
+Players: drawing every remote player the client knows of ("all") vs only
+the ones on screen ("culled"), spread over a map of growing size.
+Frames: a full redraw and flip each frame vs dirty-rect mode, with the
+camera still and a few players around moving per frame (0 = idle). The
+dummy driver presents nothing, so on a real display dirty rects also save
+the copy of the whole window.
+Run from project root:
+    python -m bench.render
+    python -m bench.render --maps 40 200 --radius 2 --frames 300 --players 1000
+"""
+import argparse
+import os
+import random
+import time
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from client.config import (
+    BACKGROUND_COLOR, OTHER_PLAYER_TILE_COLOR, SCREEN_HEIGHT, SCREEN_WIDTH, TILE_COLOR, TILE_COLORS,
+)
+from client.core.animation import Animation
+from client.core.grid import cart_to_iso, draw_grid, draw_tile
+from client.core.ground import GroundCache
+from client.core.player import Player
+from client.core.state import GameState
+from client.scenes.game_scene import SPRITE_MARGIN, GameScene
+from server.game.tilemap import DEFAULT_CHUNK_SIZE, random_terrain
+
+# frames per tile walked (a move every ~0.3 s at 30 FPS)
+FRAMES_PER_STEP = 10
+
+
+def per_tile(screen: pygame.Surface, state: GameState, offset_x: int, offset_y: int) -> None:
+    size = state.chunk_size
+    for (cx, cy), tiles in state.chunks.items():
+        cols = range(cx * size, min((cx + 1) * size, state.grid_width))
+        rows = range(cy * size, min((cy + 1) * size, state.grid_height))
+        for row in rows:
+            base = (row - cy * size) * size - cx * size
+            for col in cols:
+                iso_x, iso_y = cart_to_iso(col, row)
+                color = TILE_COLORS.get(tiles[base + col] & 0x7F, TILE_COLOR)
+                draw_tile(screen, iso_x + offset_x, iso_y + offset_y, color)
+        draw_grid(screen, cols, rows, offset_x, offset_y)
+
+
+def walk(screen: pygame.Surface, size: int, radius: int, frames: int, draw) -> float:
+    """Seconds per frame of ``draw`` while walking diagonally across a size x size map."""
+    chunk = random_terrain(1, 0.03, 0.2, DEFAULT_CHUNK_SIZE)
+    state = GameState()
+    state.update_init("bench", {}, "bench", [size, size], DEFAULT_CHUNK_SIZE, radius)
+    chunks = -(-size // DEFAULT_CHUNK_SIZE)
+
+    elapsed = 0.0
+    for frame in range(frames):
+        x = y = min(size - 1, frame // FRAMES_PER_STEP)
+        # the chunks the server would have sent by now
+        cx, cy = x // DEFAULT_CHUNK_SIZE, y // DEFAULT_CHUNK_SIZE
+        for key in [k for k in state.chunks if max(abs(k[0] - cx), abs(k[1] - cy)) > radius + 1]:
+            del state.chunks[key]
+        for ox in range(max(0, cx - radius), min(chunks, cx + radius + 1)):
+            for oy in range(max(0, cy - radius), min(chunks, cy + radius + 1)):
+                if (ox, oy) not in state.chunks:
+                    state.chunks[(ox, oy)] = chunk(ox, oy)
+
+        iso_x, iso_y = cart_to_iso(x, y)
+        start = time.perf_counter()
+        screen.fill(BACKGROUND_COLOR)
+        draw(screen, state, SCREEN_WIDTH // 2 - iso_x, SCREEN_HEIGHT // 2 - iso_y)
+        elapsed += time.perf_counter() - start
+    return elapsed / frames
+
+
+def all_players(scene: GameScene, offset_x: int, offset_y: int) -> None:
+    animation = scene.state.player.animation
+    for info in scene.state.other_players.values():
+        iso_x, iso_y = cart_to_iso(*info["position"])
+        iso_x += offset_x
+        iso_y += offset_y
+        draw_tile(scene.screen, iso_x, iso_y, OTHER_PLAYER_TILE_COLOR)
+        img = animation.get_image_by_direction(info["direction"])
+        w, h = img.get_size()
+        scene.screen.blit(img, (iso_x - w // 2, iso_y - h // 2))
+
+
+def players(screen: pygame.Surface, size: int, count: int, frames: int, draw) -> tuple[float, int]:
+    """Seconds per frame of ``draw`` for ``count`` players spread over a size x size map."""
+    rng = random.Random(1)
+    state = GameState()
+    state.player = Player([size // 2, size // 2], Animation(Path(__file__).resolve().parents[1] / "assets" / "media"))
+    state.other_players = {
+        f"player-{i}": {"position": [rng.randrange(size), rng.randrange(size)], "direction": "down"}
+        for i in range(count)
+    }
+    scene = GameScene(screen, state, network=None)
+    iso_x, iso_y = cart_to_iso(size // 2, size // 2)
+    offset_x, offset_y = SCREEN_WIDTH // 2 - iso_x, SCREEN_HEIGHT // 2 - iso_y
+    view = screen.get_rect().inflate(2 * SPRITE_MARGIN, 2 * SPRITE_MARGIN)
+    on_screen = sum(
+        view.collidepoint(iso_x + offset_x, iso_y + offset_y)
+        for iso_x, iso_y in (cart_to_iso(*info["position"]) for info in state.other_players.values())
+    )
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw(scene, offset_x, offset_y)
+    return (time.perf_counter() - start) / frames, on_screen
+
+
+def activity(screen: pygame.Surface, moving: int, frames: int, dirty_rects: bool) -> float:
+    """Seconds per frame with ``moving`` of 50 players nearby moving each frame."""
+    rng = random.Random(1)
+    chunk = random_terrain(1, 0.03, 0.2, DEFAULT_CHUNK_SIZE)
+    state = GameState()
+    state.player = Player([20, 20], Animation(Path(__file__).resolve().parents[1] / "assets" / "media"))
+    players = {f"player-{i}": {"position": [rng.randrange(15, 26), rng.randrange(15, 26)], "direction": "down"} for i in range(50)}
+    state.update_init("bench", players, "bench", [40, 40], DEFAULT_CHUNK_SIZE, 1)
+    for cx in range(3):
+        for cy in range(3):
+            state.chunks[(cx, cy)] = chunk(cx, cy)
+    scene = GameScene(screen, state, network=None, dirty_rects=dirty_rects)
+    names = list(players)
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        for name in rng.sample(names, moving):
+            x, y = state.other_players[name]["position"]
+            state.other_players[name] = {"position": [x + rng.choice((-1, 0, 1)), y + rng.choice((-1, 0, 1))], "direction": "down"}
+        if dirty_rects:
+            scene.present_changes()
+        else:
+            scene.draw_frame()
+            pygame.display.flip()
+    return (time.perf_counter() - start) / frames
+
+
+def run(maps: list[int], radius: int, frames: int, count: int) -> None:
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    print(f"ground, chunk radius {radius}")
+    print(f"{'map':>9} {'per tile ms':>12} {'cached ms':>10} {'blits':>6} {'rendered':>9} {'kept':>5}")
+    for size in maps:
+        baseline = walk(screen, size, radius, frames, per_tile)
+        ground = GroundCache()
+        blits = []
+        cached = walk(screen, size, radius, frames, lambda *args: blits.append(ground.draw(*args)))
+        print(
+            f"{f'{size}x{size}':>9} {baseline * 1000:>12.2f} {cached * 1000:>10.2f} "
+            f"{sum(blits) // len(blits):>6} {ground.rendered:>9} {len(ground):>5}"
+        )
+
+    print(f"\n{count} players")
+    print(f"{'map':>9} {'all ms':>8} {'culled ms':>10} {'on screen':>10}")
+    for size in maps:
+        everyone, _ = players(screen, size, count, frames // 10, all_players)
+        culled, on_screen = players(screen, size, count, frames // 10, lambda scene, *offset: scene.draw_players(*offset))
+        print(f"{f'{size}x{size}':>9} {everyone * 1000:>8.2f} {culled * 1000:>10.2f} {on_screen:>10}")
+
+    print("\nframes, camera still")
+    print(f"{'moving':>7} {'full ms':>8} {'dirty ms':>9}")
+    for moving in (0, 1, 5, 20):
+        full = activity(screen, moving, frames, False)
+        dirty = activity(screen, moving, frames, True)
+        print(f"{moving:>7} {full * 1000:>8.2f} {dirty * 1000:>9.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time drawing the ground and players, before and after the client's render optimizations")
+    parser.add_argument("--maps", type=int, nargs="+", default=[40, 200, 1000], help="map widths (square maps)")
+    parser.add_argument("--radius", type=int, default=1, help="chunks kept around the player's (MAP_CHUNK_RADIUS)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--players", type=int, default=1000, help="remote players the client knows of")
+    args = parser.parse_args()
+    pygame.init()
+    run(args.maps, args.radius, args.frames, args.players)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
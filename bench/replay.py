@@ -0,0 +1,180 @@
+# bench/replay.py
+"""
+Replay a journal recorded with GAME_JOURNAL_FILE through the game handlers.
+Rooms are rebuilt from the journal, clients join where they joined, and
+their inputs and the rooms' ticks are fed back through handle_receive and
+the tick loop, either at the recorded pace or as fast as possible. The
+events sent out are compared with the recorded ones.
+Run from project root:
+    python -m bench.replay journal.bin
+    python -m bench.replay journal.bin --speed 1
+    python -m bench.replay journal.bin --repeat 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+from collections import Counter
+
+from server import journal
+from server.config import settings
+from server.events.binary import encode_ping
+from server.game.directions import DIRECTIONS
+from server.game.tilemap import TileMap
+from server.rooms import Room
+from server.sockets import handlers
+from server.sockets.ratelimit import InputLimiter
+
+# settings that describe this process rather than the recorded game
+LOCAL_SETTINGS = {"BACKEND": "local", "STATE_DIR": None, "JOURNAL_FILE": None}
+# heartbeat pings follow the wall clock rather than the journal, so they aren't compared
+PING = encode_ping()
+
+
+class ReplaySocket:
+    """Stands in for a client's WebSocket and counts what it is sent."""
+
+    query_params: dict = {}
+    deflate = False
+
+    def __init__(self, room: Room, binary: bool, totals: Counter) -> None:
+        self.room = room
+        self.binary = binary
+        self.totals = totals
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.totals["messages"] += 1
+        self.totals["bytes"] += len(data)
+
+    async def send_text(self, data: str) -> None:
+        self.totals["messages"] += 1
+        self.totals["bytes"] += len(data)
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+class Clock:
+    """Journal time, for the input rate limiter."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def apply_settings(recorded: dict) -> None:
+    for name, value in recorded.items():
+        if hasattr(settings, name):
+            setattr(settings, name, LOCAL_SETTINGS.get(name, value))
+
+
+def open_map(width: int, height: int, path: str) -> TileMap:
+    if not path:
+        return TileMap.blank(width, height)
+    if not os.path.exists(path):
+        raise SystemExit(f"the journal's map {path} is missing; run from where the server ran")
+    return TileMap.open(path)
+
+
+async def replay(entries: list[journal.Entry], speed: float) -> tuple[float, Counter, list]:
+    """Run one replay; returns its duration, totals and the events it sent."""
+    clock = Clock()
+    handlers.input_limiter = InputLimiter(settings.INPUT_RATE, settings.INPUT_BURST, clock)
+    recorder = journal.Journal(os.devnull)  # kept in memory, never flushed
+    totals: Counter = Counter()
+    rooms: dict[str, Room] = {}
+    sockets: dict[tuple[str, str], ReplaySocket] = {}
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for entry in entries:
+        if speed > 0:
+            delay = start + entry.time / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        clock.now = entry.time
+        kind = entry.kind
+        if kind == journal.INPUT:
+            socket = sockets.get((entry.room, entry.client))
+            if socket is not None:
+                await handlers.handle_receive(socket, entry.data)
+                totals["inputs"] += 1
+        elif kind == journal.TICK:
+            await rooms[entry.room].tick_loop.step()
+            totals["ticks"] += 1
+        elif kind == journal.JOIN:
+            room = rooms[entry.room]
+            x, y, direction, binary = entry.values
+            socket = sockets[(entry.room, entry.client)] = ReplaySocket(room, binary, totals)
+            await handlers.join_room(room, socket, entry.client, (x, y), DIRECTIONS[direction])
+            totals["joins"] += 1
+        elif kind == journal.LEAVE:
+            socket = sockets.pop((entry.room, entry.client), None)
+            if socket is not None:
+                await handlers.handle_disconnect(socket)
+        elif kind == journal.ROOM:
+            rooms[entry.room] = Room(entry.room, open_map(*entry.values), journal=recorder.room(entry.room, TileMap.blank(1, 1)))
+        # let the outbox writers drain, as they would between real frames
+        await asyncio.sleep(0)
+    elapsed = loop.time() - start
+
+    for room in rooms.values():
+        for client_id in list(room.state.store.slot_by_id):
+            room.state.remove_client(client_id)
+    sent = [
+        (record[2], record[4][0], record[5].binary)
+        for record in recorder._records if record[0] == journal.EVENT and record[5].binary != PING
+    ]
+    return elapsed, totals, sent
+
+
+def compare(expected: list, sent: list) -> str:
+    for index, (want, got) in enumerate(zip(expected, sent)):
+        if want != got:
+            return f"first difference at event {index}: room {want[0]}, {want[1]} vs {got[1]} recipients"
+    if len(expected) != len(sent):
+        return f"{len(expected)} events recorded, {len(sent)} replayed"
+    return f"all {len(sent)} events match"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded journal")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = recorded pace, 0 = as fast as possible")
+    parser.add_argument("--repeat", type=int, default=1, help="replay this many times and report each run")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    recorded, started, records = journal.read(args.path)
+    entries = list(records)
+    apply_settings(recorded)
+    kinds = Counter(entry.kind for entry in entries)
+    expected = [(e.room, e.values[0], e.data) for e in entries if e.kind == journal.EVENT and e.data != PING]
+    duration = entries[-1].time if entries else 0.0
+
+    print(f"{args.path}: recorded {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started))}, {duration:.1f}s")
+    print(
+        f"  rooms {kinds[journal.ROOM]}, joins {kinds[journal.JOIN]}, leaves {kinds[journal.LEAVE]}, "
+        f"inputs {kinds[journal.INPUT]}, ticks {kinds[journal.TICK]}, events {kinds[journal.EVENT]} "
+        f"({sum(recipients for _, recipients, _ in expected)} sends)\n"
+    )
+
+    runs = []
+    for run in range(args.repeat):
+        elapsed, totals, sent = asyncio.run(replay(entries, args.speed))
+        runs.append(elapsed)
+        print(
+            f"run {run + 1}: {elapsed:.3f}s, {totals['inputs'] / elapsed:,.0f} inputs/s, "
+            f"{totals['messages'] / elapsed:,.0f} messages/s ({totals['bytes'] / elapsed / 2**20:.1f} MiB/s); "
+            f"{compare(expected, sent)}"
+        )
+    if len(runs) > 1:
+        print(f"\nbest {min(runs):.3f}s, median {statistics.median(runs):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
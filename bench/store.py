@@ -0,0 +1,119 @@
+# bench/store.py
+"""
+Player store memory/throughput benchmark. Timings are the median of
+--repeat runs each.
+Run from project root:
+    python -m bench.store
+    python -m bench.store --clients 2000 --repeat 9
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+
+from server.game.directions import DIRECTIONS, DIRECTION_CODES, DIRECTION_VECTORS
+from server.state import PlayerStore
+
+GRID = 40
+
+
+class LegacyRegistry:
+    """The original dict-of-dicts registry, kept here as the baseline."""
+
+    def __init__(self):
+        self.connected_clients = {}
+
+    def register(self, client_id, socket):
+        self.connected_clients[client_id] = {"socket": socket, "position": [5, 5], "direction": "down"}
+
+    def get_client_by_socket(self, socket):
+        return next((cid for cid, info in self.connected_clients.items() if info["socket"] == socket), None)
+
+    def move(self, client_id, direction):
+        player = self.connected_clients[client_id]
+        dx, dy = DIRECTION_VECTORS[direction]
+        pos = player["position"]
+        new_x, new_y = pos[0] + dx, pos[1] + dy
+        if 0 <= new_x < GRID and 0 <= new_y < GRID:
+            player["position"] = [new_x, new_y]
+            player["direction"] = direction
+
+
+def store_move(store, client_id, direction):
+    slot = store.slot_by_id[client_id]
+    dx, dy = DIRECTION_VECTORS[direction]
+    positions, index = store.positions, 2 * slot
+    new_x, new_y = positions[index] + dx, positions[index + 1] + dy
+    if 0 <= new_x < GRID and 0 <= new_y < GRID:
+        positions[index] = new_x
+        positions[index + 1] = new_y
+        store.directions[slot] = DIRECTION_CODES[direction]
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def median(repeat: int, fn, *args) -> float:
+    return statistics.median(timed(fn, *args) for _ in range(repeat))
+
+
+def run(clients: int, moves: int, lookups: int, repeat: int) -> None:
+    ids = [str(uuid.uuid4()) for _ in range(clients)]
+    sockets = [object() for _ in range(clients)]
+    rng = random.Random(1)
+    move_plan = [(rng.choice(ids), rng.choice(DIRECTIONS)) for _ in range(moves)]
+    lookup_plan = [rng.choice(sockets) for _ in range(lookups)]
+
+    # --- memory + register ---
+    tracemalloc.start()
+    legacy = LegacyRegistry()
+    reg_legacy = timed(lambda: [legacy.register(cid, s) for cid, s in zip(ids, sockets)])
+    mem_legacy = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = PlayerStore()
+    reg_store = timed(lambda: [store.add(cid, s, None, 5, 5, 1) for cid, s in zip(ids, sockets)])
+    mem_store = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # --- moves ---
+    mv_legacy = median(repeat, lambda: [legacy.move(cid, d) for cid, d in move_plan])
+    mv_store = median(repeat, lambda: [store_move(store, cid, d) for cid, d in move_plan])
+
+    # --- socket lookups ---
+    lk_legacy = median(repeat, lambda: [legacy.get_client_by_socket(s) for s in lookup_plan])
+    lk_store = median(repeat, lambda: [store.ids[store.slot_by_socket[s]] for s in lookup_plan])
+
+    # --- full position scan (snapshot / init payload) ---
+    sc_legacy = median(repeat, lambda: [tuple(info["position"]) for info in legacy.connected_clients.values()])
+    sc_store = median(repeat, lambda: store.positions.tolist())
+
+    print(f"{clients} clients, {moves} moves, {lookups} socket lookups, median of {repeat} runs\n")
+    print(f"{'':<22} {'dict registry':>14} {'array store':>14}")
+    print(f"{'memory (KiB)':<22} {mem_legacy / 1024:>14.1f} {mem_store / 1024:>14.1f}")
+    print(f"{'register (ms)':<22} {reg_legacy * 1000:>14.2f} {reg_store * 1000:>14.2f}")
+    print(f"{'moves (k/s)':<22} {moves / mv_legacy / 1000:>14.1f} {moves / mv_store / 1000:>14.1f}")
+    print(f"{'socket lookup (us)':<22} {lk_legacy / lookups * 1e6:>14.2f} {lk_store / lookups * 1e6:>14.2f}")
+    print(f"{'position scan (ms)':<22} {sc_legacy * 1000:>14.3f} {sc_store * 1000:>14.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the dict registry with the array-backed player store")
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--moves", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per timing, the median is reported")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    run(args.clients, args.moves, args.lookups, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+# bench/swarm.py
+"""
+Headless load test: a swarm of bots speaking the client protocol.
+Each bot connects like client/core/network.py (binary offered first, JSON
+as fallback), then moves at a fixed rate with one move in flight and times
+how long it takes to see its own new position come back.
+Run from project root (with the server running):
+    python -m bench.swarm --bots 200 --rate 5 --duration 30
+    python -m bench.swarm --compare swarm-old.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+from typing import Optional
+
+import websockets
+
+from client.core.binary import BINARY_PROTOCOL, decode_event, encode_ack, encode_move, encode_pong, inflate, subprotocols
+from client.core.directions import DIRECTION_VECTORS
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values``, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.connect_ms: list[float] = []
+        self.connect_failures = 0
+        self.latency_ms: list[float] = []
+        self.sent = 0
+        self.lost = 0
+        self.received = 0
+        self.received_bytes = 0
+        self.disconnects = 0
+
+
+class Bot:
+    """One simulated player."""
+
+    def __init__(
+        self, url: str, binary: bool, pattern: str, rate: float, timeout: float, stats: Stats, rng: random.Random,
+        deflate: bool = False,
+    ):
+        self.url = url
+        self.subprotocols = subprotocols(binary, deflate)
+        self.pattern = pattern
+        self.interval = 1.0 / rate
+        self.timeout = timeout
+        self.stats = stats
+        self.rng = rng
+        self.ws = None
+        self.binary = False
+        self.me = None
+        self.grid = (0, 0)
+        self.position: Optional[tuple[int, int]] = None
+        # tiles of the other players we can see; the server refuses moves onto them
+        self.others: dict = {}
+        # map chunks the server sent, for steering around solid tiles
+        self.chunk_size = 0
+        self.chunks: dict[tuple[int, int], bytes] = {}
+        self.goal: Optional[tuple[int, int]] = None
+        # (sent at, position when sent) for the move in flight
+        self._pending: Optional[tuple[float, Optional[tuple[int, int]]]] = None
+        self._confirmed = asyncio.Event()
+
+    async def connect(self) -> bool:
+        start = time.perf_counter()
+        try:
+            # like the game client, no permessage-deflate: compression is the server's call (--deflate)
+            self.ws = await websockets.connect(self.url, subprotocols=self.subprotocols, max_size=None, compression=None)
+            self.binary = (self.ws.subprotocol or "").startswith(BINARY_PROTOCOL)
+            self._handle(await self.ws.recv())
+        except Exception:
+            self.stats.connect_failures += 1
+            return False
+        self.stats.connect_ms.append((time.perf_counter() - start) * 1000)
+        return True
+
+    async def run(self, until: float) -> None:
+        reader = asyncio.create_task(self._read())
+        loop = asyncio.get_running_loop()
+        # spread the bots' moves over the interval
+        next_move = loop.time() + self.rng.random() * self.interval
+        try:
+            while loop.time() < until and not reader.done():
+                await asyncio.sleep(max(0.0, next_move - loop.time()))
+                next_move += self.interval
+                await self._move()
+        finally:
+            reader.cancel()
+            await self.ws.close()
+
+    async def _move(self) -> None:
+        direction = self._next_direction()
+        self._confirmed.clear()
+        self._pending = (time.perf_counter(), self.position)
+        await self.ws.send(encode_move(direction) if self.binary else json.dumps({"move": direction}))
+        self.stats.sent += 1
+        try:
+            await asyncio.wait_for(self._confirmed.wait(), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats.lost += 1
+        self._pending = None
+
+    def _next_direction(self) -> str:
+        if self.position is None:
+            return self.rng.choice(list(DIRECTION_VECTORS))
+        x, y = self.position
+        width, height = self.grid
+        taken = set(self.others.values())
+        options = [
+            name for name, (dx, dy) in DIRECTION_VECTORS.items()
+            if 0 <= x + dx < width and 0 <= y + dy < height
+            and (x + dx, y + dy) not in taken and not self._solid(x + dx, y + dy)
+        ]
+        if self.pattern == "path":
+            # head for a random tile, picking a new one on arrival
+            if self.goal is None or self.goal == self.position:
+                self.goal = (self.rng.randrange(width), self.rng.randrange(height))
+            step = ((self.goal[0] > x) - (self.goal[0] < x), (self.goal[1] > y) - (self.goal[1] < y))
+            for name in options:
+                if DIRECTION_VECTORS[name] == step:
+                    return name
+        # boxed in: send anything and let the server refuse it
+        return self.rng.choice(options or list(DIRECTION_VECTORS))
+
+    def _solid(self, x: int, y: int) -> bool:
+        if not self.chunk_size:
+            return False
+        size = self.chunk_size
+        tiles = self.chunks.get((x // size, y // size))
+        return tiles is not None and tiles[(y % size) * size + x % size] >= 0x80
+
+    async def _read(self) -> None:
+        try:
+            async for message in self.ws:
+                self._handle(message)
+        except websockets.ConnectionClosed:
+            self.stats.disconnects += 1
+
+    def _handle(self, message) -> None:
+        self.stats.received += 1
+        self.stats.received_bytes += len(message)
+        message = inflate(message)
+        event = decode_event(message) if self.binary else json.loads(message)
+        kind = event["type"]
+        if kind == "init":
+            self.me = event["client_id"]
+            self.grid = tuple(event.get("grid") or (40, 40))
+            self.others = {pid: tuple(info["position"]) for pid, info in event["players"].items()}
+            self.chunk_size = event.get("chunk_size", 0)
+        elif kind == "chunk":
+            tiles = event["tiles"]
+            self.chunks[(event["x"], event["y"])] = base64.b64decode(tiles) if isinstance(tiles, str) else tiles
+        elif kind in ("player_update", "player_join", "player_enter_view"):
+            if event["id"] == self.me:
+                self._own_position(event["position"])
+            else:
+                self.others[event["id"]] = tuple(event["position"])
+        elif kind in ("player_leave", "player_leave_view"):
+            self.others.pop(event["id"], None)
+        elif kind in ("player_batch", "delta"):
+            if kind == "delta":
+                for pid in event["removed"]:
+                    self.others.pop(pid, None)
+            for pid, info in event["players"].items():
+                if pid != self.me:
+                    self.others[pid] = tuple(info["position"])
+            mine = event["players"].get(self.me)
+            if mine is not None:
+                self._own_position(mine["position"])
+            if kind == "delta":
+                seq = event["seq"]
+                asyncio.ensure_future(self._reply(encode_ack(seq) if self.binary else json.dumps({"ack": seq})))
+        elif kind == "ping":
+            asyncio.ensure_future(self._reply(encode_pong() if self.binary else json.dumps({"pong": True})))
+
+    async def _reply(self, data) -> None:
+        try:
+            await self.ws.send(data)
+        except websockets.ConnectionClosed:
+            pass
+
+    def _own_position(self, position: list[int]) -> None:
+        new = (position[0], position[1])
+        if self._pending is not None:
+            sent_at, before = self._pending
+            if before is not None and new != before:
+                self.stats.latency_ms.append((time.perf_counter() - sent_at) * 1000)
+                self._confirmed.set()
+            elif before is None:
+                # first report of our position: nothing to compare against yet
+                self._confirmed.set()
+        self.position = new
+
+
+async def swarm(args) -> dict:
+    url = f"{args.url}?room={args.room}" if args.room else args.url
+    stats = Stats()
+    rng = random.Random(args.seed)
+    bots = []
+    for i in range(args.bots):
+        binary = args.protocol == "binary" or (args.protocol == "mixed" and i % 2 == 0)
+        bots.append(Bot(
+            url, binary, args.pattern, args.rate, args.move_timeout, stats, random.Random(rng.random()), args.deflate,
+        ))
+
+    limit = asyncio.Semaphore(args.connect_concurrency)
+
+    async def connect(bot: Bot) -> bool:
+        async with limit:
+            return await bot.connect()
+
+    start = time.perf_counter()
+    connected = [bot for bot, ok in zip(bots, await asyncio.gather(*(connect(b) for b in bots))) if ok]
+    connect_elapsed = time.perf_counter() - start
+
+    loop = asyncio.get_running_loop()
+    # only count traffic received while moving
+    stats.received = stats.received_bytes = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(bot.run(loop.time() + args.duration) for bot in connected))
+    elapsed = time.perf_counter() - started
+
+    confirmed = len(stats.latency_ms)
+    return {
+        "config": {
+            "url": url,
+            "bots": args.bots,
+            "protocol": args.protocol,
+            "deflate": args.deflate,
+            "pattern": args.pattern,
+            "rate": args.rate,
+            "duration": args.duration,
+        },
+        "connect": {
+            "connected": len(connected),
+            "failed": stats.connect_failures,
+            "per_second": len(connected) / connect_elapsed if connect_elapsed else None,
+            "ms": summarize(stats.connect_ms),
+        },
+        "moves": {
+            "sent": stats.sent,
+            "confirmed": confirmed,
+            "lost": stats.lost,
+            "per_second": confirmed / elapsed,
+        },
+        "latency_ms": summarize(stats.latency_ms),
+        "received": {
+            "messages": stats.received,
+            "bytes": stats.received_bytes,
+            "messages_per_second": stats.received / elapsed,
+        },
+        "disconnects": stats.disconnects,
+    }
+
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+def report(result: dict, previous: Optional[dict] = None) -> None:
+    rows = [
+        ("connected", ("connect", "connected")),
+        ("connect/s", ("connect", "per_second")),
+        ("connect p50 ms", ("connect", "ms", "p50")),
+        ("connect p99 ms", ("connect", "ms", "p99")),
+        ("moves/s", ("moves", "per_second")),
+        ("moves lost", ("moves", "lost")),
+        ("latency p50 ms", ("latency_ms", "p50")),
+        ("latency p95 ms", ("latency_ms", "p95")),
+        ("latency p99 ms", ("latency_ms", "p99")),
+        ("latency max ms", ("latency_ms", "max")),
+        ("messages/s in", ("received", "messages_per_second")),
+        ("disconnects", ("disconnects",)),
+    ]
+
+    def lookup(data: dict, path: tuple) -> object:
+        for key in path:
+            data = data.get(key) if isinstance(data, dict) else None
+        return data
+
+    header = f"{'':<16} {'this run':>12}"
+    print(header + (f" {'previous':>12}" if previous else ""))
+    for label, path in rows:
+        line = f"{label:<16} {_fmt(lookup(result, path)):>12}"
+        if previous:
+            line += f" {_fmt(lookup(previous, path)):>12}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless bot swarm with move latency percentiles")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/")
+    parser.add_argument("--room", help="room to join (the server picks one if omitted)")
+    parser.add_argument("--bots", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=5.0, help="moves per second per bot")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of moving after all bots connected")
+    parser.add_argument("--pattern", choices=("random", "path"), default="random")
+    parser.add_argument("--protocol", choices=("binary", "json", "mixed"), default="binary")
+    parser.add_argument("--deflate", action="store_true", help="offer the .deflate subprotocols (compressed large frames)")
+    parser.add_argument("--connect-concurrency", type=int, default=50)
+    parser.add_argument("--move-timeout", type=float, default=2.0, help="seconds before a move counts as lost")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="JSON results file (default: swarm-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to show next to this run")
+    args = parser.parse_args()
+
+    result = asyncio.run(swarm(args))
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    report(result, previous)
+
+    out = args.out or time.strftime("swarm-%Y%m%d-%H%M%S.json")
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nresults written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# bench/workers.py
+"""
+Connection rate vs number of server worker processes.
+Starts the broker and uvicorn with --workers N, opens many websocket
+connections and reports how many completed (init received) per second.
+Run from project root:
+    python -m bench.workers
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import websockets
+
+
+async def wait_ready(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with websockets.connect(url) as ws:
+                await ws.recv()
+            return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def drain(ws) -> None:
+    # keep reading so the server's outboxes never back up
+    try:
+        async for _ in ws:
+            pass
+    except websockets.ConnectionClosed:
+        pass
+
+
+async def open_connections(url: str, count: int, concurrency: int) -> tuple[float, list[float], int]:
+    """Open ``count`` connections; returns elapsed seconds, per-connection times and the final player count."""
+    limit = asyncio.Semaphore(concurrency)
+    sockets, readers, times, refused = [], [], [], []
+
+    async def connect() -> None:
+        async with limit:
+            start = time.perf_counter()
+            try:
+                ws = await websockets.connect(url)
+                await ws.recv()  # init
+            except (OSError, websockets.WebSocketException) as e:
+                refused.append(e)
+                return
+            times.append(time.perf_counter() - start)
+            sockets.append(ws)
+            readers.append(asyncio.create_task(drain(ws)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(connect() for _ in range(count)))
+    elapsed = time.perf_counter() - start
+    if refused:
+        for ws in sockets:
+            await ws.close()
+        raise RuntimeError(f"{len(refused)} of {count} connections were refused, e.g. {refused[0]!r}")
+
+    # every worker should now count every player, wherever it connected
+    await asyncio.sleep(0.5)
+    async with websockets.connect(url) as probe:
+        seen = json.loads(await probe.recv())["player_count"] - 1
+    if seen != count:
+        print(f"warning: the probe's worker counts {seen} of {count} players", file=sys.stderr)
+
+    for ws in sockets:
+        await ws.close()
+    for task in readers:
+        task.cancel()
+    return elapsed, times, seen
+
+
+def run_case(workers: int, backend: str, port: int, connections: int, concurrency: int) -> None:
+    broker_path = os.path.join(tempfile.mkdtemp(), "broker.sock")
+    side = max(40, math.isqrt(4 * connections) + 1)  # room to spawn everyone
+    env = dict(
+        os.environ,
+        GAME_BACKEND=backend,
+        GAME_BROKER_PATH=broker_path,
+        GAME_DEBUG="false",
+        GAME_ADMIT_RATE="0",  # time the server itself, not the admission pacing
+        # one room holds every bot and the probe, so each worker can count them all
+        GAME_MAX_PLAYERS=str(connections + 1),
+        GAME_MAX_ROOMS="1",
+        GAME_GRID_WIDTH=str(side),
+        GAME_GRID_HEIGHT=str(side),
+    )
+    processes = []
+    if backend == "broker":
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "server.broker", "--path", broker_path],
+            env=env, stderr=subprocess.DEVNULL,
+        ))
+    processes.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "critical"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    ))
+    url = f"ws://127.0.0.1:{port}/"
+    try:
+        asyncio.run(wait_ready(url))
+        time.sleep(1.0)  # let every worker reach the broker
+        elapsed, times, seen = asyncio.run(open_connections(url, connections, concurrency))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+
+    times_ms = sorted(t * 1000 for t in times)
+    p99 = times_ms[int(len(times_ms) * 0.99) - 1]
+    print(
+        f"{workers:>8} {backend:>8} {connections / elapsed:>10.0f} "
+        f"{statistics.median(times_ms):>9.1f} {p99:>9.1f} {seen:>6}/{connections}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure connections per second against worker count")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50, help="connections opened at once")
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+
+    print(f"cpus: {os.cpu_count()}, connections: {args.connections}, concurrency: {args.concurrency}")
+    print(f"{'workers':>8} {'backend':>8} {'conn/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'seen':>13}")
+    run_case(1, "local", args.port, args.connections, args.concurrency)
+    for workers in (int(n) for n in args.workers.split(",")):
+        run_case(workers, "broker", args.port, args.connections, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
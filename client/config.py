@@ -1,5 +1,5 @@
 # client/config.py
-# Client-side configuration (screen sizes, colors, grid)
+# Client-side configuration (screen sizes, colors, tiles)
 SCREEN_WIDTH = 1800
 SCREEN_HEIGHT = 900
 
@@ -8,12 +8,29 @@ TILE_COLOR = (153, 101, 21)
 PLAYER_TILE_COLOR = (255, 0, 0)
 OTHER_PLAYER_TILE_COLOR = (0, 0, 255)
 
-GRID_WIDTH = 40
-GRID_HEIGHT = 40
+# Ground colors by map tile kind (tile byte & 0x7F, see server/game/tilemap.py);
+# the map size and tiles come from the server
+TILE_COLORS = {
+    0: TILE_COLOR,        # ground
+    1: (96, 128, 56),     # grass
+    2: (112, 112, 112),   # rock (solid)
+}
 
 TILE_WIDTH = 256
 TILE_HEIGHT = 128
 
 ANIM_IMG_SIZE = (200, 200)
 
+# The ground is pre-rendered in blocks of GROUND_BLOCK_TILES x GROUND_BLOCK_TILES
+# tiles, of which the GROUND_CACHE_BLOCKS last drawn are kept; 0 keeps twice
+# as many as can be on screen at once. A 4x4 block of 256x128 tiles is a
+# 1025x513 surface, about 2 MB: at 1800x900 up to 16 are on screen, so the
+# cache holds 32 blocks, about 67 MB.
+GROUND_BLOCK_TILES = 4
+GROUND_CACHE_BLOCKS = 0
+
 FPS = 30
+
+# Redraw and present only the parts of the screen that changed each frame
+# (python -m client.main --dirty-rects turns it on too)
+DIRTY_RECTS = False
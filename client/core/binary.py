@@ -0,0 +1,138 @@
+# client/core/binary.py
+# Client half of the binary wire protocol (see server/events/binary.py for
+# the frame layouts). Decoded events have the same dict shape as the JSON
+# ones, with short integer player ids instead of UUID strings.
+import struct
+import zlib
+from client.core.directions import DIRECTION_ORDER, DIRECTION_CODES
+
+JSON_PROTOCOL = "iso.json.v1"
+BINARY_PROTOCOL = "iso.bin.v1"
+# large frames arrive deflated on these (see inflate)
+DEFLATE_SUFFIX = ".deflate"
+
+INIT = 0x01
+PLAYER_JOIN = 0x02
+PLAYER_LEAVE = 0x03
+PLAYER_UPDATE = 0x04
+PLAYER_ENTER_VIEW = 0x05
+PLAYER_LEAVE_VIEW = 0x06
+PLAYER_BATCH = 0x07
+DELTA = 0x08
+CHUNK = 0x09
+PING = 0x0A
+PLAYER_COUNT = 0x0B
+DEFLATED = 0x7F
+
+MOVE = 0x10
+ACK = 0x11
+MOVES = 0x12
+MOVE_TO = 0x13
+PONG = 0x14
+
+_PLAYER = struct.Struct("<HHHB")
+_ID = struct.Struct("<H")
+_INIT_HEADER = struct.Struct("<HHHHH")
+_COUNT = struct.Struct("<H")
+_DELTA_HEADER = struct.Struct("<IIH")
+_CHUNK_HEADER = struct.Struct("<HHH")
+_CHUNK_INFO = struct.Struct("<HB")
+_MOVE = struct.Struct("<BB")
+_ACK = struct.Struct("<BI")
+_MOVE_TO = struct.Struct("<BHH")
+
+_PLAYER_TYPES = {
+    PLAYER_JOIN: "player_join",
+    PLAYER_UPDATE: "player_update",
+    PLAYER_ENTER_VIEW: "player_enter_view",
+}
+_ID_TYPES = {
+    PLAYER_LEAVE: "player_leave",
+    PLAYER_LEAVE_VIEW: "player_leave_view",
+}
+
+
+def encode_move(direction: str) -> bytes:
+    return _MOVE.pack(MOVE, DIRECTION_CODES[direction])
+
+
+def encode_moves(directions: list[str]) -> bytes:
+    return bytes([MOVES, len(directions)] + [DIRECTION_CODES[d] for d in directions])
+
+
+def encode_move_to(x: int, y: int) -> bytes:
+    return _MOVE_TO.pack(MOVE_TO, x, y)
+
+
+def encode_ack(seq: int) -> bytes:
+    return _ACK.pack(ACK, seq)
+
+
+def encode_pong() -> bytes:
+    return bytes((PONG,))
+
+
+def subprotocols(binary: bool, deflate: bool) -> list[str]:
+    """Subprotocols to offer, most preferred first."""
+    protocols = [BINARY_PROTOCOL, JSON_PROTOCOL] if binary else [JSON_PROTOCOL]
+    if deflate:
+        protocols = [variant for protocol in protocols for variant in (protocol + DEFLATE_SUFFIX, protocol)]
+    return protocols
+
+
+def inflate(message):
+    """Unwrap a DEFLATED frame into the binary frame or JSON text inside; other messages pass through."""
+    if isinstance(message, bytes) and message[:1] == bytes((DEFLATED,)):
+        return zlib.decompress(message[1:], -15)
+    return message
+
+
+def _players(data: bytes, offset: int, count: int) -> dict:
+    players = {}
+    for pid, x, y, code in _PLAYER.iter_unpack(data[offset:offset + count * _PLAYER.size]):
+        players[pid] = {"position": [x, y], "direction": DIRECTION_ORDER[code]}
+    return players
+
+
+def decode_event(data: bytes) -> dict:
+    """Decode one server frame into the same dict shape as the JSON events."""
+    msg_type = data[0]
+    if msg_type in _PLAYER_TYPES:
+        pid, x, y, code = _PLAYER.unpack_from(data, 1)
+        return {"type": _PLAYER_TYPES[msg_type], "id": pid, "position": [x, y], "direction": DIRECTION_ORDER[code]}
+    if msg_type in _ID_TYPES:
+        return {"type": _ID_TYPES[msg_type], "id": _ID.unpack_from(data, 1)[0]}
+    if msg_type == PLAYER_BATCH:
+        (count,) = _COUNT.unpack_from(data, 1)
+        return {"type": "player_batch", "players": _players(data, 1 + _COUNT.size, count)}
+    if msg_type == DELTA:
+        seq, base, count = _DELTA_HEADER.unpack_from(data, 1)
+        offset = 1 + _DELTA_HEADER.size
+        players = _players(data, offset, count)
+        offset += count * _PLAYER.size
+        (removed_count,) = _COUNT.unpack_from(data, offset)
+        removed = [pid for (pid,) in _ID.iter_unpack(data[offset + _COUNT.size:offset + _COUNT.size + removed_count * _ID.size])]
+        return {"type": "delta", "seq": seq, "base": base, "players": players, "removed": removed}
+    if msg_type == INIT:
+        client_id, player_count, width, height, count = _INIT_HEADER.unpack_from(data, 1)
+        offset = 1 + _INIT_HEADER.size + count * _PLAYER.size
+        name_end = offset + 1 + data[offset]
+        chunk_size, chunk_radius = _CHUNK_INFO.unpack_from(data, name_end)
+        return {
+            "type": "init",
+            "client_id": client_id,
+            "player_count": player_count,
+            "players": _players(data, 1 + _INIT_HEADER.size, count),
+            "room": data[offset + 1:name_end].decode(),
+            "grid": [width, height],
+            "chunk_size": chunk_size,
+            "chunk_radius": chunk_radius,
+        }
+    if msg_type == CHUNK:
+        cx, cy, size = _CHUNK_HEADER.unpack_from(data, 1)
+        return {"type": "chunk", "x": cx, "y": cy, "size": size, "tiles": data[1 + _CHUNK_HEADER.size:]}
+    if msg_type == PLAYER_COUNT:
+        return {"type": "player_count", "player_count": _COUNT.unpack_from(data, 1)[0]}
+    if msg_type == PING:
+        return {"type": "ping"}
+    raise ValueError(f"unknown message type {msg_type:#x}")
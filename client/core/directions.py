@@ -23,3 +23,17 @@ DIRECTION_VECTORS = {
     "down_left": (-1, 1),
     "down_right": (1, 1),
 }
+
+# Wire order shared with the server: a direction's index is its one-byte
+# code in the binary protocol.
+DIRECTION_ORDER = (
+    "up",
+    "down",
+    "left",
+    "right",
+    "up_left",
+    "up_right",
+    "down_left",
+    "down_right",
+)
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTION_ORDER)}
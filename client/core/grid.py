@@ -15,6 +15,23 @@ def iso_to_cart(iso_x: int, iso_y: int) -> tuple[int, int]:
     cart_y = (iso_y / TILE_HEIGHT_HALF - iso_x / TILE_WIDTH_HALF) / 2
     return int(cart_x), int(cart_y)
 
+def visible_range(offset_x: int, offset_y: int, width: int, height: int, margin: int = 0) -> tuple[range, range]:
+    """Cartesian cols and rows around the tiles showing on a width x height
+    screen at the camera offset, ``margin`` pixels past each edge included.
+
+    It's the bounding box of the screen corners in cartesian space, so a
+    diamond of tiles near its corners is still off screen.
+    """
+    corners = [
+        iso_to_cart(screen_x - offset_x, screen_y - offset_y)
+        for screen_x in (-margin, width + margin)
+        for screen_y in (-margin, height + margin)
+    ]
+    xs = [x for x, _ in corners]
+    ys = [y for _, y in corners]
+    # iso_to_cart truncates towards zero, so pad a tile both ways
+    return range(min(xs) - 1, max(xs) + 2), range(min(ys) - 1, max(ys) + 2)
+
 def draw_tile(screen: pygame.Surface, x: int, y: int, color: tuple[int, int, int]):
     points = [
         (x, y),
@@ -24,9 +41,9 @@ def draw_tile(screen: pygame.Surface, x: int, y: int, color: tuple[int, int, int
     ]
     pygame.draw.polygon(screen, color, points)
 
-def draw_grid(screen: pygame.Surface, grid_width: int, grid_height: int, offset_x: int, offset_y: int):
-    for row in range(grid_height):
-        for col in range(grid_width):
+def draw_grid(screen: pygame.Surface, cols: range, rows: range, offset_x: int, offset_y: int):
+    for row in rows:
+        for col in cols:
             iso_x, iso_y = cart_to_iso(col, row)
             iso_x += offset_x
             iso_y += offset_y
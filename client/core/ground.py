@@ -0,0 +1,135 @@
+# client/core/ground.py
+from collections import OrderedDict
+from typing import Optional
+import pygame
+from client.config import GROUND_BLOCK_TILES, GROUND_CACHE_BLOCKS, SCREEN_HEIGHT, SCREEN_WIDTH, TILE_COLOR, TILE_COLORS
+from client.core.grid import TILE_WIDTH_HALF, TILE_HEIGHT_HALF, cart_to_iso, draw_tile, draw_grid, visible_range
+from client.core.state import GameState
+
+# Fills the corners of a block surface around its tiles, blitted as transparent
+COLORKEY = (255, 0, 255)
+
+
+class GroundCache:
+    """The map's ground and grid outline, pre-rendered in blocks of tiles.
+
+    Every map chunk is split into ``block`` x ``block`` tile blocks, each
+    drawn once into a surface of its own and then only blitted at the camera
+    offset. The ``capacity`` most recently drawn blocks are kept (by default
+    twice as many as fit on a ``SCREEN_WIDTH`` x ``SCREEN_HEIGHT`` screen,
+    each a screen-format surface of about 2 MB). A block is
+    redrawn when its chunk or one next to it is replaced or dropped, and
+    all of them when the room's map changes.
+    """
+
+    def __init__(self, capacity: int = GROUND_CACHE_BLOCKS, block: int = GROUND_BLOCK_TILES):
+        self.capacity = capacity or 2 * blocks_on_screen(SCREEN_WIDTH, SCREEN_HEIGHT, block)
+        self.block = block
+        # (first col, first row) -> (chunks it was drawn from, surface)
+        self._blocks: "OrderedDict[tuple, tuple[list, pygame.Surface]]" = OrderedDict()
+        self._map: Optional[tuple] = None
+        self.rendered = 0  # blocks drawn so far
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def draw(self, screen: pygame.Surface, state: GameState, offset_x: int, offset_y: int) -> int:
+        """Blit the blocks of ``state``'s chunks that are on screen; returns how many."""
+        current = (state.room, state.grid_width, state.grid_height, state.chunk_size)
+        if current != self._map:
+            self._blocks.clear()
+            self._map = current
+
+        size, block = state.chunk_size, self.block
+        if not size:
+            return 0
+        view = screen.get_rect()
+        # only the chunks, and blocks in them, that can be on screen
+        cols, rows = visible_range(offset_x, offset_y, view.width, view.height)
+        cols = range(max(0, cols.start), min(state.grid_width, cols.stop))
+        rows = range(max(0, rows.start), min(state.grid_height, rows.stop))
+        blits = []
+        for cy in range(rows.start // size, (rows.stop - 1) // size + 1):
+            for cx in range(cols.start // size, (cols.stop - 1) // size + 1):
+                if (cx, cy) not in state.chunks:
+                    continue
+                left, top = cx * size, cy * size
+                col_end = min(left + size, cols.stop)
+                row_end = min(top + size, rows.stop)
+                for row in range(top + max(0, rows.start - top) // block * block, row_end, block):
+                    for col in range(left + max(0, cols.start - left) // block * block, col_end, block):
+                        block_cols = range(col, min(col + block, left + size, state.grid_width))
+                        block_rows = range(row, min(row + block, top + size, state.grid_height))
+                        x, y, w, h = block_bounds(block_cols, block_rows)
+                        if not view.colliderect(x + offset_x, y + offset_y, w, h):
+                            continue
+                        surface = self._surface(screen, state, block_cols, block_rows)
+                        blits.append((surface, (x + offset_x, y + offset_y)))
+        screen.blits(blits, doreturn=False)
+        return len(blits)
+
+    def _surface(self, screen: pygame.Surface, state: GameState, cols: range, rows: range) -> pygame.Surface:
+        # The block's tiles, plus the grid lines of the tiles around it: a
+        # block blitted later covers the edges its neighbours drew, so it
+        # draws them again. It's redrawn when any of those chunks changes.
+        size = state.chunk_size
+        around_cols = range(max(0, cols.start - 1), min(state.grid_width, cols.stop + 1))
+        around_rows = range(max(0, rows.start - 1), min(state.grid_height, rows.stop + 1))
+        keys = [
+            (cx, cy)
+            for cy in range(around_rows.start // size, (around_rows.stop - 1) // size + 1)
+            for cx in range(around_cols.start // size, (around_cols.stop - 1) // size + 1)
+        ]
+        sources = [state.chunks.get(key) for key in keys]
+
+        key = (cols.start, rows.start)
+        entry = self._blocks.get(key)
+        if entry is not None and all(old is new for old, new in zip(entry[0], sources)):
+            self._blocks.move_to_end(key)
+            return entry[1]
+
+        x, y, w, h = block_bounds(cols, rows)
+        # same pixel format as the screen, so blitting needs no conversion
+        surface = pygame.Surface((w, h), 0, screen)
+        surface.fill(COLORKEY)
+        tiles = state.chunks[(cols.start // size, rows.start // size)]
+        left, top = cols.start // size * size, rows.start // size * size
+        for row in rows:
+            base = (row - top) * size - left
+            for col in cols:
+                iso_x, iso_y = cart_to_iso(col, row)
+                color = TILE_COLORS.get(tiles[base + col] & 0x7F, TILE_COLOR)
+                draw_tile(surface, iso_x - x, iso_y - y, color)
+        for (cx, cy), source in zip(keys, sources):
+            if source is not None:
+                draw_grid(
+                    surface,
+                    range(max(around_cols.start, cx * size), min(around_cols.stop, (cx + 1) * size)),
+                    range(max(around_rows.start, cy * size), min(around_rows.stop, (cy + 1) * size)),
+                    -x, -y,
+                )
+        surface.set_colorkey(COLORKEY, pygame.RLEACCEL)
+
+        self._blocks[key] = (sources, surface)
+        self._blocks.move_to_end(key)
+        while len(self._blocks) > self.capacity:
+            self._blocks.popitem(last=False)
+        self.rendered += 1
+        return surface
+
+
+def blocks_on_screen(width: int, height: int, block: int) -> int:
+    """Most ``block`` x ``block`` tile blocks a ``width`` x ``height`` screen can show at once."""
+    # block diamonds tile the plane, one per half of a block's bounding box;
+    # those overlapping the screen have their centre within a block's size of it
+    w, h = 2 * block * TILE_WIDTH_HALF, 2 * block * TILE_HEIGHT_HALF
+    return -(-2 * (width + w) * (height + h) // (w * h))
+
+
+def block_bounds(cols: range, rows: range) -> tuple[int, int, int, int]:
+    """Iso-space (x, y, width, height) covering the tiles ``cols`` x ``rows``."""
+    span = len(cols) + len(rows)
+    x = (cols.start - rows.stop + 1) * TILE_WIDTH_HALF - TILE_WIDTH_HALF
+    y = (cols.start + rows.start) * TILE_HEIGHT_HALF
+    # + 1: polygons and lines include their last pixel
+    return x, y, span * TILE_WIDTH_HALF + 1, span * TILE_HEIGHT_HALF + 1
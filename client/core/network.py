@@ -5,23 +5,36 @@ import time
 import logging
 import threading
 from typing import Optional
+from client.core.binary import (
+    BINARY_PROTOCOL, JSON_PROTOCOL, decode_event, encode_ack, encode_move, encode_move_to, encode_moves, encode_pong,
+    inflate, subprotocols,
+)
 from client.core.state import GameState
 
 logger = logging.getLogger("client.network")
 logger.setLevel(logging.DEBUG)
 
 class Network:
-    """WebSocket client that pushes parsed messages into GameState.message_queue."""
+    """WebSocket client that pushes parsed messages into GameState.message_queue.
 
-    def __init__(self, url: str, state: GameState):
+    Offers the compact binary protocol first and falls back to JSON if the
+    server doesn't agree to it (or ``binary=False``). With ``deflate`` it
+    also asks the server to compress large frames.
+    """
+
+    def __init__(self, url: str, state: GameState, binary: bool = True, deflate: bool = True):
         self.url = url
         self.ws: Optional[websocket.WebSocketApp] = None
         self.is_connected = False
         self.state = state
+        self.subprotocols = subprotocols(binary, deflate)
+        self.binary = False
         self._stop_flag = threading.Event()
 
     def _on_open(self, ws):
-        logger.info("WebSocket connected")
+        protocol = ws.sock.getsubprotocol() or JSON_PROTOCOL
+        self.binary = protocol.startswith(BINARY_PROTOCOL)
+        logger.info("WebSocket connected (%s)", protocol)
         self.is_connected = True
         self.state.connection_status = "Connected"
 
@@ -32,7 +45,15 @@ class Network:
 
     def _on_message(self, ws, message):
         try:
-            data = json.loads(message)
+            message = inflate(message)
+            if self.binary:
+                data = decode_event(message)
+            else:
+                data = json.loads(message)
+            if data.get("type") == "ping":
+                # answered here, so a busy game loop doesn't get us dropped as idle
+                self.send_pong()
+                return
             self.state.push_message(data)
         except Exception as e:
             logger.error("Failed to parse message: %s", e)
@@ -48,6 +69,7 @@ class Network:
             on_close=self._on_close,
             on_message=self._on_message,
             on_error=self._on_error,
+            subprotocols=self.subprotocols,
         )
         self.ws.run_forever()
 
@@ -78,8 +100,59 @@ class Network:
     def send_move(self, direction: str) -> None:
         if self.ws and self.is_connected:
             try:
-                self.ws.send(json.dumps({"move": direction}))
+                if self.binary:
+                    self.ws.send(encode_move(direction), opcode=websocket.ABNF.OPCODE_BINARY)
+                else:
+                    self.ws.send(json.dumps({"move": direction}))
             except Exception as e:
                 logger.error("Failed to send move: %s", e)
         else:
             logger.debug("Cannot send move, not connected")
+
+    def send_moves(self, directions: list[str]) -> None:
+        """Send several moves in one frame (the server rate-limits them per move)."""
+        if self.ws and self.is_connected:
+            try:
+                if self.binary:
+                    self.ws.send(encode_moves(directions), opcode=websocket.ABNF.OPCODE_BINARY)
+                else:
+                    self.ws.send(json.dumps({"moves": directions}))
+            except Exception as e:
+                logger.error("Failed to send moves: %s", e)
+        else:
+            logger.debug("Cannot send moves, not connected")
+
+    def send_move_to(self, x: int, y: int) -> None:
+        """Ask the server to walk us to tile (x, y) along a route it finds."""
+        if self.ws and self.is_connected:
+            try:
+                if self.binary:
+                    self.ws.send(encode_move_to(x, y), opcode=websocket.ABNF.OPCODE_BINARY)
+                else:
+                    self.ws.send(json.dumps({"move_to": [x, y]}))
+            except Exception as e:
+                logger.error("Failed to send move_to: %s", e)
+        else:
+            logger.debug("Cannot send move_to, not connected")
+
+    def send_ack(self, seq: int) -> None:
+        """Acknowledge a snapshot so the server can send deltas against it."""
+        if self.ws and self.is_connected:
+            try:
+                if self.binary:
+                    self.ws.send(encode_ack(seq), opcode=websocket.ABNF.OPCODE_BINARY)
+                else:
+                    self.ws.send(json.dumps({"ack": seq}))
+            except Exception as e:
+                logger.error("Failed to send ack: %s", e)
+
+    def send_pong(self) -> None:
+        """Answer the server's heartbeat ping."""
+        if self.ws and self.is_connected:
+            try:
+                if self.binary:
+                    self.ws.send(encode_pong(), opcode=websocket.ABNF.OPCODE_BINARY)
+                else:
+                    self.ws.send(json.dumps({"pong": True}))
+            except Exception as e:
+                logger.error("Failed to send pong: %s", e)
@@ -1,8 +1,12 @@
 # client/core/state.py
+import base64
 import queue
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 from client.core.player import Player
 
+# How many reconstructed snapshots to keep as possible delta bases
+SNAPSHOT_HISTORY = 64
+
 class GameState:
     """Local game state container."""
 
@@ -13,6 +17,21 @@ class GameState:
         self.other_players: Dict[str, dict] = {}
         self.message_queue: "queue.Queue[dict]" = queue.Queue()
         self.connection_status: str = "Disconnected"
+        # room we were placed in and its grid size, both sent with init
+        self.room: Optional[str] = None
+        # players in the whole room, ourselves included, as the server counts them
+        self.player_count: int = 0
+        self.grid_width: int = 0
+        self.grid_height: int = 0
+        # map chunks around us: (cx, cy) -> chunk_size * chunk_size tile bytes.
+        # The server sends the ones within chunk_radius of ours; we drop the
+        # ones more than chunk_radius + 1 away, as the server expects.
+        self.chunk_size: int = 0
+        self.chunk_radius: int = 0
+        self.chunks: Dict[tuple, bytes] = {}
+        # seq -> full visible player state, rebuilt from server deltas
+        self.snapshots: Dict[int, Dict[str, dict]] = {}
+        self.snapshot_seq: int = 0
 
     # helpers to mutate state (thread-safe queue used for messages)
     def push_message(self, msg: dict) -> None:
@@ -24,9 +43,40 @@ class GameState:
         except queue.Empty:
             return None
 
-    def update_init(self, client_id: str, players: dict) -> None:
+    def update_init(
+        self,
+        client_id: str,
+        players: dict,
+        room: Optional[str] = None,
+        grid: Optional[list] = None,
+        chunk_size: int = 0,
+        chunk_radius: int = 0,
+        player_count: int = 0,
+    ) -> None:
         self.client_id = client_id
         self.other_players = players.copy()
+        self.room = room
+        self.player_count = player_count
+        if grid and grid[0] and grid[1]:
+            self.grid_width, self.grid_height = grid
+        self.chunk_size = chunk_size
+        self.chunk_radius = chunk_radius
+        self.chunks.clear()
+        self.snapshots.clear()
+        self.snapshot_seq = 0
+
+    def set_chunk(self, cx: int, cy: int, tiles: Union[bytes, str]) -> None:
+        # JSON carries the tiles base64-encoded
+        self.chunks[(cx, cy)] = base64.b64decode(tiles) if isinstance(tiles, str) else tiles
+
+    def _drop_far_chunks(self) -> None:
+        if not self.chunk_size or not self.player:
+            return
+        cx = int(self.player.position[0]) // self.chunk_size
+        cy = int(self.player.position[1]) // self.chunk_size
+        keep = self.chunk_radius + 1
+        for key in [k for k in self.chunks if max(abs(k[0] - cx), abs(k[1] - cy)) > keep]:
+            del self.chunks[key]
 
     def add_player(self, client_id: str, info: dict) -> None:
         self.other_players[client_id] = info.copy()
@@ -40,5 +90,34 @@ class GameState:
             self.player.position = info["position"]
             self.player.direction = info.get("direction", self.player.direction)
             self.player.animation.update_direction(self.player.direction)
+            self._drop_far_chunks()
         else:
             self.other_players[client_id] = info.copy()
+
+    def apply_delta(self, seq: int, base: int, players: dict, removed: list) -> bool:
+        """Rebuild snapshot ``seq`` from its base and make it current if it is the newest.
+
+        Deltas are applied to the stored copy of ``base`` (0 = empty), never to
+        the live state, so lost or reordered deltas can't leave stale players.
+        Returns True if the snapshot was stored and should be acknowledged.
+        """
+        if base == 0:
+            snapshot = {}
+        elif base in self.snapshots:
+            snapshot = self.snapshots[base].copy()
+        else:
+            return False
+        for pid in removed:
+            snapshot.pop(pid, None)
+        snapshot.update(players)
+
+        self.snapshots[seq] = snapshot
+        for old in [s for s in self.snapshots if s <= seq - SNAPSHOT_HISTORY]:
+            del self.snapshots[old]
+
+        if seq > self.snapshot_seq:
+            self.snapshot_seq = seq
+            self.other_players = {pid: info for pid, info in snapshot.items() if pid != self.client_id}
+            if self.client_id in snapshot:
+                self.update_player(self.client_id, snapshot[self.client_id])
+        return True
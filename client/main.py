@@ -2,14 +2,16 @@
 """
 Client entrypoint.
 Run from project root:
-    python -m client.main
+    python -m client.main [--room NAME] [--player NAME] [--dirty-rects]
 """
+import argparse
 import logging
 import pygame
 import sys
 from pathlib import Path
+from urllib.parse import urlencode
 
-from client.config import SCREEN_WIDTH, SCREEN_HEIGHT
+from client.config import SCREEN_WIDTH, SCREEN_HEIGHT, DIRTY_RECTS
 from client.core.animation import Animation
 from client.core.player import Player
 from client.core.state import GameState
@@ -24,6 +26,16 @@ logging.basicConfig(
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Isometric multiplayer client")
+    parser.add_argument("--server", default="ws://127.0.0.1:8000/")
+    parser.add_argument("--room", help="room to join (the server picks one if omitted)")
+    parser.add_argument("--player", help="name to play as; the server can save where you left off")
+    parser.add_argument("--no-deflate", action="store_true", help="don't ask the server to compress large frames")
+    parser.add_argument("--dirty-rects", action="store_true", help="only redraw the parts of the screen that change")
+    args = parser.parse_args()
+    query = urlencode({key: value for key, value in (("room", args.room), ("player", args.player)) if value})
+    url = f"{args.server}?{query}" if query else args.server
+
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Isometric Multiplayer (Client)")
@@ -33,7 +45,7 @@ def main():
 
     # Setup state & network
     state = GameState()
-    network = Network("ws://127.0.0.1:8000/", state)
+    network = Network(url, state, deflate=not args.no_deflate)
     network_thread = network.start()  # background thread for WebSocket
 
     # Create local player with animation
@@ -41,7 +53,7 @@ def main():
     player = Player([5, 5], animation)
     state.player = player
 
-    scene = GameScene(screen, state, network)
+    scene = GameScene(screen, state, network, dirty_rects=args.dirty_rects or DIRTY_RECTS)
 
     try:
         while True:
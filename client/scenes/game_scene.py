@@ -1,39 +1,80 @@
 # client/scenes/game_scene.py
 import pygame
+from typing import Iterator, Optional
 from client.core.state import GameState
-from client.core.grid import cart_to_iso, iso_to_cart, draw_tile, draw_grid
+from client.core.grid import cart_to_iso, iso_to_cart, draw_tile, visible_range
+from client.core.ground import GroundCache
 from client.core.input import InputHandler
 from client.config import (
     SCREEN_WIDTH, SCREEN_HEIGHT,
-    BACKGROUND_COLOR, TILE_COLOR, PLAYER_TILE_COLOR, OTHER_PLAYER_TILE_COLOR,
-    GRID_WIDTH, GRID_HEIGHT, FPS, TILE_WIDTH, TILE_HEIGHT,
+    BACKGROUND_COLOR, PLAYER_TILE_COLOR, OTHER_PLAYER_TILE_COLOR,
+    FPS, TILE_WIDTH, TILE_HEIGHT, ANIM_IMG_SIZE, DIRTY_RECTS,
 )
-from client.ui.hud import draw_hud
+from client.ui.hud import draw_hud, hud_lines, hud_rect
+
+# How far past the screen edge a player's tile or sprite can reach from its
+# tile's top vertex, in pixels
+SPRITE_MARGIN = max(TILE_WIDTH // 2, TILE_HEIGHT, max(ANIM_IMG_SIZE) // 2)
+
+# Window events after which the whole screen has to be presented again
+EXPOSE_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED)
 
 class GameScene:
-    def __init__(self, screen: pygame.Surface, state: GameState, network):
+    """Draws the world around the local player and runs one frame at a time.
+
+    With ``dirty_rects`` a frame only redraws and presents the parts of the
+    screen that changed since the last one (players that moved, turned,
+    came or went, the HUD text and the mouse highlight), and nothing at all
+    if nothing did. When the camera moves or the map chunks change, the
+    whole screen is redrawn as usual.
+    """
+
+    def __init__(self, screen: pygame.Surface, state: GameState, network, dirty_rects: bool = DIRTY_RECTS):
         self.screen = screen
         self.state = state
         self.network = network
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 36)
         self.input_handler = InputHandler(state, network)
+        self.ground = GroundCache()
+        self.dirty_rects = dirty_rects
+        # what the last frame presented: camera/map key and name -> (key, rect)
+        self._camera: Optional[tuple] = None
+        self._items: dict = {}
 
     def process_messages(self) -> None:
         """Handle queued messages from the server."""
+        ack = None
         while True:
             msg = self.state.pop_message()
             if msg is None:
                 break
             msg_type = msg.get("type")
             if msg_type == "init":
-                self.state.update_init(msg.get("client_id"), msg.get("players", {}))
-            elif msg_type == "player_join":
+                self.state.update_init(
+                    msg.get("client_id"), msg.get("players", {}), msg.get("room"), msg.get("grid"),
+                    msg.get("chunk_size", 0), msg.get("chunk_radius", 0), msg.get("player_count", 0),
+                )
+            elif msg_type == "player_count":
+                self.state.player_count = msg["player_count"]
+            elif msg_type == "chunk":
+                self.state.set_chunk(msg["x"], msg["y"], msg["tiles"])
+            elif msg_type in ("player_join", "player_enter_view"):
                 self.state.add_player(msg["id"], {"position": msg["position"], "direction": msg.get("direction", "down")})
-            elif msg_type == "player_leave":
+            elif msg_type in ("player_leave", "player_leave_view"):
                 self.state.remove_player(msg["id"])
             elif msg_type == "player_update":
                 self.state.update_player(msg["id"], {"position": msg["position"], "direction": msg.get("direction", "down")})
+            elif msg_type == "player_batch":
+                for pid, info in msg.get("players", {}).items():
+                    self.state.update_player(pid, {"position": info["position"], "direction": info.get("direction", "down")})
+            elif msg_type == "delta":
+                if self.state.apply_delta(msg["seq"], msg["base"], msg["players"], msg["removed"]):
+                    ack = max(ack or 0, msg["seq"])
+
+        # one ack per frame for the newest snapshot we can build on
+        if ack is not None:
+            self.network.send_ack(ack)
 
     def handle_input(self, events) -> None:
         player = self.state.player
@@ -52,16 +93,8 @@ class GameScene:
         offset_x = (SCREEN_WIDTH // 2) - cart_to_iso(int(player.position[0]), int(player.position[1]))[0]
         offset_y = (SCREEN_HEIGHT // 2) - cart_to_iso(int(player.position[0]), int(player.position[1]))[1]
 
-        # draw tiles
-        for row in range(GRID_HEIGHT):
-            for col in range(GRID_WIDTH):
-                iso_x, iso_y = cart_to_iso(col, row)
-                iso_x += offset_x
-                iso_y += offset_y
-                draw_tile(self.screen, iso_x, iso_y, TILE_COLOR)
-
-        # draw grid overlay
-        draw_grid(self.screen, GRID_WIDTH, GRID_HEIGHT, offset_x, offset_y)
+        # the map chunks we have, tiles colored by kind, with the grid overlay
+        self.ground.draw(self.screen, self.state, offset_x, offset_y)
 
         # draw main player
         player_iso_x, player_iso_y = cart_to_iso(int(player.position[0]), int(player.position[1]))
@@ -71,16 +104,7 @@ class GameScene:
         player.animation.draw_player(self.screen, player_iso_x, player_iso_y)
 
         # draw other players
-        for pid, info in self.state.other_players.items():
-            pos = info["position"]
-            direction = info.get("direction", "down")
-            iso_x, iso_y = cart_to_iso(pos[0], pos[1])
-            iso_x += offset_x
-            iso_y += offset_y
-            draw_tile(self.screen, iso_x, iso_y, OTHER_PLAYER_TILE_COLOR)
-            img = player.animation.get_image_by_direction(direction)
-            w, h = img.get_size()
-            self.screen.blit(img, (iso_x - w // 2, iso_y - h // 2))
+        self.draw_players(offset_x, offset_y)
 
         # debug: highlight tile under mouse and draw mouse pos
         mx, my = pygame.mouse.get_pos()
@@ -105,6 +129,111 @@ class GameScene:
         pygame.draw.polygon(self.screen, (255, 0, 0), points, 2)
         pygame.draw.circle(self.screen, (255, 0, 0), (mx, my), 3)
 
+    def visible_players(self, offset_x: int, offset_y: int) -> Iterator[tuple[str, int, int, str, pygame.Surface]]:
+        """(id, screen x, screen y, direction, sprite) of each other player
+        on screen, at its tile's top vertex; the rest are skipped."""
+        animation = self.state.player.animation
+        cols, rows = visible_range(offset_x, offset_y, SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_MARGIN)
+        view = self.screen.get_rect().inflate(2 * SPRITE_MARGIN, 2 * SPRITE_MARGIN)
+        for pid, info in self.state.other_players.items():
+            pos = info["position"]
+            if pos[0] not in cols or pos[1] not in rows:
+                continue
+            iso_x, iso_y = cart_to_iso(pos[0], pos[1])
+            iso_x += offset_x
+            iso_y += offset_y
+            if view.collidepoint(iso_x, iso_y):
+                direction = info.get("direction", "down")
+                yield pid, iso_x, iso_y, direction, animation.get_image_by_direction(direction)
+
+    def draw_players(self, offset_x: int, offset_y: int) -> None:
+        """Draw the other players that are on screen."""
+        for _, iso_x, iso_y, _, img in self.visible_players(offset_x, offset_y):
+            draw_tile(self.screen, iso_x, iso_y, OTHER_PLAYER_TILE_COLOR)
+            w, h = img.get_size()
+            self.screen.blit(img, (iso_x - w // 2, iso_y - h // 2))
+
+    def draw_frame(self) -> None:
+        self.screen.fill(BACKGROUND_COLOR)
+        self.draw_world()
+        draw_hud(self.screen, self.font, self.state)
+
+    def present_changes(self, full: bool = False) -> None:
+        """Redraw and present only the parts of the screen that changed (dirty-rect mode)."""
+        camera, items = self.layout()
+        rects = clip = None
+        if not full and camera is not None and camera == self._camera:
+            rects = self._changed(self._items, items)
+            # one clipped pass over the area covering every rect; the pixels
+            # in between come out as they were. Past half the screen a full
+            # redraw is cheaper.
+            clip = rects[0].unionall(rects[1:]) if rects else None
+            if clip is not None and clip.width * clip.height * 2 > self.screen.get_width() * self.screen.get_height():
+                rects = None
+        self._camera, self._items = camera, items
+
+        if rects is None:
+            self.draw_frame()
+            pygame.display.flip()
+        elif rects:
+            self.screen.set_clip(clip)
+            self.draw_frame()
+            self.screen.set_clip(None)
+            pygame.display.update(rects)
+
+    def layout(self) -> tuple[Optional[tuple], dict]:
+        """What the next frame shows: a key for the camera and map (None
+        without a player), and name -> (key, screen rect) of everything
+        drawn over the ground. A part is redrawn when its key or rect changes."""
+        lines = hud_lines(self.state)
+        items = {"hud": (tuple(lines), hud_rect(self.font, lines))}
+        player = self.state.player
+        if not player:
+            return None, items
+
+        state = self.state
+        offset_x = (SCREEN_WIDTH // 2) - cart_to_iso(int(player.position[0]), int(player.position[1]))[0]
+        offset_y = (SCREEN_HEIGHT // 2) - cart_to_iso(int(player.position[0]), int(player.position[1]))[1]
+        camera = (
+            offset_x, offset_y, state.room, state.grid_width, state.grid_height,
+            tuple((key, id(tiles)) for key, tiles in state.chunks.items()),
+        )
+
+        img = player.animation.current_img
+        items["player"] = (id(img), _sprite_rect(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, img))
+
+        for pid, iso_x, iso_y, direction, img in self.visible_players(offset_x, offset_y):
+            items[pid] = (direction, _sprite_rect(iso_x, iso_y, img))
+
+        # the mouse highlight: tile outline (2 px wide) and dot
+        mx, my = pygame.mouse.get_pos()
+        iso_tx, iso_ty = cart_to_iso(*iso_to_cart(mx - offset_x, my - offset_y))
+        outline = pygame.Rect(iso_tx + offset_x - TILE_WIDTH // 2, iso_ty + offset_y, TILE_WIDTH + 1, TILE_HEIGHT + 1)
+        items["mouse"] = ((mx, my), outline.inflate(4, 4).union((mx - 3, my - 3, 7, 7)))
+        return camera, items
+
+    def _changed(self, before: dict, after: dict) -> list[pygame.Rect]:
+        """Screen rects to redraw, merged where they overlap."""
+        rects = []
+        for name, (key, rect) in after.items():
+            old = before.get(name)
+            if old is None:
+                rects.append(rect)
+            elif old[0] != key or old[1] != rect:
+                rects += (old[1], rect)
+        rects += (rect for name, (_, rect) in before.items() if name not in after)
+
+        screen = self.screen.get_rect()
+        merged: list[pygame.Rect] = []
+        for rect in rects:
+            rect = rect.clip(screen)
+            if not rect.width or not rect.height:
+                continue
+            while (i := rect.collidelist(merged)) != -1:
+                rect = rect.union(merged.pop(i))
+            merged.append(rect)
+        return merged
+
     def run_once(self) -> None:
         """One tick: process events, messages, input, update, and draw."""
         events = pygame.event.get()
@@ -120,9 +249,16 @@ class GameScene:
         self.handle_input(events)
 
         # render
-        self.screen.fill(BACKGROUND_COLOR)
-        self.draw_world()
-        draw_hud(self.screen, self.font, self.state)
-
-        pygame.display.flip()
+        if self.dirty_rects:
+            self.present_changes(any(e.type in EXPOSE_EVENTS for e in events))
+        else:
+            self.draw_frame()
+            pygame.display.flip()
         self.clock.tick(FPS)
+
+
+def _sprite_rect(iso_x: int, iso_y: int, img: pygame.Surface) -> pygame.Rect:
+    """Screen area of a player drawn at a tile's top vertex: its tile and sprite."""
+    w, h = img.get_size()
+    tile = pygame.Rect(iso_x - TILE_WIDTH // 2, iso_y, TILE_WIDTH + 1, TILE_HEIGHT + 1)
+    return tile.union((iso_x - w // 2, iso_y - h // 2, w, h))
@@ -1,10 +1,20 @@
 import pygame
 from client.core.state import GameState
 
+# where each line of hud_lines goes
+HUD_POSITIONS = ((10, 10), (10, 50))
+
+def hud_lines(state: GameState) -> list[str]:
+    status = state.connection_status if state.room is None else f"{state.connection_status} ({state.room})"
+    # the whole room, not just the players we can see
+    return [f"Status: {status}", f"Players Online: {state.player_count}"]
+
 def draw_hud(screen: pygame.Surface, font: pygame.font.Font, state: GameState) -> None:
-    status_text = font.render(f"Status: {state.connection_status}", True, (255, 255, 255))
-    screen.blit(status_text, (10, 10))
+    for text, position in zip(hud_lines(state), HUD_POSITIONS):
+        screen.blit(font.render(text, True, (255, 255, 255)), position)
 
-    player_count = len(state.other_players) + (1 if state.player else 0)
-    player_count_text = font.render(f"Players Online: {player_count}", True, (255, 255, 255))
-    screen.blit(player_count_text, (10, 50))
+def hud_rect(font: pygame.font.Font, lines: list[str]) -> pygame.Rect:
+    """Screen area covered by the HUD showing ``lines``."""
+    return pygame.Rect(HUD_POSITIONS[0], font.size(lines[0])).unionall(
+        [pygame.Rect(position, font.size(text)) for text, position in zip(lines[1:], HUD_POSITIONS[1:])]
+    )
@@ -1,8 +1,12 @@
 # server/app.py
 import logging
-from litestar import Litestar, WebSocket
-from litestar.handlers import WebsocketListener
+from litestar import Litestar, Response, WebSocket, get, post
+from litestar.handlers import WebsocketListener, WebsocketListenerRouteHandler
 
+from server import metrics, profiling
+from server.config import settings
+from server.rooms import rooms
+from server.sockets.connection import GameSocket
 from server.sockets.handlers import (
     handle_accept, handle_disconnect, handle_receive
 )
@@ -12,6 +16,15 @@ logger = logging.getLogger("server")
 
 class GameWebSocket(WebsocketListener):
     path = "/"
+    # text (JSON) and binary frames both arrive as bytes, see GameSocket
+    receive_mode = "binary"
+    websocket_class = GameSocket
+
+    def to_handler(self) -> WebsocketListenerRouteHandler:
+        handler = super().to_handler()
+        # the listener accepts via WebSocket.accept; use ours so the subprotocol is negotiated
+        handler.connection_accept_handler = GameSocket.accept
+        return handler
 
     async def on_accept(self, socket: WebSocket) -> None:
         await handle_accept(socket)
@@ -19,9 +32,39 @@ class GameWebSocket(WebsocketListener):
     async def on_disconnect(self, socket: WebSocket) -> None:
         await handle_disconnect(socket)
 
-    async def on_receive(self, socket: WebSocket, data: str) -> None:
+    async def on_receive(self, socket: WebSocket, data: bytes) -> None:
         await handle_receive(socket, data)
 
 
+@get("/metrics", sync_to_thread=False)
+def metrics_endpoint() -> Response[str]:
+    """Prometheus scrape target for this worker."""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@post("/profile", sync_to_thread=False)
+def profile_endpoint(seconds: float = 10.0) -> Response[str]:
+    """Sample the event loop for ``seconds`` (only routed with settings.PROFILE)."""
+    seconds = min(max(seconds, 0.0), profiling.MAX_SAMPLE_SECONDS)
+    if not profiling.sampler.start(seconds):
+        return Response("already sampling\n", status_code=409, media_type="text/plain")
+    return Response(f"sampling for {seconds:g} s\n", status_code=202, media_type="text/plain")
+
+
+async def start_rooms() -> None:
+    await rooms.start()
+
+
+async def stop_rooms() -> None:
+    await rooms.stop()
+
+
 def create_app() -> Litestar:
-    return Litestar([GameWebSocket])
+    handlers = [GameWebSocket, metrics_endpoint]
+    if settings.PROFILE:
+        handlers.append(profile_endpoint)
+    return Litestar(
+        handlers,
+        on_startup=[start_rooms, profiling.start],
+        on_shutdown=[stop_rooms, profiling.stop],
+    )
@@ -0,0 +1,13 @@
+# server/backends/__init__.py
+from server.backends.base import Backend
+from server.backends.local import InProcessBackend
+from server.config import settings
+from server.state import ServerState
+
+
+def create_backend(state: ServerState, room: str) -> Backend:
+    """Build the backend selected by ``settings.BACKEND`` for one room."""
+    if settings.BACKEND == "broker":
+        from server.backends.brokered import BrokerBackend
+        return BrokerBackend(state, settings.BROKER_PATH, room)
+    return InProcessBackend(state)
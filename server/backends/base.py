@@ -0,0 +1,52 @@
+# server/backends/base.py
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from server.events.broadcaster import Broadcaster
+from server.game.snapshots import SnapshotManager
+from server.state import ServerState
+
+
+class Backend(ABC):
+    """Where a room's player state lives and how events about it reach clients.
+
+    Handlers and the tick loop update ``state`` for their own clients and
+    then call into the backend, which notifies everyone who should know,
+    including players connected to other worker processes. Events for local
+    clients are queued through ``broadcaster``.
+    """
+
+    def __init__(self, state: ServerState) -> None:
+        self.state = state
+        self.broadcaster = Broadcaster(state)
+
+    async def start(self) -> None:
+        """Called once on app startup."""
+
+    async def stop(self) -> None:
+        """Called once on app shutdown."""
+
+    @abstractmethod
+    async def join(self, client_id: str) -> None:
+        """A local client was registered; tell the players who can see it."""
+
+    @abstractmethod
+    async def leave(self, client_id: str) -> None:
+        """Remove a local client and tell the players who could see it."""
+
+    @abstractmethod
+    async def move(self, client_id: str, old: tuple[int, int]) -> None:
+        """A local client moved away from ``old`` outside the tick loop."""
+
+    @abstractmethod
+    async def tick(self, moved: list[int], snapshots: Optional[SnapshotManager] = None) -> None:
+        """Send out the result of one tick.
+
+        ``moved`` are the local slots that moved this tick, with view changes
+        already queued. With ``snapshots`` every client gets a delta instead
+        of a batch.
+        """
+
+    @abstractmethod
+    async def evict(self, client_id: str) -> None:
+        """Drop a local client whose outbox gave up on it."""
@@ -0,0 +1,166 @@
+# server/backends/brokered.py
+import asyncio
+import logging
+from typing import Optional
+
+from server.backends.local import InProcessBackend
+from server.broker import decode_frame, encode_frame, read_frame
+from server.config import settings
+from server.game.directions import DIRECTIONS
+from server.game.snapshots import SnapshotManager
+from server.state import ServerState
+
+logger = logging.getLogger("server")
+
+# Seconds between attempts to reach the broker
+RECONNECT_DELAY = 1.0
+
+
+class BrokerBackend(InProcessBackend):
+    """Shares a room with other worker processes through ``server.broker``.
+
+    Every worker hosting the room keeps a replica of all its players.
+    Players connected here are changed locally first and then published with
+    their absolute position; changes from other workers arrive through the
+    broker and are applied to the replica and sent to local watchers just
+    like local ones. Remote players have a store slot but no socket or outbox.
+    """
+
+    def __init__(self, state: ServerState, path: str, room: str) -> None:
+        super().__init__(state)
+        self.path = path
+        self.room = room
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        # remote slots moved since the last tick, sent with the next batch
+        self._remote_moved: dict[int, None] = {}
+
+    # --- lifecycle ---
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as exc:
+                logger.warning("Broker at %s unavailable (%s), retrying", self.path, exc)
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+
+            logger.info("Connected to broker at %s for room %s", self.path, self.room)
+            self._writer = writer
+            writer.write(encode_frame(["room", self.room]))
+            store = self.state.store
+            local = [self._entry(slot) for slot in store.slot_by_id.values() if self.state.is_local(slot)]
+            self._publish("join", local)
+            try:
+                while True:
+                    await self._apply(*decode_frame(await read_frame(reader)))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                logger.warning("Lost connection to broker for room %s", self.room)
+            finally:
+                self._writer = None
+                writer.close()
+            # other workers' players can't be kept up to date until we reconnect
+            for client_id in [store.ids[slot] for slot in store.slot_by_id.values() if not self.state.is_local(slot)]:
+                await self._remove_remote(client_id)
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    # --- local players ---
+
+    async def join(self, client_id: str) -> None:
+        await super().join(client_id)
+        slot = self.state.slot_of(client_id)
+        if slot is not None:
+            self._publish("join", [self._entry(slot)])
+
+    async def leave(self, client_id: str) -> None:
+        await super().leave(client_id)
+        self._publish("leave", [client_id])
+
+    async def move(self, client_id: str, old: tuple[int, int]) -> None:
+        await super().move(client_id, old)
+        slot = self.state.slot_of(client_id)
+        if slot is not None:
+            self._publish("move", [self._entry(slot)])
+
+    async def tick(self, moved: list[int], snapshots: Optional[SnapshotManager] = None) -> None:
+        if moved:
+            self._publish("move", [self._entry(slot) for slot in moved])
+        if self._remote_moved:
+            ids = self.state.store.ids
+            moved = moved + [slot for slot in self._remote_moved if ids[slot] is not None]
+            self._remote_moved = {}
+        await super().tick(moved, snapshots)
+
+    def _entry(self, slot: int) -> list:
+        store = self.state.store
+        x, y = store.position(slot)
+        return [store.ids[slot], x, y, store.directions[slot]]
+
+    def _publish(self, op: str, items: list) -> None:
+        # while disconnected nothing is sent; the next connection announces all local players
+        if self._writer is not None and items:
+            self._writer.write(encode_frame([op, items]))
+
+    # --- players on other workers ---
+
+    async def _apply(self, op: str, items: list) -> None:
+        if op == "sync":
+            present = {entry[0] for entry in items}
+            store = self.state.store
+            stale = [
+                store.ids[slot] for slot in store.slot_by_id.values()
+                if not self.state.is_local(slot) and store.ids[slot] not in present
+            ]
+            for client_id in stale:
+                await self._remove_remote(client_id)
+            for entry in items:
+                await self._update_remote(*entry)
+        elif op in ("join", "move"):
+            for entry in items:
+                await self._update_remote(*entry)
+        elif op == "leave":
+            for client_id in items:
+                await self._remove_remote(client_id)
+
+    async def _update_remote(self, client_id: str, x: int, y: int, direction: int) -> None:
+        state = self.state
+        slot = state.slot_of(client_id)
+        if slot is None:
+            try:
+                state.register_remote(client_id, (x, y), DIRECTIONS[direction])
+            except ValueError as e:
+                logger.warning("Ignored remote player %s: %s", client_id, e)
+                return
+            await super().join(client_id)
+            return
+        if state.is_local(slot):
+            return
+
+        old = state.store.position(slot)
+        state.move(slot, x, y, direction)
+        if settings.TICK_RATE <= 0:
+            await self.broadcaster.broadcast_move(client_id, old)
+        else:
+            if not settings.DELTA_SNAPSHOTS:
+                self.broadcaster.queue_view_changes(slot, old)
+            self._remote_moved[slot] = None
+
+    async def _remove_remote(self, client_id: str) -> None:
+        slot = self.state.slot_of(client_id)
+        if slot is not None and not self.state.is_local(slot):
+            self._remote_moved.pop(slot, None)
+            await super().leave(client_id)
@@ -0,0 +1,61 @@
+# server/backends/local.py
+import asyncio
+import logging
+from typing import Optional
+
+from server.backends.base import Backend
+from server.config import settings
+from server.events.builders import player_join_event, player_leave_event
+from server.game.snapshots import SnapshotManager
+from server.state import PlayerView
+
+logger = logging.getLogger("server")
+
+
+class InProcessBackend(Backend):
+    """Single-process backend: the whole room lives in this process's state."""
+
+    async def join(self, client_id: str) -> None:
+        store = self.state.store
+        slot = self.state.slot_of(client_id)
+        if slot is None:
+            return
+        watchers = self.state.interest.watchers(slot)
+        await self.broadcaster.broadcast_to(watchers, player_join_event(client_id, PlayerView(store, slot)))
+        await self.broadcaster.broadcast_player_count()
+        self.broadcaster.queue_chunks(slot)
+
+    async def leave(self, client_id: str) -> None:
+        slot = self.state.slot_of(client_id)
+        if slot is None:
+            return
+        watchers = self.state.interest.watchers(slot)
+        self.state.remove_client(client_id)
+        await self.broadcaster.broadcast_to(watchers, player_leave_event(client_id, slot))
+        await self.broadcaster.broadcast_player_count()
+
+    async def move(self, client_id: str, old: tuple[int, int]) -> None:
+        await self.broadcaster.broadcast_move(client_id, old)
+        slot = self.state.slot_of(client_id)
+        if slot is not None:
+            self.broadcaster.queue_chunks(slot)
+
+    async def tick(self, moved: list[int], snapshots: Optional[SnapshotManager] = None) -> None:
+        for slot in moved:
+            self.broadcaster.queue_chunks(slot)
+        if snapshots is not None:
+            await self.broadcaster.broadcast_deltas(snapshots)
+        elif moved:
+            await self.broadcaster.broadcast_batch(moved)
+
+    async def evict(self, client_id: str) -> None:
+        slot = self.state.slot_of(client_id)
+        if slot is None:
+            return
+        socket = self.state.store.sockets[slot]
+        await self.leave(client_id)
+        logger.info("Removed evicted client %s", client_id)
+        try:
+            await asyncio.wait_for(socket.close(code=1008), timeout=settings.SEND_TIMEOUT)
+        except Exception:
+            pass
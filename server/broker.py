@@ -0,0 +1,173 @@
+# server/broker.py
+"""Stand-alone message broker that lets several server workers share their rooms.
+
+Start it before the workers::
+
+    python -m server.broker
+    GAME_BACKEND=broker uvicorn server.main:app --workers 4
+
+Workers open one connection per room over a Unix socket and exchange
+length-prefixed msgpack frames of the form ``[op, items]``. The first frame
+on a connection is ``["room", name]``; after that:
+
+    join   [[client_id, x, y, direction_code], ...]   players added by the sender
+    move   [[client_id, x, y, direction_code], ...]   new absolute positions
+    leave  [client_id, ...]                           players removed by the sender
+    sync   [[client_id, x, y, direction_code], ...]   broker -> worker, everyone else
+
+Each player is owned by the worker holding its websocket and only that
+worker changes it. The broker keeps the latest position of every player and
+forwards each frame unchanged to the other workers in the same room. A
+newly connected worker gets one ``sync`` and then announces its own
+players with ``join``. When a worker goes away its players are announced
+as ``leave``.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import struct
+from typing import Any
+
+import msgspec
+
+from server.config import settings
+
+logger = logging.getLogger("server")
+
+_HEADER = struct.Struct("!I")
+_encoder = msgspec.msgpack.Encoder()
+_decoder = msgspec.msgpack.Decoder()
+
+# A worker this far behind on reading is dropped rather than buffered forever
+MAX_WORKER_BUFFER = 64 * 1024 * 1024
+
+
+def encode_frame(message: Any) -> bytes:
+    body = _encoder.encode(message)
+    return _HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """Read one whole frame, header included."""
+    header = await reader.readexactly(_HEADER.size)
+    (size,) = _HEADER.unpack(header)
+    return header + await reader.readexactly(size)
+
+
+def decode_frame(frame: bytes) -> tuple[str, list]:
+    op, items = _decoder.decode(memoryview(frame)[_HEADER.size:])
+    return op, items
+
+
+class BrokerRoom:
+    """The workers hosting one room and the latest state of its players."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        # client_id -> [client_id, x, y, direction_code]
+        self.players: dict[str, list] = {}
+        self.owners: dict[str, asyncio.StreamWriter] = {}
+        self.workers: set[asyncio.StreamWriter] = set()
+
+    def apply(self, worker: asyncio.StreamWriter, op: str, items: list) -> None:
+        if op == "join":
+            for entry in items:
+                self.players[entry[0]] = entry
+                self.owners[entry[0]] = worker
+        elif op == "move":
+            for entry in items:
+                if entry[0] in self.players:
+                    self.players[entry[0]] = entry
+        elif op == "leave":
+            for client_id in items:
+                self.players.pop(client_id, None)
+                self.owners.pop(client_id, None)
+        else:
+            raise ValueError(f"unknown op {op!r}")
+
+    def forward(self, sender: asyncio.StreamWriter, frame: bytes) -> None:
+        for worker in list(self.workers):
+            if worker is sender:
+                continue
+            if worker.transport.get_write_buffer_size() > MAX_WORKER_BUFFER:
+                logger.warning("Dropping worker that stopped reading room %s", self.name)
+                worker.close()
+                self.drop(worker)
+                continue
+            worker.write(frame)
+
+    def drop(self, worker: asyncio.StreamWriter) -> None:
+        if worker not in self.workers:
+            return
+        self.workers.discard(worker)
+        gone = [cid for cid, owner in self.owners.items() if owner is worker]
+        for client_id in gone:
+            del self.owners[client_id]
+            del self.players[client_id]
+        logger.info(
+            "Worker left room %s (%d left), removed %d players",
+            self.name, len(self.workers), len(gone),
+        )
+        if gone:
+            self.forward(worker, encode_frame(["leave", gone]))
+
+
+class Broker:
+    """Relays player changes between the workers hosting each room."""
+
+    def __init__(self) -> None:
+        self.rooms: dict[str, BrokerRoom] = {}
+
+    async def handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        room = None
+        try:
+            op, name = decode_frame(await read_frame(reader))
+            if op != "room" or not isinstance(name, str):
+                raise ValueError(f"expected a room frame, got {op!r}")
+            room = self.rooms.get(name)
+            if room is None:
+                room = self.rooms[name] = BrokerRoom(name)
+            room.workers.add(writer)
+            logger.info("Worker joined room %s (%d total)", name, len(room.workers))
+            writer.write(encode_frame(["sync", list(room.players.values())]))
+            while True:
+                frame = await read_frame(reader)
+                op, items = decode_frame(frame)
+                room.apply(writer, op, items)
+                room.forward(writer, frame)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception:
+            logger.exception("Dropping worker after a bad frame")
+        finally:
+            if room is not None:
+                room.drop(writer)
+                if not room.workers and self.rooms.get(room.name) is room:
+                    del self.rooms[room.name]
+            writer.close()
+
+
+async def serve(path: str) -> None:
+    if os.path.exists(path):
+        os.unlink(path)
+    broker = Broker()
+    server = await asyncio.start_unix_server(broker.handle_worker, path)
+    logger.info("Broker listening on %s", path)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=settings.BROKER_PATH, help="Unix socket to listen on")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    try:
+        asyncio.run(serve(args.path))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,132 @@
 # server/config.py
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     """Server configuration with environment overrides."""
 
+    # Tile map file (see server/game/tilemap.py) used by every room without
+    # its own entry in ROOM_MAPS; its size replaces GRID_WIDTH/GRID_HEIGHT.
+    # Without one, rooms get a blank GRID_WIDTH x GRID_HEIGHT map. Map sides
+    # are u16 on the wire, so rooms with one over 65535 tiles aren't opened.
+    MAP_FILE: Optional[str] = None
     GRID_WIDTH: int = 40
     GRID_HEIGHT: int = 40
+    # Map chunks kept around each player's own, in chunks (0 to 255)
+    MAP_CHUNK_RADIUS: int = 1
     MAX_PLAYERS: int = 100
     DEBUG: bool = True
 
+    # Seconds a single socket send may take before the client is dropped
+    SEND_TIMEOUT: float = 1.0
+
+    # New connections let in per second by each process (0 = no limit) and
+    # burst; up to ADMIT_QUEUE more wait their turn, the rest are refused (1013)
+    ADMIT_RATE: float = 100.0
+    ADMIT_BURST: int = 50
+    ADMIT_QUEUE: int = 1000
+
+    # Clients silent for HEARTBEAT_INTERVAL seconds are pinged, and dropped
+    # after IDLE_TIMEOUT seconds without a frame; 0 disables the heartbeat
+    HEARTBEAT_INTERVAL: float = 10.0
+    IDLE_TIMEOUT: float = 30.0
+
+    # zlib level (1-9) for clients on a ".deflate" subprotocol, 0 to refuse
+    # those; only frames of COMPRESSION_THRESHOLD bytes or more are deflated,
+    # once per event however many clients it goes to (see bench/compression.py)
+    COMPRESSION_LEVEL: int = 1
+    COMPRESSION_THRESHOLD: int = 256
+
+    # Per-client outbound queue length, and how long it may stay full before
+    # eviction; messages are never dropped, they may take it to twice the
+    # length, after which the client is evicted at once
+    OUTBOX_MAX_SIZE: int = 256
+    OUTBOX_EVICT_AFTER: float = 5.0
+
+    # Fixed simulation rate in Hz; 0 applies every move as soon as it arrives
+    TICK_RATE: float = 0.0
+    # Moves buffered per client between ticks (oldest dropped first)
+    TICK_INPUT_BUFFER: int = 4
+    # In tick mode, send sequenced deltas against each client's last ack
+    DELTA_SNAPSHOTS: bool = False
+    # Numbered world snapshots kept for delta encoding
+    SNAPSHOT_BUFFER: int = 32
+
+    # Per-client input token bucket: moves per second and burst size (0 = unlimited).
+    # The stock client sends at most one move per frame (FPS 30).
+    INPUT_RATE: float = 40.0
+    INPUT_BURST: int = 20
+    # Longest "moves" list accepted in a single frame
+    MAX_MOVES_PER_FRAME: int = 16
+
+    # Click-to-move ("move_to"): the server finds the route and walks it one
+    # step per tick, or MOVE_TO_RATE steps per second when TICK_RATE is 0
+    # (0 disables move_to in that mode)
+    MOVE_TO_RATE: float = 15.0
+    # Recent routes cached per room, and tiles A* may expand before giving up
+    PATH_CACHE_SIZE: int = 1024
+    PATH_MAX_NODES: int = 4000
+    # Ticks to wait behind another player before routing around them
+    ROUTE_PATIENCE: int = 3
+
+    # Server-driven agents spawned in every room (see server/game/npcs.py),
+    # local backend only. They move on NPC_MOVE_CHANCE of the ticks (the
+    # tick loop also runs for them without a tick rate), chase local players
+    # within NPC_CHASE_RADIUS tiles and share the room's 65536 player ids.
+    # NPC_SEED makes them repeat exactly, e.g. for replaying a journal
+    NPC_COUNT: int = 0
+    NPC_MOVE_CHANCE: float = 0.25
+    NPC_CHASE_RADIUS: int = 6
+    NPC_SEED: Optional[int] = None
+    # Processes searching routes for blocked chasers (0 = search in the
+    # tick), and searches started per room and tick
+    NPC_PATH_WORKERS: int = 0
+    NPC_PATHS_PER_TICK: int = 4
+
+    # Players only receive updates about others within this many tiles; 0 = everyone
+    VIEW_RADIUS: int = 12
+
+    # "local" keeps the world in this process; "broker" shares it with other
+    # workers through the process started by `python -m server.broker`
+    BACKEND: Literal["local", "broker"] = "local"
+    BROKER_PATH: str = "/tmp/first_isometric_game.sock"
+
+    # Room used when a client doesn't ask for one (?room=name). A room holds
+    # up to MAX_PLAYERS; further players overflow into name-2, name-3, ...
+    DEFAULT_ROOM: str = "world"
+    MAX_ROOMS: int = 64
+    # Map file or blank grid size per room name, e.g.
+    # GAME_ROOM_MAPS='{"island": "maps/island.map"}' GAME_ROOM_GRIDS='{"arena": [20, 20]}'
+    ROOM_MAPS: dict[str, str] = {}
+    ROOM_GRIDS: dict[str, tuple[int, int]] = {}
+
+    # Directory where the positions of players who connect with ?player=name
+    # are saved across restarts; unset keeps them in memory only. Only one
+    # process can write it, so with several workers the others don't save.
+    STATE_DIR: Optional[str] = None
+    # Seconds between appends to the state log, and log size (bytes) at
+    # which it is compacted into a snapshot
+    STATE_FLUSH_INTERVAL: float = 1.0
+    STATE_COMPACT_BYTES: int = 4 * 1024 * 1024
+
+    # Record client inputs and outgoing events to this file for
+    # `python -m bench.replay` (see server/journal.py); unset records nothing.
+    # Replay covers one process, so record with a single worker
+    JOURNAL_FILE: Optional[str] = None
+
+    # Trace the handlers, GameLogic, the tick and the event builders into
+    # Chrome trace files in PROFILE_DIR (see server/profiling.py), one file
+    # per PROFILE_MAX_SPANS spans. PROFILE_SAMPLE_SECONDS > 0 also samples
+    # the event loop's stack every PROFILE_SAMPLE_INTERVAL seconds for that
+    # long after startup; POST /profile?seconds=N starts another window
+    PROFILE: bool = False
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_SPANS: int = 200_000
+    PROFILE_SAMPLE_SECONDS: float = 0.0
+    PROFILE_SAMPLE_INTERVAL: float = 0.005
+
     class Config:
         env_prefix = "GAME_"  # environment variables must start with GAME_
 
@@ -0,0 +1,173 @@
+# server/events/binary.py
+"""Compact binary wire protocol (subprotocol ``iso.bin.v1``).
+
+Every frame starts with a one-byte message type. Players are identified by
+their u16 store slot instead of a UUID, directions are one byte (their
+index in ``server.game.directions.DIRECTIONS``) and coordinates are packed
+u16 values. All integers are little-endian.
+
+Server -> client:
+    INIT        u8 type, u16 client_id, u16 player_count, u16 width, u16 height,
+                u16 n, n * player, u8 len, len * utf-8 room name,
+                u16 chunk_size, u8 chunk_radius
+    JOIN        u8 type, player
+    LEAVE       u8 type, u16 id
+    UPDATE      u8 type, player
+    ENTER_VIEW  u8 type, player
+    LEAVE_VIEW  u8 type, u16 id
+    BATCH       u8 type, u16 n, n * player
+    DELTA       u8 type, u32 seq, u32 base, u16 n, n * player, u16 m, m * u16 removed id
+    CHUNK       u8 type, u16 cx, u16 cy, u16 size, size * size tile bytes
+    PING        u8 type                                  (answer with PONG)
+    COUNT       u8 type, u16 player_count                (players in the room)
+
+    player = u16 id, u16 x, u16 y, u8 direction
+
+On the ``.deflate`` subprotocols (see ``server.sockets.connection``) a
+server frame, or JSON text, of at least ``settings.COMPRESSION_THRESHOLD``
+bytes is sent as a binary frame instead:
+    DEFLATED    u8 type, raw deflate (RFC 1951) of the frame or UTF-8 text
+
+Client -> server:
+    MOVE        u8 type, u8 direction
+    ACK         u8 type, u32 seq
+    MOVES       u8 type, u8 n, n * u8 direction
+    MOVE_TO     u8 type, u16 x, u16 y
+    PONG        u8 type
+"""
+import struct
+import zlib
+from typing import Iterable, Optional
+
+from server.game.directions import DIRECTIONS, DIRECTION_CODES
+
+INIT = 0x01
+PLAYER_JOIN = 0x02
+PLAYER_LEAVE = 0x03
+PLAYER_UPDATE = 0x04
+PLAYER_ENTER_VIEW = 0x05
+PLAYER_LEAVE_VIEW = 0x06
+PLAYER_BATCH = 0x07
+DELTA = 0x08
+CHUNK = 0x09
+PING = 0x0A
+PLAYER_COUNT = 0x0B
+DEFLATED = 0x7F
+
+MOVE = 0x10
+ACK = 0x11
+MOVES = 0x12
+MOVE_TO = 0x13
+PONG = 0x14
+
+# (net_id, x, y, direction code)
+PlayerRecord = tuple[int, int, int, int]
+
+_PLAYER = struct.Struct("<HHHB")
+_TYPED_PLAYER = struct.Struct("<BHHHB")
+_TYPED_ID = struct.Struct("<BH")
+_PLAYER_COUNT = struct.Struct("<BH")
+_INIT_HEADER = struct.Struct("<BHHHHH")
+_BATCH_HEADER = struct.Struct("<BH")
+_DELTA_HEADER = struct.Struct("<BIIH")
+_CHUNK_HEADER = struct.Struct("<BHHH")
+_CHUNK_INFO = struct.Struct("<HB")
+_COUNT = struct.Struct("<H")
+_IDS = struct.Struct("<H")
+_MOVE = struct.Struct("<BB")
+_ACK = struct.Struct("<BI")
+_MOVE_TO = struct.Struct("<BHH")
+
+
+def player_record(net_id: int, position: list[int], direction: str) -> PlayerRecord:
+    return net_id, position[0], position[1], DIRECTION_CODES[direction]
+
+
+def encode_init(
+    client_id: int,
+    player_count: int,
+    players: list[PlayerRecord],
+    room: str = "",
+    grid: tuple[int, int] = (0, 0),
+    chunk_size: int = 0,
+    chunk_radius: int = 0,
+) -> bytes:
+    name = room.encode()
+    return b"".join((
+        _INIT_HEADER.pack(INIT, client_id, player_count, grid[0], grid[1], len(players)),
+        _pack_players(players),
+        bytes((len(name),)),
+        name,
+        _CHUNK_INFO.pack(chunk_size, chunk_radius),
+    ))
+
+
+def encode_player(msg_type: int, record: PlayerRecord) -> bytes:
+    return _TYPED_PLAYER.pack(msg_type, *record)
+
+
+def encode_id(msg_type: int, net_id: int) -> bytes:
+    return _TYPED_ID.pack(msg_type, net_id)
+
+
+def encode_batch(players: list[PlayerRecord]) -> bytes:
+    return _BATCH_HEADER.pack(PLAYER_BATCH, len(players)) + _pack_players(players)
+
+
+def encode_delta(seq: int, base: int, players: list[PlayerRecord], removed: list[int]) -> bytes:
+    return b"".join((
+        _DELTA_HEADER.pack(DELTA, seq, base, len(players)),
+        _pack_players(players),
+        _COUNT.pack(len(removed)),
+        b"".join(_IDS.pack(net_id) for net_id in removed),
+    ))
+
+
+def encode_chunk(cx: int, cy: int, size: int, tiles: bytes) -> bytes:
+    return _CHUNK_HEADER.pack(CHUNK, cx, cy, size) + tiles
+
+
+def encode_player_count(player_count: int) -> bytes:
+    return _PLAYER_COUNT.pack(PLAYER_COUNT, player_count)
+
+
+def encode_ping() -> bytes:
+    return bytes((PING,))
+
+
+def deflate_frame(data: bytes, level: int) -> bytes:
+    """Wrap a frame (or JSON text) in a DEFLATED frame; each frame is compressed on its own."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return bytes((DEFLATED,)) + compressor.compress(data) + compressor.flush()
+
+
+def inflate_frame(frame: bytes) -> bytes:
+    return zlib.decompress(frame[1:], -15)
+
+
+def _pack_players(players: Iterable[PlayerRecord]) -> bytes:
+    pack = _PLAYER.pack
+    return b"".join(pack(*record) for record in players)
+
+
+def _direction(code: int) -> Optional[str]:
+    return DIRECTIONS[code] if code < len(DIRECTIONS) else None
+
+
+def decode_message(data: bytes) -> Optional[tuple[str, object]]:
+    """Decode a client frame into ``("move", direction)``, ``("moves", [directions])``,
+    ``("move_to", [x, y])``, ``("ack", seq)`` or ``("pong", True)``. Unknown direction codes decode to None.
+
+    Returns None for anything malformed.
+    """
+    if len(data) == _MOVE.size and data[0] == MOVE:
+        return "move", _direction(data[1])
+    if len(data) >= 2 and data[0] == MOVES and len(data) == 2 + data[1]:
+        return "moves", [_direction(code) for code in data[2:]]
+    if len(data) == _ACK.size and data[0] == ACK:
+        return "ack", _ACK.unpack(data)[1]
+    if len(data) == _MOVE_TO.size and data[0] == MOVE_TO:
+        return "move_to", list(_MOVE_TO.unpack(data)[1:])
+    if len(data) == 1 and data[0] == PONG:
+        return "pong", True
+    return None
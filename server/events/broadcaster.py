@@ -1,23 +1,170 @@
 # server/events/broadcaster.py
-import logging
-from server.state import server_state
-
-logger = logging.getLogger("server")
-
-
-async def broadcast(message: str, exclude: str | None = None) -> None:
-    """Send a message to all connected clients, optionally excluding one."""
-    to_remove = []
-    for cid, client in server_state.all_clients().items():
-        if cid == exclude:
-            continue
-        try:
-            await client["socket"].send_text(message)
-        except Exception as e:
-            logger.error("Error sending message to %s: %s", cid, e)
-            to_remove.append(cid)
-
-    # Clean up failed clients
-    for cid in to_remove:
-        server_state.remove_client(cid)
-        logger.info("Removed client %s due to send failure", cid)
+from collections.abc import Iterable
+from server import metrics, profiling
+from server.events.builders import (
+    Payload,
+    delta_event,
+    player_batch_event,
+    player_count_event,
+    player_enter_view_event,
+    player_leave_view_event,
+    player_update_event,
+)
+from server.game.snapshots import SnapshotManager
+from server.state import PlayerView, ServerState
+
+
+class Broadcaster:
+    """Queues events for the clients of one room.
+
+    Nothing is sent here: each client's outbox owns the socket writes.
+    """
+
+    def __init__(self, state: ServerState) -> None:
+        self.state = state
+
+    @profiling.traced()
+    async def broadcast(self, message: Payload, exclude: str | None = None, key: str | None = None) -> None:
+        """Queue a message for all connected clients, optionally excluding one.
+
+        Each client's writer task does the actual send, so a slow socket only
+        delays itself. Pass ``key`` for latest-wins messages (e.g. the mover's id
+        for player updates) so a newer one replaces any still waiting.
+        """
+        outboxes = self.state.store.outboxes
+        for cid, slot in self.state.store.slot_by_id.items():
+            outbox = outboxes[slot]
+            if outbox is None or cid == exclude:
+                continue
+            outbox.put(message, key)
+
+    @profiling.traced()
+    async def broadcast_to(self, slots: Iterable[int], message: Payload, key: str | None = None) -> None:
+        """Queue a message for the given player slots only."""
+        outboxes = self.state.store.outboxes
+        for slot in slots:
+            outbox = outboxes[slot]
+            if outbox is not None:
+                outbox.put(message, key)
+
+    async def broadcast_player_count(self) -> None:
+        """Tell every client how many players the room now holds.
+
+        Latest-wins, so a burst of joins or leaves costs each client one event.
+        """
+        await self.broadcast(player_count_event(self.state.count()), key="player_count")
+
+    def queue_chunks(self, slot: int) -> None:
+        """Queue the map chunks a local player needs around its position."""
+        outbox = self.state.store.outboxes[slot]
+        if outbox is None:
+            return
+        store = self.state.store
+        for event in self.state.chunks.update(store.ids[slot], *store.position(slot)):
+            outbox.put(event)
+
+    @profiling.traced()
+    def queue_view_changes(self, slot: int, old: tuple[int, int]) -> set[int]:
+        """Queue enter/leave-view events after ``slot`` moved away from ``old``.
+
+        Both sides of every pair are told: watchers learn about the mover and the
+        mover learns about them. Returns the slots that just gained sight of it.
+        Players connected to other worker processes are skipped on either side.
+        """
+        store = self.state.store
+        ids, outboxes = store.ids, store.outboxes
+        client_id, outbox = ids[slot], outboxes[slot]
+        # a mover without a connection here only matters to those with one
+        entered, left = self.state.interest.view_change(slot, old, viewers=outbox is None)
+        if not entered and not left:
+            return entered
+
+        if entered:
+            enter = player_enter_view_event(client_id, PlayerView(store, slot))
+            for other in entered:
+                if outboxes[other] is not None:
+                    outboxes[other].put(enter, fence=client_id)
+                if outbox is not None:
+                    outbox.put(player_enter_view_event(ids[other], PlayerView(store, other)), fence=ids[other])
+        if left:
+            leave = player_leave_view_event(client_id, slot)
+            for other in left:
+                if outboxes[other] is not None:
+                    outboxes[other].put(leave, fence=client_id)
+                if outbox is not None:
+                    outbox.put(player_leave_view_event(ids[other], other), fence=ids[other])
+        return entered
+
+    @metrics.timed(metrics.broadcast_seconds.labels("move"))
+    @profiling.traced()
+    async def broadcast_move(self, client_id: str, old: tuple[int, int]) -> None:
+        """Send a player's new position to everyone who can see it."""
+        store = self.state.store
+        slot = store.slot_by_id.get(client_id)
+        if slot is None:
+            return
+
+        update = player_update_event(client_id, PlayerView(store, slot))
+        if not self.state.interest.enabled:
+            await self.broadcast(update, key=client_id)
+            return
+
+        entered = self.queue_view_changes(slot, old)
+        # watchers that just gained sight of the mover already got its position
+        recipients = self.state.interest.nearby(*store.position(slot), viewers=True)
+        await self.broadcast_to((s for s in recipients if s not in entered), update, key=client_id)
+
+    @metrics.timed(metrics.broadcast_seconds.labels("batch"))
+    @profiling.traced()
+    async def broadcast_batch(self, moved: Iterable[int]) -> None:
+        """Send each client one batch event with every visible player that moved.
+
+        View changes must already have been queued (``queue_view_changes``) as
+        each move was applied. Recipients that see the same set of movers share
+        one serialized event.
+        """
+        store = self.state.store
+        interest = self.state.interest
+        moved = list(moved)
+
+        if not interest.enabled:
+            changed = {store.ids[slot]: PlayerView(store, slot) for slot in moved}
+            await self.broadcast(player_batch_event(changed))
+            return
+
+        outboxes = store.outboxes
+        per_recipient: dict[int, list[int]] = {}
+        for slot in moved:
+            for watcher in interest.nearby(*store.position(slot), viewers=True):
+                per_recipient.setdefault(watcher, []).append(slot)
+
+        events: dict[tuple[int, ...], Payload] = {}
+        for recipient, slots in per_recipient.items():
+            group = tuple(slots)
+            message = events.get(group)
+            if message is None:
+                changed = {store.ids[slot]: PlayerView(store, slot) for slot in group}
+                message = events[group] = player_batch_event(changed)
+            outboxes[recipient].put(message)
+
+    @metrics.timed(metrics.broadcast_seconds.labels("deltas"))
+    @profiling.traced()
+    async def broadcast_deltas(self, snapshots: SnapshotManager) -> None:
+        """Capture a world snapshot and send each client its delta against its last ack.
+
+        Deltas are latest-wins per client: each one is relative to a state the
+        client already has, so a newer delta fully replaces one still queued.
+        """
+        store = self.state.store
+        interest = self.state.interest
+        snapshot = snapshots.capture(store)
+        for client_id, slot in store.slot_by_id.items():
+            outbox = store.outboxes[slot]
+            if outbox is None:
+                continue
+            visible = interest.nearby(*store.position(slot))
+            delta = snapshots.delta(client_id, snapshot, visible)
+            if delta is None:
+                continue
+            base, changed, removed = delta
+            outbox.put(delta_event(snapshot.seq, base, changed, removed), key="delta")
@@ -1,79 +1,319 @@
 # server/events/builders.py
-from typing import Dict, List
-from pydantic import BaseModel
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Mapping, Optional
+import msgspec
+
+from server import metrics, profiling
+from server.config import settings
+from server.events import binary
+from server.game.directions import DIRECTIONS
+
+if TYPE_CHECKING:
+    from server.state import PlayerStore
 
 
 # -----------------------------
 # Base event class
 # -----------------------------
-class Event(BaseModel):
-    type: str
+class Event(msgspec.Struct, tag_field="type"):
+    """Events encode as JSON objects whose first key is ``"type"``."""
+
+
+class PlayerState(msgspec.Struct):
+    position: List[int]
+    direction: str
 
 
 # -----------------------------
 # Specific event classes
 # -----------------------------
-class InitEvent(Event):
-    type: str = "init"
+class InitEvent(Event, tag="init"):
     client_id: str
     player_count: int
-    players: Dict[str, Dict[str, object]]  # {client_id: {"position": [x, y], "direction": str}}
+    players: Dict[str, PlayerState]
+    room: str
+    grid: List[int]  # [width, height]
+    chunk_size: int
+    chunk_radius: int  # chunks kept around the player's own (see ChunkStreamer)
 
 
-class PlayerJoinEvent(Event):
-    type: str = "player_join"
+class PlayerJoinEvent(Event, tag="player_join"):
     id: str
     position: List[int]
     direction: str
 
 
-class PlayerLeaveEvent(Event):
-    type: str = "player_leave"
+class PlayerLeaveEvent(Event, tag="player_leave"):
     id: str
 
 
-class PlayerUpdateEvent(Event):
-    type: str = "player_update"
+class PlayerUpdateEvent(Event, tag="player_update"):
     id: str
     position: List[int]
     direction: str
 
 
+class PlayerEnterViewEvent(Event, tag="player_enter_view"):
+    id: str
+    position: List[int]
+    direction: str
+
+
+class PlayerLeaveViewEvent(Event, tag="player_leave_view"):
+    id: str
+
+
+class PlayerBatchEvent(Event, tag="player_batch"):
+    players: Dict[str, PlayerState]
+
+
+class ChunkEvent(Event, tag="chunk"):
+    x: int
+    y: int
+    size: int
+    tiles: bytes  # size * size tile bytes, base64 in JSON
+
+
+class PingEvent(Event, tag="ping"):
+    pass
+
+
+class PlayerCountEvent(Event, tag="player_count"):
+    player_count: int
+
+
+class DeltaEvent(Event, tag="delta"):
+    seq: int
+    base: int  # 0 means a full snapshot
+    players: Dict[str, PlayerState]
+    removed: List[str]  # apply before ``players``
+
+
+# One encoder for every event, reused instead of rebuilt per call
+_json_encoder = msgspec.json.Encoder()
+
+_serialize_json = metrics.serialize_seconds.labels("json")
+_serialize_binary = metrics.serialize_seconds.labels("binary")
+_serialize_deflate = metrics.serialize_seconds.labels("deflate")
+
+
+def encode_json(event: Event) -> str:
+    return _json_encoder.encode(event).decode()
+
+
+def _observe(histogram: metrics.HistogramValue, span: str, start: float) -> None:
+    end = time.perf_counter()
+    histogram.observe(end - start)
+    if profiling.tracer is not None:
+        profiling.tracer.add(span, start, end)
+
+
+# -----------------------------
+# Outgoing payload
+# -----------------------------
+class Payload:
+    """One outgoing event, encoded at most once per wire protocol.
+
+    Builders capture the event's values up front; the JSON text and binary
+    frame are produced on first use and then shared by every recipient, and
+    so are their deflated forms for clients that negotiated compression.
+    """
+
+    __slots__ = ("_build_text", "_build_binary", "_text", "_binary", "_deflated_text", "_deflated_binary")
+
+    def __init__(self, build_text: Callable[[], str], build_binary: Callable[[], bytes]) -> None:
+        self._build_text = build_text
+        self._build_binary = build_binary
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+        # b"" once known not to be worth deflating
+        self._deflated_text: Optional[bytes] = None
+        self._deflated_binary: Optional[bytes] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            start = time.perf_counter()
+            self._text = self._build_text()
+            _observe(_serialize_json, "serialize json", start)
+        return self._text
+
+    @property
+    def binary(self) -> bytes:
+        if self._binary is None:
+            start = time.perf_counter()
+            self._binary = self._build_binary()
+            _observe(_serialize_binary, "serialize binary", start)
+        return self._binary
+
+    def deflated(self, for_binary: bool) -> Optional[bytes]:
+        """The binary frame or JSON text as a DEFLATED frame, or None if it's
+        under ``settings.COMPRESSION_THRESHOLD`` bytes or doesn't shrink."""
+        deflated = self._deflated_binary if for_binary else self._deflated_text
+        if deflated is None:
+            threshold = settings.COMPRESSION_THRESHOLD
+            if for_binary:
+                data = self.binary
+            else:
+                text = self.text
+                data = text.encode() if len(text) >= threshold else b""
+            deflated = b""
+            if len(data) >= threshold:
+                start = time.perf_counter()
+                frame = binary.deflate_frame(data, settings.COMPRESSION_LEVEL)
+                _observe(_serialize_deflate, "deflate", start)
+                if len(frame) < len(data):
+                    deflated = frame
+            if for_binary:
+                self._deflated_binary = deflated
+            else:
+                self._deflated_text = deflated
+        return deflated or None
+
+
+class InitCache:
+    """Each player's init entry, built once and reused until it moves or leaves.
+
+    Without it a burst of joins rebuilds every visible player's entry for
+    every newcomer. ``ServerState`` discards a slot's entry whenever that
+    slot changes.
+    """
+
+    __slots__ = ("_store", "_entries")
+
+    def __init__(self, store: "PlayerStore") -> None:
+        self._store = store
+        self._entries: dict[int, tuple[str, PlayerState, binary.PlayerRecord]] = {}
+
+    def discard(self, slot: int) -> None:
+        self._entries.pop(slot, None)
+
+    def entries(self, slots: Iterable[int]) -> list[tuple[str, PlayerState, binary.PlayerRecord]]:
+        cached = self._entries
+        result = []
+        for slot in slots:
+            entry = cached.get(slot)
+            if entry is None:
+                store = self._store
+                x, y, code = store.positions[2 * slot], store.positions[2 * slot + 1], store.directions[slot]
+                entry = cached[slot] = (store.ids[slot], PlayerState([x, y], DIRECTIONS[code]), (slot, x, y, code))
+            result.append(entry)
+        return result
+
+
 # -----------------------------
 # Builder helper functions
 # -----------------------------
-def init_event(client_id: str, connected_clients: dict) -> str:
-    """Build JSON string for init event."""
-    players = {
-        cid: {"position": info["position"], "direction": info["direction"]}
-        for cid, info in connected_clients.items() if cid != client_id
-    }
-    event = InitEvent(
-        client_id=client_id,
-        player_count=len(connected_clients),
-        players=players,
+# ``info`` arguments are store views (server.state.PlayerView); their slot
+# doubles as the short player id in the binary protocol.
+@profiling.traced()
+def cached_init_event(
+    client_id: str,
+    net_id: int,
+    cache: InitCache,
+    slots: Iterable[int],
+    player_count: int,
+    room: str = "",
+    grid: tuple[int, int] = (0, 0),
+    chunk_size: int = 0,
+    chunk_radius: int = 0,
+) -> Payload:
+    """Build the init event for a new client from ``cache``, listing the players in ``slots``."""
+    entries = cache.entries(slots)
+    return Payload(
+        lambda: encode_json(InitEvent(
+            client_id, player_count, {cid: state for cid, state, _ in entries}, room, list(grid),
+            chunk_size, chunk_radius,
+        )),
+        lambda: binary.encode_init(
+            net_id, player_count, [record for _, _, record in entries], room, grid, chunk_size, chunk_radius,
+        ),
+    )
+
+
+def _player_states(entries: list) -> Dict[str, PlayerState]:
+    return {cid: PlayerState(position, direction) for cid, _, position, direction in entries}
+
+
+def _player_records(entries: list) -> List[binary.PlayerRecord]:
+    return [binary.player_record(net_id, position, direction) for _, net_id, position, direction in entries]
+
+
+def _player_payload(model: type[Event], msg_type: int, client_id: str, info: Mapping) -> Payload:
+    net_id, position, direction = info.slot, info["position"], info["direction"]
+    return Payload(
+        lambda: encode_json(model(client_id, position, direction)),
+        lambda: binary.encode_player(msg_type, binary.player_record(net_id, position, direction)),
+    )
+
+
+def _id_payload(model: type[Event], msg_type: int, client_id: str, net_id: int) -> Payload:
+    return Payload(
+        lambda: encode_json(model(client_id)),
+        lambda: binary.encode_id(msg_type, net_id),
+    )
+
+
+@profiling.traced()
+def player_join_event(client_id: str, info: Mapping) -> Payload:
+    return _player_payload(PlayerJoinEvent, binary.PLAYER_JOIN, client_id, info)
+
+
+@profiling.traced()
+def player_leave_event(client_id: str, net_id: int) -> Payload:
+    return _id_payload(PlayerLeaveEvent, binary.PLAYER_LEAVE, client_id, net_id)
+
+
+@profiling.traced()
+def player_update_event(client_id: str, info: Mapping) -> Payload:
+    return _player_payload(PlayerUpdateEvent, binary.PLAYER_UPDATE, client_id, info)
+
+
+@profiling.traced()
+def player_enter_view_event(client_id: str, info: Mapping) -> Payload:
+    return _player_payload(PlayerEnterViewEvent, binary.PLAYER_ENTER_VIEW, client_id, info)
+
+
+@profiling.traced()
+def player_leave_view_event(client_id: str, net_id: int) -> Payload:
+    return _id_payload(PlayerLeaveViewEvent, binary.PLAYER_LEAVE_VIEW, client_id, net_id)
+
+
+@profiling.traced()
+def player_batch_event(changed: Mapping) -> Payload:
+    """Build the event listing every player that changed during a tick."""
+    entries = [(cid, info.slot, info["position"], info["direction"]) for cid, info in changed.items()]
+    return Payload(
+        lambda: encode_json(PlayerBatchEvent(_player_states(entries))),
+        lambda: binary.encode_batch(_player_records(entries)),
+    )
+
+
+@profiling.traced()
+def delta_event(seq: int, base: int, changed: list, removed: list) -> Payload:
+    """Build a snapshot delta from ``(id, slot, position, direction)`` and ``(id, slot)`` entries."""
+    return Payload(
+        lambda: encode_json(DeltaEvent(seq, base, _player_states(changed), [cid for cid, _ in removed])),
+        lambda: binary.encode_delta(seq, base, _player_records(changed), [net_id for _, net_id in removed]),
     )
-    return event.model_dump_json()
 
 
-def player_join_event(client_id: str, info: dict) -> str:
-    event = PlayerJoinEvent(
-        id=client_id,
-        position=info["position"],
-        direction=info["direction"],
+@profiling.traced()
+def player_count_event(player_count: int) -> Payload:
+    return Payload(
+        lambda: encode_json(PlayerCountEvent(player_count)),
+        lambda: binary.encode_player_count(player_count),
     )
-    return event.model_dump_json()
 
 
-def player_leave_event(client_id: str) -> str:
-    event = PlayerLeaveEvent(id=client_id)
-    return event.model_dump_json()
+@profiling.traced()
+def ping_event() -> Payload:
+    return Payload(lambda: encode_json(PingEvent()), binary.encode_ping)
 
 
-def player_update_event(client_id: str, info: dict) -> str:
-    event = PlayerUpdateEvent(
-        id=client_id,
-        position=info["position"],
-        direction=info["direction"],
+@profiling.traced()
+def chunk_event(cx: int, cy: int, size: int, tiles: bytes) -> Payload:
+    return Payload(
+        lambda: encode_json(ChunkEvent(cx, cy, size, tiles)),
+        lambda: binary.encode_chunk(cx, cy, size, tiles),
     )
-    return event.model_dump_json()
@@ -0,0 +1,176 @@
+# server/events/outbox.py
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from server import metrics
+from server.config import settings
+
+if TYPE_CHECKING:
+    from server.events.builders import Payload
+    from server.journal import RoomJournal
+
+logger = logging.getLogger("server")
+
+_sent = metrics.messages_sent.labels()
+_sent_bytes = metrics.bytes_sent.labels()
+_coalesced = metrics.outbox_coalesced.labels()
+_dropped = metrics.outbox_dropped.labels()
+
+
+class Outbox:
+    """Bounded outbound queue for one connection, drained by its own writer task.
+
+    Messages queued with a ``key`` are latest-wins: a newer message with the
+    same key replaces the one still waiting, keeping its place in line.
+    Nothing is ever dropped, as no later message would make up for it (a
+    player who stops moving sends no newer update): past ``maxsize`` messages
+    are still queued, but a client whose queue reaches twice that is evicted
+    at once. So is one whose queue stays full for longer than
+    ``settings.OUTBOX_EVICT_AFTER`` seconds, or whose send fails (and one the
+    room's heartbeat finds silent).
+    Payloads are sent as text or binary frames depending on ``binary``, and
+    large ones deflated when the client negotiated ``deflate``.
+    Every message queued is also counted in ``journal`` when one is given.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        socket,
+        on_evict: Optional[Callable[[str], Awaitable[None]]] = None,
+        maxsize: Optional[int] = None,
+        binary: bool = False,
+        journal: Optional["RoomJournal"] = None,
+        deflate: bool = False,
+    ) -> None:
+        self.client_id = client_id
+        self.socket = socket
+        self.binary = binary
+        self.deflate = deflate
+        self.journal = journal
+        self.maxsize = maxsize or settings.OUTBOX_MAX_SIZE
+        self._on_evict = on_evict
+        # entries are [key, message] lists so coalescing can swap the message in place
+        self._queue: deque[list] = deque()
+        self._latest: dict[str, list] = {}
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._saturated_since: Optional[float] = None
+        self.closed = False
+
+        # counters
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of messages waiting to be sent."""
+        return len(self._queue)
+
+    def put(self, message: "Payload", key: Optional[str] = None, fence: Optional[str] = None) -> bool:
+        """Queue a message without blocking. Returns False if the outbox is closed or overflowed.
+
+        ``fence`` stops later messages with that key from coalescing into
+        ones queued before this message (e.g. an update must not jump back
+        over a leave-view event for the same player).
+        """
+        if self.closed:
+            return False
+        if self.journal is not None:
+            self.journal.event(message)
+        if fence is not None:
+            self._latest.pop(fence, None)
+
+        if key is not None:
+            entry = self._latest.get(key)
+            if entry is not None:
+                entry[1] = message
+                self.coalesced += 1
+                _coalesced.inc()
+                return True
+        if len(self._queue) >= 2 * self.maxsize:
+            self.dropped += 1
+            _dropped.inc()
+            self.evict("overflow", "outbound queue overflowed")
+            return False
+        entry = [key, message]
+        if key is not None:
+            self._latest[key] = entry
+
+        self._queue.append(entry)
+        if len(self._queue) >= self.maxsize:
+            self._check_saturation()
+
+        if self._writer is None:
+            self._writer = asyncio.get_running_loop().create_task(self._run())
+        self._wakeup.set()
+        return True
+
+    def close(self) -> None:
+        """Stop the writer and discard anything still queued."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        self._latest.clear()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    def evict(self, reason: str, detail: str) -> None:
+        """Close this outbox and have its client dropped (counted under ``reason``)."""
+        if self.closed:
+            return
+        logger.warning("Evicting client %s: %s", self.client_id, detail)
+        metrics.evictions.labels(reason).inc()
+        self.close()
+        if self._on_evict is not None:
+            asyncio.get_running_loop().create_task(self._on_evict(self.client_id))
+
+    # --- internals ---
+
+    def _check_saturation(self) -> None:
+        now = time.monotonic()
+        if self._saturated_since is None:
+            self._saturated_since = now
+        elif now - self._saturated_since > settings.OUTBOX_EVICT_AFTER:
+            self.evict("saturated", "outbound queue saturated")
+
+    async def _run(self) -> None:
+        while not self.closed:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            entry = self._queue.popleft()
+            key, message = entry
+            if key is not None and self._latest.get(key) is entry:
+                del self._latest[key]
+            if len(self._queue) < self.maxsize:
+                self._saturated_since = None
+
+            try:
+                frame = message.deflated(self.binary) if self.deflate else None
+                if frame is not None:
+                    send = self.socket.send_bytes(frame)
+                elif self.binary:
+                    frame = message.binary
+                    send = self.socket.send_bytes(frame)
+                else:
+                    frame = message.text
+                    send = self.socket.send_text(frame)
+                await asyncio.wait_for(send, timeout=settings.SEND_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error sending message to %s: %r", self.client_id, e)
+                metrics.send_failures.inc()
+                self.evict("send_failure", "send failure")
+                return
+            self.sent += 1
+            _sent.inc()
+            _sent_bytes.inc(len(frame))
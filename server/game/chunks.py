@@ -0,0 +1,60 @@
+# server/game/chunks.py
+from collections import OrderedDict
+
+from server.events.builders import Payload, chunk_event
+from server.game.tilemap import TileMap
+
+
+class ChunkStreamer:
+    """Tracks which map chunks each local client holds and picks the ones it lacks.
+
+    A client needs every chunk within ``radius`` chunks (Chebyshev distance)
+    of the chunk it stands in. Chunks further than ``radius + 1`` away are
+    forgotten here and dropped by the client under the same rule; the spare
+    ring keeps a player pacing along a chunk border from getting the same
+    chunks over and over. Encoded chunks are shared through a small LRU, as
+    players close together need the same ones.
+    """
+
+    def __init__(self, tiles: TileMap, radius: int, cache_size: int = 256) -> None:
+        self.tiles = tiles
+        self.radius = radius
+        self.cache_size = cache_size
+        self._held: dict[str, set[tuple[int, int]]] = {}
+        self._centers: dict[str, tuple[int, int]] = {}
+        self._cache: OrderedDict[tuple[int, int], Payload] = OrderedDict()
+
+    def update(self, client_id: str, x: int, y: int) -> list[Payload]:
+        """Chunk events ``client_id`` needs now that it stands on (x, y)."""
+        center = self.tiles.chunk_of(x, y)
+        if self._centers.get(client_id) == center:
+            return []
+        self._centers[client_id] = center
+        held = self._held.setdefault(client_id, set())
+
+        cx, cy, r = center[0], center[1], self.radius
+        for chunk in [c for c in held if max(abs(c[0] - cx), abs(c[1] - cy)) > r + 1]:
+            held.discard(chunk)
+
+        needed = []
+        for ny in range(max(0, cy - r), min(self.tiles.chunks_y, cy + r + 1)):
+            for nx in range(max(0, cx - r), min(self.tiles.chunks_x, cx + r + 1)):
+                if (nx, ny) not in held:
+                    held.add((nx, ny))
+                    needed.append(self._event(nx, ny))
+        return needed
+
+    def discard(self, client_id: str) -> None:
+        self._held.pop(client_id, None)
+        self._centers.pop(client_id, None)
+
+    def _event(self, cx: int, cy: int) -> Payload:
+        key = (cx, cy)
+        event = self._cache.get(key)
+        if event is not None:
+            self._cache.move_to_end(key)
+            return event
+        event = self._cache[key] = chunk_event(cx, cy, self.tiles.chunk_size, self.tiles.chunk(cx, cy))
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return event
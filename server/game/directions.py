@@ -0,0 +1,28 @@
+# server/game/directions.py
+
+# All 8-way direction strings, in code order. A direction's index is its
+# compact integer code (used by the player store and the wire protocols).
+DIRECTIONS = (
+    "up",
+    "down",
+    "left",
+    "right",
+    "up_left",
+    "up_right",
+    "down_left",
+    "down_right",
+)
+
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+
+# (dx, dy) grid deltas
+DIRECTION_VECTORS = {
+    "up": (0, -1),
+    "down": (0, 1),
+    "left": (-1, 0),
+    "right": (1, 0),
+    "up_left": (-1, -1),
+    "up_right": (1, -1),
+    "down_left": (-1, 1),
+    "down_right": (1, 1),
+}
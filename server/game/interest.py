@@ -0,0 +1,123 @@
+# server/game/interest.py
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from server.state import PlayerStore
+
+
+class InterestManager:
+    """Spatial hash of player slots keyed on grid cells.
+
+    A player sees everyone within ``view_radius`` tiles (Chebyshev distance),
+    so visibility is symmetric. Cells are ``view_radius`` tiles wide, which
+    keeps every lookup to at most a 3x3 block of cells. A radius of 0
+    disables filtering: everyone sees everyone.
+
+    Players added as ``viewer`` (the ones connected to this process, who
+    are sent events) are also kept in a hash of their own, so asking which
+    viewers see a spot doesn't scan crowds of NPCs or remote players.
+    """
+
+    def __init__(self, store: "PlayerStore", view_radius: int) -> None:
+        self.store = store
+        self.view_radius = view_radius
+        self.cell_size = max(1, view_radius)
+        self._cells: dict[tuple[int, int], set[int]] = {}
+        self._viewer_cells: dict[tuple[int, int], set[int]] = {}
+        self._viewers: set[int] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.view_radius > 0
+
+    def _cell(self, x: int, y: int) -> tuple[int, int]:
+        return x // self.cell_size, y // self.cell_size
+
+    # --- index maintenance ---
+
+    def add(self, slot: int, x: int, y: int, viewer: bool = False) -> None:
+        if viewer:
+            self._viewers.add(slot)
+        if self.enabled:
+            cell = self._cell(x, y)
+            self._cells.setdefault(cell, set()).add(slot)
+            if viewer:
+                self._viewer_cells.setdefault(cell, set()).add(slot)
+
+    def remove(self, slot: int, x: int, y: int) -> None:
+        viewer = slot in self._viewers
+        self._viewers.discard(slot)
+        if not self.enabled:
+            return
+        cell = self._cell(x, y)
+        _discard(self._cells, cell, slot)
+        if viewer:
+            _discard(self._viewer_cells, cell, slot)
+
+    def move(self, slot: int, old: tuple[int, int], new: tuple[int, int]) -> None:
+        if self.enabled and self._cell(*old) != self._cell(*new):
+            viewer = slot in self._viewers
+            self.remove(slot, *old)
+            self.add(slot, *new, viewer)
+
+    # --- queries ---
+
+    def nearby(self, x: int, y: int, viewers: bool = False) -> list[int]:
+        """Return slots of all players (only viewers, with ``viewers``) within view of (x, y)."""
+        if not self.enabled:
+            return list(self._viewers) if viewers else list(self.store.slot_by_id.values())
+
+        r, size = self.view_radius, self.cell_size
+        cells = self._viewer_cells if viewers else self._cells
+        positions = self.store.positions
+        result = []
+        for cx in range((x - r) // size, (x + r) // size + 1):
+            for cy in range((y - r) // size, (y + r) // size + 1):
+                bucket = cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for slot in bucket:
+                    if abs(positions[2 * slot] - x) <= r and abs(positions[2 * slot + 1] - y) <= r:
+                        result.append(slot)
+        return result
+
+    def watchers(self, slot: int) -> list[int]:
+        """Return slots of the other players that can see ``slot``."""
+        x, y = self.store.position(slot)
+        return [other for other in self.nearby(x, y) if other != slot]
+
+    def view_change(self, slot: int, old: tuple[int, int], viewers: bool = False) -> tuple[set[int], set[int]]:
+        """Return (entered, left) sets of other slots (or viewers) after ``slot`` moved from ``old``."""
+        if not self.enabled:
+            return set(), set()
+        before = set(self.nearby(*old, viewers))
+        after = set(self.nearby(*self.store.position(slot), viewers))
+        before.discard(slot)
+        after.discard(slot)
+        return after - before, before - after
+
+    def watched(self, moves: list[tuple[int, tuple[int, int]]]) -> list[tuple[int, tuple[int, int]]]:
+        """Return the ``(slot, old position)`` moves any viewer might see.
+
+        A move is kept if either end of it lies in a cell next to a viewer's,
+        which covers every move that can change what a viewer sees.
+        """
+        if not self._viewers:
+            return []
+        if not self.enabled:
+            return moves
+
+        cells = {
+            (cx + dx, cy + dy)
+            for cx, cy in self._viewer_cells for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+        }
+        cell, position = self._cell, self.store.position
+        return [(slot, old) for slot, old in moves if cell(*old) in cells or cell(*position(slot)) in cells]
+
+
+def _discard(cells: dict[tuple[int, int], set[int]], cell: tuple[int, int], slot: int) -> None:
+    bucket = cells.get(cell)
+    if bucket is not None:
+        bucket.discard(slot)
+        if not bucket:
+            del cells[cell]
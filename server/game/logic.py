@@ -1,51 +1,37 @@
 # server/game/logic.py
-from server.state import server_state
-from server.config import settings
+from server import profiling
+from server.state import ServerState
+from server.game.directions import DIRECTION_CODES, DIRECTION_VECTORS
 
 
 class GameLogic:
     """Encapsulates game-specific rules and operations."""
 
     @staticmethod
-    def move_player(client_id: str, direction: str) -> bool:
+    @profiling.traced()
+    def move_player(state: ServerState, client_id: str, direction: str) -> bool:
         """Attempt to move a player in the given direction.
 
         Returns:
-            bool: True if movement succeeded, False if invalid or out of bounds.
+            bool: True if movement succeeded, False if invalid, out of bounds,
+            blocked or onto another player.
         """
-        player = server_state.get_client(client_id)
-        if not player:
+        slot = state.slot_of(client_id)
+        if slot is None:
             return False
 
-        pos = player["position"]
-        dx, dy = 0, 0
-
-        if direction == "up":
-            dy = -1
-        elif direction == "down":
-            dy = 1
-        elif direction == "left":
-            dx = -1
-        elif direction == "right":
-            dx = 1
-        elif direction == "up_left":
-            dx, dy = -1, -1
-        elif direction == "up_right":
-            dx, dy = 1, -1
-        elif direction == "down_left":
-            dx, dy = -1, 1
-        elif direction == "down_right":
-            dx, dy = 1, 1
-        else:
+        vector = DIRECTION_VECTORS.get(direction)
+        if vector is None:
             return False  # unknown direction
 
-        new_x, new_y = pos[0] + dx, pos[1] + dy
+        store = state.store
+        x, y = store.position(slot)
+        new_x, new_y = x + vector[0], y + vector[1]
 
-        # Stay inside grid using settings
-        if not (0 <= new_x < settings.GRID_WIDTH and 0 <= new_y < settings.GRID_HEIGHT):
+        # Stay inside the room's grid, off obstacles and off other players
+        if not state.occupancy.is_free(new_x, new_y):
             return False
 
         # Update state
-        player["position"] = [new_x, new_y]
-        player["direction"] = direction
+        state.move(slot, new_x, new_y, DIRECTION_CODES[direction])
         return True
@@ -0,0 +1,348 @@
+# server/game/npcs.py
+import logging
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Optional, Union
+
+import numpy as np
+
+from server.game.directions import DIRECTION_CODES, DIRECTION_VECTORS, DIRECTIONS
+from server.game.occupancy import OccupancyGrid
+from server.game.pathfinding import Pathfinder
+from server.game.tilemap import SOLID, TileMap
+from server.state import ServerState
+
+logger = logging.getLogger("server")
+
+# Chance per tick that a wandering agent picks a new heading
+TURN_CHANCE = 0.1
+# Every agent looks for a player to chase once every this many ticks
+RETARGET_TICKS = 8
+# A chase is given up once the target is this many chase radii away
+GIVE_UP_FACTOR = 2
+# Rounds of random tiles tried when spawning
+SPAWN_ROUNDS = 8
+# Maps of up to this many tiles check taken tiles against a lookup table
+TABLE_TILES = 1 << 24
+
+_DX = np.array([DIRECTION_VECTORS[name][0] for name in DIRECTIONS], np.int64)
+_DY = np.array([DIRECTION_VECTORS[name][1] for name in DIRECTIONS], np.int64)
+# direction code by (sign(dx) + 1) * 3 + sign(dy) + 1; the centre is never looked up
+_TOWARDS = np.zeros(9, np.uint8)
+for _code, (_dx, _dy) in enumerate(zip(_DX.tolist(), _DY.tolist())):
+    _TOWARDS[(_dx + 1) * 3 + _dy + 1] = _code
+
+Moves = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# route finders of a pool worker, per map
+_pathfinders: dict[Union[str, tuple[int, int]], Pathfinder] = {}
+
+
+def find_route(
+    map_key: Union[str, tuple[int, int]], max_nodes: int, start: tuple[int, int], goal: tuple[int, int]
+) -> Optional[tuple[int, ...]]:
+    """Direction codes leading from ``start`` to ``goal``; run in a pool worker.
+
+    ``map_key`` is the map file, or (width, height) for a blank map.
+    """
+    pathfinder = _pathfinders.get(map_key)
+    if pathfinder is None:
+        tiles = TileMap.open(map_key) if isinstance(map_key, str) else TileMap.blank(*map_key)
+        pathfinder = _pathfinders[map_key] = Pathfinder(OccupancyGrid(tiles), 0, max_nodes)
+    return _codes(pathfinder.search(start, goal))
+
+
+def _isin(tiles: np.ndarray, pool: np.ndarray, size: int) -> np.ndarray:
+    """``np.isin`` for tile indices below ``size``, which is much faster for them."""
+    if size <= TABLE_TILES:
+        table = np.zeros(size, bool)
+        table[pool] = True
+        return table[tiles]
+    pool = np.sort(pool)
+    at = np.minimum(np.searchsorted(pool, tiles), max(0, len(pool) - 1))
+    return pool[at] == tiles if len(pool) else np.zeros(len(tiles), bool)
+
+
+def _codes(steps: Optional[tuple[str, ...]]) -> Optional[tuple[int, ...]]:
+    return None if steps is None else tuple(DIRECTION_CODES[step] for step in steps)
+
+
+class NpcEngine:
+    """Server-driven agents of one room, simulated together in NumPy arrays.
+
+    Agents are players without a connection: each has a slot in the room's
+    player store like a player of another worker process, so init, batch,
+    delta and view events and the occupancy grid handle them like anyone
+    else; their ids (``npc:<n>``) can't clash with a player name. Their
+    positions, headings and targets are kept in parallel arrays as well,
+    and each tick every agent's move is decided at once: wanderers
+    keep a heading and now and then turn, agents within ``chase_radius`` of
+    a local player step straight towards it, and all the steps are checked
+    against the map bounds, obstacles and taken tiles with array operations.
+    Agents move on ``move_chance`` of the ticks. Only the moves made go
+    through ``ServerState.move``, one by one.
+
+    A chaser blocked for ``patience`` ticks asks for a route around the
+    obstacle, which is searched in ``pool`` when one is given (see
+    ``find_route``) and in the tick otherwise, ``paths_per_tick`` at most.
+    """
+
+    def __init__(
+        self,
+        state: ServerState,
+        pathfinder: Pathfinder,
+        move_chance: float,
+        chase_radius: int,
+        patience: int,
+        paths_per_tick: int,
+        pool: Optional[Executor] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.state = state
+        self.pathfinder = pathfinder
+        self.move_chance = move_chance
+        self.chase_radius = chase_radius
+        self.patience = max(1, patience)
+        self.paths_per_tick = paths_per_tick
+        self.pool = pool
+        self.rng = np.random.default_rng(seed)
+        tiles = state.tiles
+        self._map_key = tiles.path or (tiles.width, tiles.height)
+        self._tiles: Optional[np.ndarray] = np.frombuffer(tiles.view(), np.uint8)
+
+        # one entry per agent
+        self.slots = np.empty(0, np.int64)
+        self.x = np.empty(0, np.int64)
+        self.y = np.empty(0, np.int64)
+        self.heading = np.empty(0, np.uint8)
+        self.target = np.empty(0, np.int64)  # slot of the player chased, -1 when wandering
+        self.stuck = np.empty(0, np.int32)
+
+        self._routes: dict[int, deque[int]] = {}
+        self._pending: dict[int, tuple[tuple[int, int], Future]] = {}
+        self._cursor = 0
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def spawn(self, count: int) -> int:
+        """Place up to ``count`` new agents on random free tiles; returns how many were placed."""
+        state, rng = self.state, self.rng
+        occupancy = state.occupancy
+        width, height = state.width, state.height
+        placed: list[tuple[int, int, int, int]] = []
+        for _ in range(SPAWN_ROUNDS):
+            wanted = count - len(placed)
+            if wanted <= 0 or not occupancy.free_count:
+                break
+            tiles = rng.integers(0, width * height, 2 * wanted)
+            headings = rng.integers(0, len(DIRECTIONS), len(tiles))
+            for tile, heading in zip(tiles.tolist(), headings.tolist()):
+                x, y = tile % width, tile // width
+                if not occupancy.is_free(x, y):
+                    continue
+                slot = state.register_remote(f"npc:{self._next_id}", (x, y), DIRECTIONS[heading])
+                self._next_id += 1
+                placed.append((slot, x, y, heading))
+                if len(placed) == count:
+                    break
+        if placed:
+            slots, xs, ys, headings = zip(*placed)
+            self.slots = np.concatenate((self.slots, np.array(slots, np.int64)))
+            self.x = np.concatenate((self.x, np.array(xs, np.int64)))
+            self.y = np.concatenate((self.y, np.array(ys, np.int64)))
+            self.heading = np.concatenate((self.heading, np.array(headings, np.uint8)))
+            self.target = np.concatenate((self.target, np.full(len(placed), -1, np.int64)))
+            self.stuck = np.concatenate((self.stuck, np.zeros(len(placed), np.int32)))
+        return len(placed)
+
+    def close(self) -> None:
+        """Let go of the map and drop route searches still running."""
+        self._tiles = None
+        for _, future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    # --- simulation ---
+
+    def step(self) -> list[tuple[int, tuple[int, int]]]:
+        """Move the agents one tick; returns ``(slot, old position)`` for each that moved."""
+        return self.apply(self.advance())
+
+    def advance(self) -> Moves:
+        """Decide this tick's moves and make them in the agent arrays.
+
+        Returns the indices of the agents that moved, with their old x and y.
+        The room's state only learns about the moves in ``apply``.
+        """
+        n = len(self.slots)
+        if not n:
+            none = np.empty(0, np.int64)
+            return none, none, none
+        state, rng = self.state, self.rng
+        store = state.store
+        width, height = state.width, state.height
+        x, y = self.x, self.y
+        self._collect_routes()
+
+        players = np.fromiter(store.slot_by_socket.values(), np.int64, len(store.slot_by_socket))
+        coords = np.array([store.position(slot) for slot in players.tolist()], np.int64).reshape(-1, 2)
+        px, py = coords[:, 0], coords[:, 1]
+        self._retarget(players, px, py)
+
+        # wanderers now and then turn; chasers head straight for their target
+        turn = np.flatnonzero(rng.random(n) < TURN_CHANCE)
+        self.heading[turn] = rng.integers(0, len(DIRECTIONS), len(turn))
+        direction = self.heading.copy()
+        moving = rng.random(n) < self.move_chance
+        chasers = np.flatnonzero(self.target >= 0)
+        if len(chasers):
+            at = self._locate(players, self.target[chasers])[0]
+            dx, dy = px[at] - x[chasers], py[at] - y[chasers]
+            direction[chasers] = _TOWARDS[(np.sign(dx) + 1) * 3 + np.sign(dy) + 1]
+            # already next to the target
+            moving[chasers[np.maximum(np.abs(dx), np.abs(dy)) <= 1]] = False
+        for agent, steps in self._routes.items():
+            direction[agent] = steps[0]
+
+        movers = np.flatnonzero(moving)
+        codes = direction[movers]
+        nx, ny = x[movers] + _DX[codes], y[movers] + _DY[codes]
+        ok = (nx >= 0) & (nx < width) & (ny >= 0) & (ny < height)
+        ok[ok] = self._walkable(nx[ok], ny[ok])
+        tiles = ny * width + nx
+        taken = np.concatenate((y * width + x, py * width + px))
+        ok[ok] = ~_isin(tiles[ok], taken, width * height)
+        # agents stepping onto the same tile: the first one gets it
+        candidates = np.flatnonzero(ok)
+        won = np.zeros(len(movers), bool)
+        won[candidates[np.unique(tiles[candidates], return_index=True)[1]]] = True
+
+        moved, blocked = movers[won], movers[~won]
+        old_x, old_y = x[moved], y[moved]
+        x[moved], y[moved] = nx[won], ny[won]
+        self.heading[moved] = codes[won]
+        self.stuck[moved] = 0
+        # blocked wanderers turn away, blocked chasers may ask for a route
+        wandering = self.target[blocked] < 0
+        self.heading[blocked[wandering]] = rng.integers(0, len(DIRECTIONS), int(wandering.sum()))
+        self.stuck[blocked[~wandering]] += 1
+
+        if self._routes:
+            stepped = set(moved.tolist())
+            for agent in list(self._routes):
+                if agent in stepped:
+                    steps = self._routes[agent]
+                    steps.popleft()
+                    if not steps:
+                        del self._routes[agent]
+                elif moving[agent]:
+                    del self._routes[agent]
+        self._request_routes(players, px, py)
+        return moved, old_x, old_y
+
+    def apply(self, moves: Moves) -> list[tuple[int, tuple[int, int]]]:
+        """Make ``advance``'s moves in the room state; returns ``(slot, old position)`` for each."""
+        moved, old_x, old_y = moves
+        move = self.state.move
+        result = []
+        for slot, ox, oy, x, y, heading in zip(
+            self.slots[moved].tolist(), old_x.tolist(), old_y.tolist(),
+            self.x[moved].tolist(), self.y[moved].tolist(), self.heading[moved].tolist(),
+        ):
+            move(slot, x, y, heading)
+            result.append((slot, (ox, oy)))
+        return result
+
+    # --- internals ---
+
+    def _walkable(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """True for each in-bounds tile (x[i], y[i]) that isn't an obstacle."""
+        return self._tiles[self.state.tiles.index(x, y)] < SOLID
+
+    @staticmethod
+    def _locate(players: np.ndarray, slots: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Index into ``players`` (which mustn't be empty) of each slot, and whether it is there at all."""
+        order = np.argsort(players)
+        at = np.minimum(np.searchsorted(players[order], slots), len(players) - 1)
+        return order[at], players[order[at]] == slots
+
+    def _retarget(self, players: np.ndarray, px: np.ndarray, py: np.ndarray) -> None:
+        x, y, target = self.x, self.y, self.target
+        chasers = np.flatnonzero(target >= 0)
+        if not len(players):
+            self._forget(chasers)
+            return
+        if len(chasers):
+            # players who left or got away are no longer chased
+            at, found = self._locate(players, target[chasers])
+            far = np.maximum(np.abs(px[at] - x[chasers]), np.abs(py[at] - y[chasers]))
+            self._forget(chasers[~found | (far > GIVE_UP_FACTOR * self.chase_radius)])
+
+        # a slice of the agents looks for the nearest player in reach
+        n = len(self.slots)
+        start = self._cursor
+        end = min(n, start + -(-n // RETARGET_TICKS))
+        self._cursor = 0 if end >= n else end
+        agents = np.arange(start, end)
+        distance = np.maximum(
+            np.abs(x[agents, None] - px[None, :]), np.abs(y[agents, None] - py[None, :])
+        )
+        nearest = distance.argmin(axis=1)
+        near = distance[np.arange(len(agents)), nearest] <= self.chase_radius
+        chosen = np.where(near, players[nearest], -1)
+        self._forget(agents[(chosen != target[agents]) & (target[agents] >= 0)])
+        target[agents] = chosen
+
+    def _forget(self, agents: np.ndarray) -> None:
+        """Stop ``agents`` chasing, along with any route they had."""
+        self.target[agents] = -1
+        self.stuck[agents] = 0
+        if self._routes or self._pending:
+            for agent in agents.tolist():
+                self._routes.pop(agent, None)
+                pending = self._pending.pop(agent, None)
+                if pending is not None:
+                    pending[1].cancel()
+
+    def _request_routes(self, players: np.ndarray, px: np.ndarray, py: np.ndarray) -> None:
+        budget = self.paths_per_tick - (len(self._pending) if self.pool is not None else 0)
+        if budget <= 0:
+            return
+        stuck = np.flatnonzero((self.stuck >= self.patience) & (self.target >= 0))
+        if not len(stuck):
+            return
+        at = self._locate(players, self.target[stuck])[0]
+        for agent, gx, gy in zip(stuck.tolist(), px[at].tolist(), py[at].tolist()):
+            if agent in self._routes or agent in self._pending:
+                continue
+            self.stuck[agent] = 0
+            start = (int(self.x[agent]), int(self.y[agent]))
+            if self.pool is not None:
+                future = self.pool.submit(find_route, self._map_key, self.pathfinder.max_nodes, start, (gx, gy))
+                self._pending[agent] = (start, future)
+            else:
+                steps = _codes(self.pathfinder.search(start, (gx, gy)))
+                if steps:
+                    self._routes[agent] = deque(steps)
+            budget -= 1
+            if not budget:
+                break
+
+    def _collect_routes(self) -> None:
+        """Take on the routes found by the pool since the last tick."""
+        for agent, (start, future) in list(self._pending.items()):
+            if not future.done():
+                continue
+            del self._pending[agent]
+            if future.cancelled():
+                continue
+            try:
+                steps = future.result()
+            except Exception:
+                logger.exception("NPC route search failed")
+                continue
+            # the agent may have moved on while it was searched
+            if steps and (self.x[agent], self.y[agent]) == start and self.target[agent] >= 0:
+                self._routes[agent] = deque(steps)
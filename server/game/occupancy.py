@@ -0,0 +1,138 @@
+# server/game/occupancy.py
+import random
+from array import array
+from typing import Optional
+
+from server.game.tilemap import TileMap
+
+
+class OccupancyGrid:
+    """Per-tile obstacle and occupancy state for one room.
+
+    Obstacles are the solid tiles of the room's ``TileMap``, read in place so
+    a memory-mapped map is never loaded whole. Players are counted per tile
+    index (``y * width + x``) in a dict, so checks and updates are O(1) on
+    any map size.
+
+    Maps of up to ``FREE_LIST_LIMIT`` tiles also keep every free tile in a
+    swap-remove list, so picking a random spawn tile is O(1) however crowded
+    the room is. Larger maps sample random tiles instead, which is just as
+    fast while most of the map is free.
+    """
+
+    FREE_LIST_LIMIT = 1 << 18
+    SPAWN_SAMPLES = 64
+
+    def __init__(self, tiles: TileMap) -> None:
+        self.tiles = tiles
+        self.width = tiles.width
+        self.height = tiles.height
+        self.occupants: dict[int, int] = {}
+        self.free_count = self.width * self.height - tiles.solid_count
+
+        self._free: Optional[array] = None
+        self._where: Optional[array] = None
+        size = self.width * self.height
+        if size <= self.FREE_LIST_LIMIT:
+            if tiles.solid_count:
+                solid = tiles.solid
+                self._free = array("i", (
+                    y * self.width + x
+                    for y in range(self.height) for x in range(self.width) if not solid(x, y)
+                ))
+                self._where = array("i", [-1]) * size
+                for index, tile in enumerate(self._free):
+                    self._where[tile] = index
+            else:
+                self._free = array("i", range(size))
+                self._where = array("i", range(size))
+
+    # --- queries ---
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_blocked(self, x: int, y: int) -> bool:
+        """True if (x, y), which must be inside the grid, is an obstacle."""
+        return self.tiles.solid(x, y)
+
+    def walkable(self, x: int, y: int) -> bool:
+        """True if (x, y) is inside the grid and not an obstacle."""
+        return 0 <= x < self.width and 0 <= y < self.height and not self.is_blocked(x, y)
+
+    def is_free(self, x: int, y: int) -> bool:
+        """True if a player may step onto (x, y)."""
+        return self.walkable(x, y) and y * self.width + x not in self.occupants
+
+    def random_free(self, rng: Optional[random.Random] = None) -> Optional[tuple[int, int]]:
+        """Return a random free tile, or None if none was found."""
+        rng = rng or random
+        if self._free is not None:
+            if not self._free:
+                return None
+            tile = self._free[rng.randrange(len(self._free))]
+            return tile % self.width, tile // self.width
+        if self.free_count:
+            for _ in range(self.SPAWN_SAMPLES):
+                x, y = rng.randrange(self.width), rng.randrange(self.height)
+                if self.is_free(x, y):
+                    return x, y
+        return None
+
+    # --- updates ---
+
+    def enter(self, x: int, y: int) -> None:
+        """Count a player standing on (x, y)."""
+        tile = y * self.width + x
+        count = self.occupants.get(tile, 0)
+        self.occupants[tile] = count + 1
+        if not count and not self.is_blocked(x, y):
+            self._take(tile)
+
+    def leave(self, x: int, y: int) -> None:
+        """Stop counting a player on (x, y)."""
+        tile = y * self.width + x
+        count = self.occupants.get(tile)
+        if count is None:
+            return
+        if count > 1:
+            self.occupants[tile] = count - 1
+            return
+        del self.occupants[tile]
+        if not self.is_blocked(x, y):
+            self._give(tile)
+
+    def move(self, old: tuple[int, int], new: tuple[int, int]) -> None:
+        # a tile anyone stands on is never an obstacle
+        width, occupants = self.width, self.occupants
+        tile = old[1] * width + old[0]
+        count = occupants.pop(tile, None)
+        if count is not None:
+            if count > 1:
+                occupants[tile] = count - 1
+            else:
+                self._give(tile)
+        tile = new[1] * width + new[0]
+        count = occupants.get(tile, 0)
+        occupants[tile] = count + 1
+        if not count:
+            self._take(tile)
+
+    def _take(self, tile: int) -> None:
+        self.free_count -= 1
+        if self._free is None:
+            return
+        index = self._where[tile]
+        # swap the last free tile into this one's place
+        last = self._free.pop()
+        if last != tile:
+            self._free[index] = last
+            self._where[last] = index
+        self._where[tile] = -1
+
+    def _give(self, tile: int) -> None:
+        self.free_count += 1
+        if self._free is None:
+            return
+        self._where[tile] = len(self._free)
+        self._free.append(tile)
@@ -0,0 +1,114 @@
+# server/game/pathfinding.py
+from collections import OrderedDict
+from collections.abc import Container
+from heapq import heappop, heappush
+from typing import Optional
+
+from server import metrics
+from server.game.directions import DIRECTION_VECTORS
+from server.game.occupancy import OccupancyGrid
+
+# Step costs, integers so equal routes tie exactly (14 / 10 ~ sqrt(2))
+STRAIGHT = 10
+DIAGONAL = 14
+
+# (dx, dy, cost, direction) for each of the 8 neighbours
+_STEPS = tuple(
+    (dx, dy, DIAGONAL if dx and dy else STRAIGHT, name)
+    for name, (dx, dy) in DIRECTION_VECTORS.items()
+)
+
+_hits = metrics.path_lookups.labels("hit")
+_misses = metrics.path_lookups.labels("miss")
+
+
+class Pathfinder:
+    """8-way A* over a room's obstacles, with an LRU cache of recent routes.
+
+    Routes only avoid obstacles; other players move, so they are dealt with
+    while walking (see ``server.game.routes``). Searches give up after
+    ``max_nodes`` expanded tiles. The cache is keyed on (start, goal) and
+    holds misses too; obstacles are the room's map, which never changes.
+    """
+
+    def __init__(self, grid: OccupancyGrid, cache_size: int, max_nodes: int) -> None:
+        self.grid = grid
+        self.cache_size = cache_size
+        self.max_nodes = max_nodes
+        self._cache: OrderedDict[tuple[tuple[int, int], tuple[int, int]], Optional[tuple[str, ...]]] = OrderedDict()
+
+    def find(self, start: tuple[int, int], goal: tuple[int, int]) -> Optional[tuple[str, ...]]:
+        """Directions leading from ``start`` to ``goal``, or None if it can't be reached."""
+        key = (start, goal)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            _hits.inc()
+            return self._cache[key]
+
+        _misses.inc()
+        path = self.search(start, goal)
+        if self.cache_size > 0:
+            self._cache[key] = path
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return path
+
+    def search(
+        self,
+        start: tuple[int, int],
+        goal: tuple[int, int],
+        avoid: Container[tuple[int, int]] = (),
+    ) -> Optional[tuple[str, ...]]:
+        """Run A* without the cache, also treating the tiles in ``avoid`` as blocked."""
+        grid = self.grid
+        if not grid.walkable(*goal) or goal in avoid:
+            return None
+        width, height, is_blocked = grid.width, grid.height, grid.is_blocked
+        gx, gy = goal
+
+        def heuristic(x: int, y: int) -> int:
+            dx, dy = abs(x - gx), abs(y - gy)
+            return STRAIGHT * max(dx, dy) + (DIAGONAL - STRAIGHT) * min(dx, dy)
+
+        start_tile = start[1] * width + start[0]
+        goal_tile = gy * width + gx
+        # ties on f go to the tile closer to the goal, which keeps open ground cheap
+        open_set = [(heuristic(*start), 0, start_tile)]
+        cost = {start_tile: 0}
+        came_from: dict[int, tuple[int, str]] = {}
+        closed = set()
+        while open_set:
+            _, _, tile = heappop(open_set)
+            if tile == goal_tile:
+                break
+            if tile in closed:
+                continue
+            closed.add(tile)
+            if len(closed) > self.max_nodes:
+                return None
+
+            x, y = tile % width, tile // width
+            base = cost[tile]
+            for dx, dy, step_cost, direction in _STEPS:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                if is_blocked(nx, ny) or (avoid and (nx, ny) in avoid):
+                    continue
+                neighbour = ny * width + nx
+                new_cost = base + step_cost
+                if neighbour not in cost or new_cost < cost[neighbour]:
+                    cost[neighbour] = new_cost
+                    came_from[neighbour] = (tile, direction)
+                    h = heuristic(nx, ny)
+                    heappush(open_set, (new_cost + h, h, neighbour))
+        else:
+            return None
+
+        path = []
+        tile = goal_tile
+        while tile != start_tile:
+            tile, direction = came_from[tile]
+            path.append(direction)
+        path.reverse()
+        return tuple(path)
@@ -0,0 +1,88 @@
+# server/game/routes.py
+from collections import deque
+
+from server.game.directions import DIRECTION_VECTORS
+from server.game.logic import GameLogic
+from server.game.pathfinding import Pathfinder
+from server.state import ServerState
+
+
+class Route:
+    __slots__ = ("goal", "steps", "waited")
+
+    def __init__(self, goal: tuple[int, int], steps: tuple[str, ...]) -> None:
+        self.goal = goal
+        self.steps = deque(steps)
+        self.waited = 0
+
+
+class RouteManager:
+    """Click-to-move routes being walked by a room's players.
+
+    A ``move_to`` is resolved once by the pathfinder and then walked one
+    step per tick. When another player stands on the next tile the walker
+    waits up to ``patience`` ticks, then looks for a way around that tile
+    and gives up if there is none. Any manual move cancels the route.
+    """
+
+    def __init__(self, state: ServerState, pathfinder: Pathfinder, patience: int) -> None:
+        self.state = state
+        self.pathfinder = pathfinder
+        self.patience = max(1, patience)
+        self._routes: dict[str, Route] = {}
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def plan(self, client_id: str, goal: tuple[int, int]) -> bool:
+        """Start walking ``client_id`` to ``goal``; False if it can't get there."""
+        self._routes.pop(client_id, None)
+        slot = self.state.slot_of(client_id)
+        if slot is None:
+            return False
+        start = self.state.store.position(slot)
+        steps = self.pathfinder.find(start, goal)
+        if not steps:
+            return steps is not None
+        self._routes[client_id] = Route(goal, steps)
+        return True
+
+    def cancel(self, client_id: str) -> None:
+        self._routes.pop(client_id, None)
+
+    def step(self) -> list[tuple[int, tuple[int, int]]]:
+        """Take the next step of every route.
+
+        Returns ``(slot, old position)`` for each player that moved.
+        """
+        state = self.state
+        store = state.store
+        moved = []
+        for client_id in list(self._routes):
+            route = self._routes[client_id]
+            slot = state.slot_of(client_id)
+            if slot is None:
+                del self._routes[client_id]
+                continue
+            old = store.position(slot)
+            if GameLogic.move_player(state, client_id, route.steps[0]):
+                route.steps.popleft()
+                route.waited = 0
+                if not route.steps:
+                    del self._routes[client_id]
+                moved.append((slot, old))
+            else:
+                self._blocked(client_id, route, old)
+        return moved
+
+    def _blocked(self, client_id: str, route: Route, position: tuple[int, int]) -> None:
+        route.waited += 1
+        if route.waited < self.patience:
+            return
+        # still in the way: go around that tile (not cached, it's only for now)
+        dx, dy = DIRECTION_VECTORS[route.steps[0]]
+        steps = self.pathfinder.search(position, route.goal, avoid={(position[0] + dx, position[1] + dy)})
+        if steps:
+            self._routes[client_id] = Route(route.goal, steps)
+        else:
+            del self._routes[client_id]
@@ -0,0 +1,126 @@
+# server/game/snapshots.py
+from array import array
+from typing import TYPE_CHECKING, Optional
+
+from server.game.directions import DIRECTIONS
+
+if TYPE_CHECKING:
+    from server.state import PlayerStore
+
+# (client_id, slot, [x, y], direction) / (client_id, slot)
+DeltaEntry = tuple[str, int, list[int], str]
+RemovedEntry = tuple[str, int]
+
+
+class WorldSnapshot:
+    """Copy of the player store's arrays at one tick."""
+
+    __slots__ = ("seq", "ids", "positions", "directions")
+
+    def __init__(self, seq: int, store: "PlayerStore") -> None:
+        self.seq = seq
+        self.ids = list(store.ids)
+        self.positions = array("i", store.positions)
+        self.directions = bytes(store.directions)
+
+
+class ClientFrames:
+    """What one client has acknowledged and which slots each sent delta covered."""
+
+    __slots__ = ("acked", "sent")
+
+    def __init__(self) -> None:
+        self.acked = 0
+        self.sent: dict[int, frozenset[int]] = {}
+
+
+class SnapshotManager:
+    """Ring buffer of numbered world snapshots with per-client acknowledgements.
+
+    Every delta is computed against the newest snapshot the client has
+    acknowledged, so a dropped or late delta costs nothing: the next one
+    carries the same changes. A client whose ack has fallen out of the ring
+    (or who never acked) gets a full snapshot, sent with ``base`` 0.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.seq = 0
+        self._ring: dict[int, WorldSnapshot] = {}
+        self._clients: dict[str, ClientFrames] = {}
+
+    def capture(self, store: "PlayerStore") -> WorldSnapshot:
+        self.seq += 1
+        snapshot = self._ring[self.seq] = WorldSnapshot(self.seq, store)
+        self._ring.pop(self.seq - self.size, None)
+        return snapshot
+
+    def ack(self, client_id: str, seq: int) -> None:
+        frames = self._clients.get(client_id)
+        if frames is None or seq <= frames.acked or seq not in frames.sent:
+            return
+        frames.acked = seq
+        for old in [s for s in frames.sent if s < seq]:
+            del frames.sent[old]
+
+    def discard(self, client_id: str) -> None:
+        self._clients.pop(client_id, None)
+
+    def delta(
+        self, client_id: str, snapshot: WorldSnapshot, visible: list[int]
+    ) -> Optional[tuple[int, list[DeltaEntry], list[RemovedEntry]]]:
+        """Diff ``visible`` slots in ``snapshot`` against the client's acked base.
+
+        Returns ``(base_seq, changed, removed)``, or None when nothing changed
+        and the base is still comfortably inside the ring.
+        """
+        frames = self._clients.get(client_id)
+        if frames is None:
+            frames = self._clients[client_id] = ClientFrames()
+
+        base_seq = frames.acked
+        base = self._ring.get(base_seq)
+        base_visible = frames.sent.get(base_seq)
+        if base is None or base_visible is None:
+            base_seq = 0
+
+        ids, pos, dirs = snapshot.ids, snapshot.positions, snapshot.directions
+        changed: list[DeltaEntry] = []
+        removed: list[RemovedEntry] = []
+
+        if base_seq == 0:
+            for s in visible:
+                changed.append((ids[s], s, [pos[2 * s], pos[2 * s + 1]], DIRECTIONS[dirs[s]]))
+        else:
+            b_ids, b_pos, b_dirs = base.ids, base.positions, base.directions
+            known = len(b_ids)
+            for s in visible:
+                if (
+                    s in base_visible
+                    and s < known
+                    and b_ids[s] == ids[s]
+                    and b_pos[2 * s] == pos[2 * s]
+                    and b_pos[2 * s + 1] == pos[2 * s + 1]
+                    and b_dirs[s] == dirs[s]
+                ):
+                    continue
+                changed.append((ids[s], s, [pos[2 * s], pos[2 * s + 1]], DIRECTIONS[dirs[s]]))
+            now = set(visible)
+            for s in base_visible:
+                if s not in now or ids[s] != b_ids[s]:
+                    removed.append((b_ids[s], s))
+
+            # keep quiet when nothing changed and the client has acked everything
+            # we sent; otherwise it may be showing a newer state than its base
+            if (
+                not changed
+                and not removed
+                and max(frames.sent) == base_seq
+                and snapshot.seq - base_seq < self.size // 2
+            ):
+                return None
+
+        frames.sent[snapshot.seq] = frozenset(visible)
+        for old in [s for s in frames.sent if s <= snapshot.seq - self.size]:
+            del frames.sent[old]
+        return base_seq, changed, removed
@@ -0,0 +1,198 @@
+# server/game/tick.py
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Optional
+
+from server import metrics, profiling
+from server.backends.base import Backend
+from server.game.logic import GameLogic
+from server.game.routes import RouteManager
+from server.game.snapshots import SnapshotManager
+from server.state import ServerState
+
+if TYPE_CHECKING:
+    from server.game.npcs import NpcEngine
+
+logger = logging.getLogger("server")
+
+# How often (seconds) tick timing stats are logged
+STATS_INTERVAL = 5.0
+
+
+class TickLoop:
+    """Fixed-rate authoritative simulation loop for one room.
+
+    Client inputs are queued per client and at most one move per client is
+    resolved each tick. Each client then gets a single ``player_batch`` event
+    listing every visible player that moved, instead of one update per move.
+    With ``delta_snapshots`` each tick instead sends every client a sequenced
+    delta against the last snapshot it acknowledged. Players walking a
+    ``move_to`` route take one step of it per tick; without a tick rate the
+    loop runs only to walk those routes and move the room's ``npcs``. NPCs
+    move first, all at once, and only their moves some local player might
+    see are sent.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        state: ServerState,
+        backend: Backend,
+        routes: RouteManager,
+        rate: float,
+        input_buffer: int = 4,
+        delta_snapshots: bool = False,
+        snapshot_buffer: int = 32,
+        npcs: Optional["NpcEngine"] = None,
+    ) -> None:
+        self.name = name
+        self.state = state
+        self.backend = backend
+        self.routes = routes
+        self.rate = rate
+        self.interval = 1.0 / rate
+        self.input_buffer = input_buffer
+        self.delta_snapshots = delta_snapshots
+        self.snapshots = SnapshotManager(snapshot_buffer)
+        self.npcs = npcs
+        self._inputs: dict[str, deque[str]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # timing stats
+        self.ticks = 0
+        self.overruns = 0
+        self._window_ticks = 0
+        self._window_total = 0.0
+        self._window_max = 0.0
+
+    # --- input ---
+
+    def queue_input(self, client_id: str, move: str) -> None:
+        """Queue a move for the next tick, dropping the oldest if the buffer is full."""
+        # a manual move replaces any click-to-move route
+        self.routes.cancel(client_id)
+        moves = self._inputs.get(client_id)
+        if moves is None:
+            moves = self._inputs[client_id] = deque(maxlen=self.input_buffer)
+        moves.append(move)
+
+    def move_to(self, client_id: str, goal: tuple[int, int]) -> bool:
+        """Replace a client's queued moves with a route to ``goal``; False if unreachable."""
+        self._inputs.pop(client_id, None)
+        return self.routes.plan(client_id, goal)
+
+    def discard(self, client_id: str) -> None:
+        """Forget pending inputs, routes and snapshot acks for a disconnected client."""
+        self._inputs.pop(client_id, None)
+        self.routes.cancel(client_id)
+        self.snapshots.discard(client_id)
+
+    # --- lifecycle ---
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info("Tick loop for room %s started at %.1f Hz", self.name, self.rate)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- simulation ---
+
+    @profiling.traced()
+    async def step(self) -> None:
+        """Resolve one queued input or route step per client and send out the result."""
+        state = self.state
+        store = state.store
+        if state.journal is not None:
+            state.journal.tick()
+        moved = []
+        if self.npcs:
+            moves = self.npcs.step()
+            # deltas are worked out from the store; nothing to queue per move
+            if not self.delta_snapshots:
+                for slot, old in state.interest.watched(moves):
+                    self.backend.broadcaster.queue_view_changes(slot, old)
+                    moved.append(slot)
+        for client_id in list(self._inputs):
+            moves = self._inputs[client_id]
+            move = moves.popleft()
+            if not moves:
+                del self._inputs[client_id]
+            slot = state.slot_of(client_id)
+            if slot is None:
+                continue
+            old = store.position(slot)
+            if GameLogic.move_player(state, client_id, move):
+                if not self.delta_snapshots:
+                    self.backend.broadcaster.queue_view_changes(slot, old)
+                moved.append(slot)
+        if self.routes:
+            for slot, old in self.routes.step():
+                if not self.delta_snapshots:
+                    self.backend.broadcaster.queue_view_changes(slot, old)
+                moved.append(slot)
+
+        await self.backend.tick(moved, self.snapshots if self.delta_snapshots else None)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        last_stats = time.monotonic()
+        while True:
+            start = time.perf_counter()
+            try:
+                await self.step()
+            except Exception:
+                logger.exception("Tick %d in room %s failed", self.ticks, self.name)
+            duration = time.perf_counter() - start
+            self._record(duration)
+
+            next_tick += self.interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                self.overruns += 1
+                metrics.tick_overruns.inc()
+                logger.warning(
+                    "Tick %d in room %s overran by %.1f ms (took %.1f ms)",
+                    self.ticks, self.name, -delay * 1000, duration * 1000,
+                )
+                # don't try to catch up on missed ticks
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+            if time.monotonic() - last_stats >= STATS_INTERVAL:
+                self._log_stats()
+                last_stats = time.monotonic()
+
+    def _record(self, duration: float) -> None:
+        metrics.tick_seconds.observe(duration)
+        self.ticks += 1
+        self._window_ticks += 1
+        self._window_total += duration
+        self._window_max = max(self._window_max, duration)
+
+    def _log_stats(self) -> None:
+        if not self._window_ticks:
+            return
+        logger.info(
+            "Room %s ticks: %d, avg %.2f ms, max %.2f ms, overruns %d",
+            self.name,
+            self.ticks,
+            self._window_total / self._window_ticks * 1000,
+            self._window_max * 1000,
+            self.overruns,
+        )
+        self._window_ticks = 0
+        self._window_total = 0.0
+        self._window_max = 0.0
+
@@ -0,0 +1,207 @@
+# server/game/tilemap.py
+"""Chunked tile maps, read from disk through ``mmap``.
+
+File layout (little-endian)::
+
+    header  4s magic "ISOM", u16 version, u16 chunk_size, u32 width, u32 height,
+            u64 number of solid tiles
+    chunks  ceil(width / chunk_size) * ceil(height / chunk_size) chunks in
+            row-major order, each chunk_size * chunk_size tile bytes (row-major)
+
+Edge chunks are padded to full size; padding tiles are never read. A tile
+byte's low 7 bits are its terrain kind (the client picks how to draw it)
+and bit 7 marks it solid. Chunks have a fixed size, so any tile or chunk is
+one offset away and only the pages that are actually read get loaded.
+
+Generate a map (run from project root)::
+
+    python -m server.game.tilemap maps/world.map --size 10000 10000
+"""
+import argparse
+import mmap
+import random
+import struct
+import time
+from typing import Callable, Optional, Union
+
+MAGIC = b"ISOM"
+VERSION = 1
+DEFAULT_CHUNK_SIZE = 16
+
+SOLID = 0x80
+KIND_MASK = 0x7F
+
+# terrain kinds written by the generator
+GROUND = 0
+GRASS = 1
+ROCK = SOLID | 2
+
+_HEADER = struct.Struct("<4sHHIIQ")
+
+
+class TileMap:
+    """Read-only view of a chunked tile map held in any buffer (usually an mmap)."""
+
+    def __init__(
+        self,
+        data: Union[bytes, bytearray, mmap.mmap],
+        width: int,
+        height: int,
+        chunk_size: int,
+        solid_count: int = 0,
+        offset: int = 0,
+        path: Optional[str] = None,
+    ) -> None:
+        if chunk_size <= 0 or chunk_size & (chunk_size - 1):
+            raise ValueError(f"chunk size must be a power of two, got {chunk_size}")
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.chunks_x = -(-width // chunk_size)
+        self.chunks_y = -(-height // chunk_size)
+        self.solid_count = solid_count
+        self.path = path
+        self._data = data
+        self._offset = offset
+        self._shift = chunk_size.bit_length() - 1
+        self._mask = chunk_size - 1
+        self._chunk_bytes = chunk_size * chunk_size
+        if len(data) < offset + self.chunks_x * self.chunks_y * self._chunk_bytes:
+            raise ValueError(f"map data is truncated ({path or 'in memory'})")
+
+    @classmethod
+    def open(cls, path: str) -> "TileMap":
+        """Map a tile file into memory; nothing is read until tiles are used.
+
+        Raises ValueError if the file can't be read or isn't a tile map.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:  # mmap refuses empty files with ValueError
+            raise ValueError(f"can't read tile map {path}: {e}") from e
+        try:
+            magic, version, chunk_size, width, height, solid_count = _HEADER.unpack_from(data)
+        except struct.error:
+            data.close()
+            raise ValueError(f"{path} is too short to be a tile map") from None
+        if magic != MAGIC or version != VERSION:
+            data.close()
+            raise ValueError(f"{path} is not a version {VERSION} tile map")
+        try:
+            return cls(data, width, height, chunk_size, solid_count, _HEADER.size, path)
+        except ValueError:
+            data.close()
+            raise
+
+    @classmethod
+    def blank(cls, width: int, height: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> "TileMap":
+        """An in-memory map of plain ground, for rooms without a map file."""
+        chunks = -(-width // chunk_size) * -(-height // chunk_size)
+        return cls(bytearray(chunks * chunk_size * chunk_size), width, height, chunk_size)
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    # --- tiles ---
+
+    def tile(self, x: int, y: int) -> int:
+        """The tile byte at (x, y), which must be inside the map."""
+        shift, mask = self._shift, self._mask
+        chunk = (y >> shift) * self.chunks_x + (x >> shift)
+        return self._data[self._offset + chunk * self._chunk_bytes + ((y & mask) << shift) + (x & mask)]
+
+    def solid(self, x: int, y: int) -> bool:
+        return self.tile(x, y) >= SOLID
+
+    def index(self, x, y):
+        """Offset of tile (x, y) in ``view()``; works elementwise on NumPy arrays too."""
+        shift, mask = self._shift, self._mask
+        return ((y >> shift) * self.chunks_x + (x >> shift)) * self._chunk_bytes + ((y & mask) << shift) + (x & mask)
+
+    def view(self) -> memoryview:
+        """The tiles of every chunk, in file order, without copying.
+
+        A memory-mapped map can't be closed while a view of it is alive.
+        """
+        return memoryview(self._data)[self._offset:]
+
+    # --- chunks ---
+
+    def chunk_of(self, x: int, y: int) -> tuple[int, int]:
+        return x >> self._shift, y >> self._shift
+
+    def chunk(self, cx: int, cy: int) -> bytes:
+        """The raw tiles of chunk (cx, cy), padding included."""
+        start = self._offset + (cy * self.chunks_x + cx) * self._chunk_bytes
+        return bytes(self._data[start:start + self._chunk_bytes])
+
+
+def write_map(
+    path: str,
+    width: int,
+    height: int,
+    chunk: Callable[[int, int], bytes],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Write a map whose chunk (cx, cy) is ``chunk(cx, cy)``; returns its solid tile count."""
+    chunks_x, chunks_y = -(-width // chunk_size), -(-height // chunk_size)
+    size = chunk_size * chunk_size
+    solid_bytes = bytes(range(SOLID, 256))
+    solid_count = 0
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, chunk_size, width, height, 0))
+        for cy in range(chunks_y):
+            rows = min(chunk_size, height - cy * chunk_size)
+            for cx in range(chunks_x):
+                tiles = chunk(cx, cy)
+                if len(tiles) != size:
+                    raise ValueError(f"chunk ({cx}, {cy}) has {len(tiles)} tiles, expected {size}")
+                cols = min(chunk_size, width - cx * chunk_size)
+                inside = tiles if cols == rows == chunk_size else b"".join(
+                    tiles[row * chunk_size:row * chunk_size + cols] for row in range(rows)
+                )
+                solid_count += len(inside) - len(inside.translate(None, solid_bytes))
+                f.write(tiles)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, chunk_size, width, height, solid_count))
+    return solid_count
+
+
+def random_terrain(seed: int, rock: float, grass: float, chunk_size: int) -> Callable[[int, int], bytes]:
+    """Chunks of ground with scattered grass and solid rocks, reproducible per seed."""
+    table = bytes(
+        ROCK if value < rock * 256 else GRASS if value < (rock + grass) * 256 else GROUND
+        for value in range(256)
+    )
+
+    def chunk(cx: int, cy: int) -> bytes:
+        rng = random.Random((seed << 40) | (cy << 20) | cx)
+        return rng.randbytes(chunk_size * chunk_size).translate(table)
+
+    return chunk
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a random chunked tile map")
+    parser.add_argument("path")
+    parser.add_argument("--size", type=int, nargs=2, default=(1000, 1000), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--rock", type=float, default=0.03, help="share of solid rock tiles")
+    parser.add_argument("--grass", type=float, default=0.2, help="share of grass tiles")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    width, height = args.size
+    start = time.perf_counter()
+    solid = write_map(
+        args.path, width, height,
+        random_terrain(args.seed, args.rock, args.grass, args.chunk_size),
+        args.chunk_size,
+    )
+    print(f"wrote {width}x{height} map to {args.path} ({solid} solid tiles) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# server/journal.py
+"""Binary journal of client inputs and outgoing events, for replaying load offline.
+
+File layout (little-endian)::
+
+    header  4s magic "ISOJ", u16 version, f64 start (unix time),
+            u32 n, n bytes of JSON settings
+    records u8 kind, f64 seconds since start, then by kind:
+
+    NAME    u32 id, u8 len, utf-8 name      ids used for rooms and clients below
+    ROOM    u32 room, u32 width, u32 height, u16 len, utf-8 map file ("" = blank)
+    JOIN    u32 room, u32 client, u16 x, u16 y, u8 direction, u8 binary
+    LEAVE   u32 room, u32 client
+    INPUT   u32 room, u32 client, u32 len, raw frame as received
+    TICK    u32 room
+    EVENT   u32 room, u32 recipients, u32 len, event in the binary protocol
+
+An EVENT stands for the same event queued for ``recipients`` clients in a
+row. Replay (``python -m bench.replay``) rebuilds each room from its ROOM
+and JOIN records and feeds INPUT and TICK records through the normal
+handlers, so the EVENT records it produces can be checked against these.
+"""
+import asyncio
+import json
+import logging
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, TYPE_CHECKING, Iterator, NamedTuple, Optional
+
+from server.config import settings
+
+if TYPE_CHECKING:
+    from server.events.builders import Payload
+    from server.game.tilemap import TileMap
+
+logger = logging.getLogger("server")
+
+MAGIC = b"ISOJ"
+VERSION = 1
+
+NAME = 0
+ROOM = 1
+JOIN = 2
+LEAVE = 3
+INPUT = 4
+TICK = 5
+EVENT = 6
+
+_HEADER = struct.Struct("<4sHdI")
+_RECORD = struct.Struct("<Bd")
+_NAME = struct.Struct("<IB")
+_ROOM = struct.Struct("<IIIH")
+_JOIN = struct.Struct("<IIHHBB")
+_PAIR = struct.Struct("<II")
+_DATA = struct.Struct("<III")
+_TICK = struct.Struct("<I")
+
+# Records encoded between yields to the event loop
+ENCODE_RECORDS = 2048
+
+
+class Entry(NamedTuple):
+    """One decoded journal record (NAME records are resolved, not returned)."""
+
+    kind: int
+    time: float
+    room: str
+    client: Optional[str] = None
+    values: tuple = ()  # ROOM: (width, height, map file), JOIN: (x, y, direction, binary), EVENT: (recipients,)
+    data: bytes = b""
+
+
+class Journal:
+    """Appends a process's inputs and outgoing events to a journal file.
+
+    Recording only appends an entry to a list; once per ``interval`` seconds
+    the list is encoded on the event loop, ``ENCODE_RECORDS`` at a time with
+    other tasks let run in between, and written by a single worker thread.
+    Events keep a reference to their ``Payload`` until then, so a fan-out
+    costs one record and the event is encoded once.
+    """
+
+    def __init__(self, path: str, interval: float = 1.0) -> None:
+        self.path = path
+        self.interval = interval
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._records: list[list] = []
+        self._names: dict[str, int] = {}
+        self._file: Optional[IO[bytes]] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal")
+        self._task: Optional[asyncio.Task] = None
+
+    def open(self) -> None:
+        config = json.dumps(settings.model_dump(mode="json")).encode()
+        self._file = open(self.path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, VERSION, self.started, len(config)) + config)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._file.close)
+        self._executor.shutdown()
+
+    def room(self, name: str, tiles: "TileMap") -> "RoomJournal":
+        self.record(ROOM, name, None, (tiles.width, tiles.height, tiles.path or ""))
+        return RoomJournal(self, name)
+
+    def now(self) -> float:
+        return time.perf_counter() - self._start
+
+    def record(self, kind: int, room: str, client: Optional[str] = None, values: tuple = (), data=b"") -> list:
+        entry = [kind, self.now(), room, client, values, data]
+        self._records.append(entry)
+        return entry
+
+    def event(self, room: str, message: "Payload") -> None:
+        """Count ``message`` queued for one more client of ``room``."""
+        records = self._records
+        if records:
+            last = records[-1]
+            if last[5] is message and last[0] == EVENT:
+                last[4] = (last[4][0] + 1,)
+                return
+        self.record(EVENT, room, values=(1,), data=message)
+
+    async def flush(self) -> None:
+        if not self._records:
+            return
+        records, self._records = self._records, []
+        chunks = []
+        for start in range(0, len(records), ENCODE_RECORDS):
+            if start:
+                await asyncio.sleep(0)
+            chunks.append(self.encode(records[start:start + ENCODE_RECORDS]))
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._write, b"".join(chunks))
+
+    def encode(self, records: list[list]) -> bytes:
+        out = bytearray()
+        for kind, at, room, client, values, data in records:
+            room_id = self._name_id(room, at, out)
+            client_id = self._name_id(client, at, out) if client is not None else 0
+            out += _RECORD.pack(kind, at)
+            if kind == EVENT:
+                data = data.binary
+                out += _DATA.pack(room_id, values[0], len(data))
+                out += data
+            elif kind == INPUT:
+                out += _DATA.pack(room_id, client_id, len(data))
+                out += data
+            elif kind == JOIN:
+                out += _JOIN.pack(room_id, client_id, *values)
+            elif kind == LEAVE:
+                out += _PAIR.pack(room_id, client_id)
+            elif kind == TICK:
+                out += _TICK.pack(room_id)
+            elif kind == ROOM:
+                path = values[2].encode()
+                out += _ROOM.pack(room_id, values[0], values[1], len(path))
+                out += path
+        return bytes(out)
+
+    def _name_id(self, name: str, at: float, out: bytearray) -> int:
+        name_id = self._names.get(name)
+        if name_id is None:
+            name_id = self._names[name] = len(self._names) + 1
+            encoded = name.encode()
+            out += _RECORD.pack(NAME, at)
+            out += _NAME.pack(name_id, len(encoded))
+            out += encoded
+        return name_id
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except OSError:
+                logger.exception("Writing the journal %s failed", self.path)
+
+    def _write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self._file.flush()
+
+
+class RoomJournal:
+    """A ``Journal`` seen from one room."""
+
+    __slots__ = ("journal", "name")
+
+    def __init__(self, journal: Journal, name: str) -> None:
+        self.journal = journal
+        self.name = name
+
+    def join(self, client_id: str, x: int, y: int, direction: int, binary: bool) -> None:
+        self.journal.record(JOIN, self.name, client_id, (x, y, direction, binary))
+
+    def leave(self, client_id: str) -> None:
+        self.journal.record(LEAVE, self.name, client_id)
+
+    def input(self, client_id: str, data: bytes) -> None:
+        self.journal.record(INPUT, self.name, client_id, data=data)
+
+    def tick(self) -> None:
+        self.journal.record(TICK, self.name)
+
+    def event(self, message: "Payload") -> None:
+        self.journal.event(self.name, message)
+
+
+def read(path: str) -> tuple[dict, float, Iterator[Entry]]:
+    """Open a journal; returns its settings, start time and records."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, started, length = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} journal")
+    config = json.loads(data[_HEADER.size:_HEADER.size + length])
+    return config, started, _entries(data, _HEADER.size + length)
+
+
+def _entries(data: bytes, offset: int) -> Iterator[Entry]:
+    try:
+        yield from _decode(data, offset)
+    except (struct.error, KeyError, UnicodeDecodeError):
+        # a journal cut off mid-record (e.g. the process was killed) just ends there
+        logger.warning("Journal ends with a truncated record")
+
+
+def _decode(data: bytes, offset: int) -> Iterator[Entry]:
+    names: dict[int, str] = {0: ""}
+    end = len(data)
+    while offset + _RECORD.size <= end:
+        kind, at = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        if kind == NAME:
+            name_id, length = _NAME.unpack_from(data, offset)
+            offset += _NAME.size
+            names[name_id] = data[offset:offset + length].decode()
+            offset += length
+        elif kind in (EVENT, INPUT):
+            room, second, length = _DATA.unpack_from(data, offset)
+            offset += _DATA.size
+            body = data[offset:offset + length]
+            offset += length
+            if len(body) < length:
+                raise struct.error("truncated record")
+            if kind == EVENT:
+                yield Entry(kind, at, names[room], values=(second,), data=body)
+            else:
+                yield Entry(kind, at, names[room], names[second], data=body)
+        elif kind == JOIN:
+            room, client, x, y, direction, binary = _JOIN.unpack_from(data, offset)
+            offset += _JOIN.size
+            yield Entry(kind, at, names[room], names[client], (x, y, direction, bool(binary)))
+        elif kind == LEAVE:
+            room, client = _PAIR.unpack_from(data, offset)
+            offset += _PAIR.size
+            yield Entry(kind, at, names[room], names[client])
+        elif kind == TICK:
+            (room,) = _TICK.unpack_from(data, offset)
+            offset += _TICK.size
+            yield Entry(kind, at, names[room])
+        elif kind == ROOM:
+            room, width, height, length = _ROOM.unpack_from(data, offset)
+            offset += _ROOM.size
+            path = data[offset:offset + length].decode()
+            offset += length
+            yield Entry(kind, at, names[room], values=(width, height, path))
+        else:
+            raise ValueError(f"unknown journal record {kind} at byte {offset - _RECORD.size}")
@@ -0,0 +1,209 @@
+# server/metrics.py
+"""Server metrics in the Prometheus text exposition format (served at /metrics).
+
+Recording is meant to stay on in production: a counter is one float
+addition and a histogram observation one ``bisect`` over fixed buckets,
+with no locks (everything runs on the event loop). Values that are already
+tracked elsewhere, like client counts per room or the rate limiter's
+totals, are read through callbacks only when scraped.
+
+Each worker process keeps its own numbers; with several workers every
+scrape reports the worker that answered it.
+"""
+import functools
+import time
+from bisect import bisect_left
+from typing import Awaitable, Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Bucket upper bounds in seconds, from 10 us to 1 s
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+Sample = tuple[tuple[str, ...], float]
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        self._function: Optional[Callable[[], Iterable[Sample]]] = None
+        if not labelnames:
+            self.labels()  # report 0 rather than nothing until first used
+        REGISTRY.append(self)
+
+    def labels(self, *values: str):
+        """Return the child for one set of label values; keep it for hot paths."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._child()
+        return child
+
+    def set_function(self, function: Callable[[], Iterable[Sample]]) -> None:
+        """Read ``(label values, value)`` pairs from ``function`` at scrape time instead."""
+        self._function = function
+
+    def _child(self):
+        return Value()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if self._function is not None:
+            samples: Iterable[Sample] = self._function()
+        else:
+            samples = ((values, child.value) for values, child in self._children.items())
+        for values, value in samples:
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_number(value)}")
+        return lines
+
+
+class Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.buckets = buckets
+        super().__init__(name, help, labelnames)
+
+    def _child(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), child.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                labels = _labels((*self.labelnames, "le"), (*values, le))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_number(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def timed(histogram: HistogramValue):
+    """Decorator observing how long each call of a coroutine function takes."""
+    def decorator(function: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs) -> T:
+            start = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def render() -> str:
+    """Every registered metric in Prometheus text format."""
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY: list[Metric] = []
+
+# --- connections ---
+connected_clients = Gauge("game_connected_clients", "Clients connected to this process", ("room",))
+rooms_open = Gauge("game_rooms", "Rooms open in this process")
+evictions = Counter("game_evictions_total", "Clients dropped by their outbox", ("reason",))
+admissions = Counter("game_admissions_total", "New connections by admission outcome", ("outcome",))
+admission_waiting = Gauge("game_admission_waiting", "Connections waiting to be admitted")
+send_failures = Counter("game_send_failures_total", "Socket sends that raised or timed out")
+
+# --- traffic ---
+messages_received = Counter("game_messages_received_total", "Frames received from clients")
+bytes_received = Counter("game_received_bytes_total", "Bytes received from clients")
+messages_sent = Counter("game_messages_sent_total", "Frames sent to clients")
+bytes_sent = Counter("game_sent_bytes_total", "Bytes sent to clients (JSON text counted in characters)")
+outbox_coalesced = Counter("game_outbox_coalesced_total", "Queued messages replaced by a newer one")
+outbox_dropped = Counter("game_outbox_dropped_total", "Messages refused because an outbox overflowed")
+outbox_depth = Gauge("game_outbox_depth", "Messages waiting in the outboxes of a room: deepest one and all", ("room", "stat"))
+inputs = Counter("game_inputs_total", "Client moves by rate limiter outcome", ("outcome",))
+input_offenders = Gauge(
+    "game_input_offender_inputs", "Inputs of the connected clients most throttled or rejected", ("room", "client", "outcome")
+)
+path_lookups = Counter("game_path_lookups_total", "move_to route lookups by path cache result", ("result",))
+
+# --- timings ---
+receive_seconds = Histogram("game_handle_receive_seconds", "Time spent handling one client frame")
+broadcast_seconds = Histogram("game_broadcast_seconds", "Time spent queueing one fan-out", ("kind",))
+serialize_seconds = Histogram("game_serialize_seconds", "Time spent encoding one event", ("protocol",))
+tick_seconds = Histogram("game_tick_seconds", "Duration of one simulation tick")
+tick_overruns = Counter("game_tick_overruns_total", "Ticks that took longer than the tick interval")
+
+# --- persistence ---
+state_log_records = Counter("game_state_log_records_total", "Player positions appended to the state log")
+state_log_flush_seconds = Histogram("game_state_log_flush_seconds", "Time for one state log batch to reach disk")
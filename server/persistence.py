@@ -0,0 +1,306 @@
+# server/persistence.py
+"""Player positions kept across restarts: an append-only log plus snapshots.
+
+Files in the state directory (little-endian)::
+
+    players.snap   4s magic "ISOS", u32 generation, u32 record count, frames
+    players.log    4s magic "ISOL", u32 generation, frames
+    lock           flock'd by the process writing the other two
+
+    frame = u32 body length, u32 crc32 of body, msgpack {"room/player": [x, y, direction]}
+
+Frames hold at most ``FRAME_RECORDS`` records. They are encoded on the
+event loop, yielding between frames, since encoding on a thread would
+hold the GIL against the loop anyway; only file I/O runs on the thread.
+
+A snapshot of generation ``g`` already holds everything in logs of
+generation ``g`` or lower, so a crash between writing a snapshot and
+starting the next log loses nothing. A torn or corrupt log frame ends the
+log: it and anything after it are cut off on restore.
+"""
+import asyncio
+import fcntl
+import logging
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import IO, Iterator, Optional
+
+import msgspec
+
+from server import metrics
+
+logger = logging.getLogger("server")
+
+SNAPSHOT_FILE = "players.snap"
+LOG_FILE = "players.log"
+SNAPSHOT_MAGIC = b"ISOS"
+LOG_MAGIC = b"ISOL"
+FRAME_RECORDS = 4096
+
+Record = tuple[int, int, int]  # x, y, direction code
+
+_FILE_HEADER = struct.Struct("<4sI")
+_COUNT = struct.Struct("<I")
+_FRAME_HEADER = struct.Struct("<II")
+_encoder = msgspec.msgpack.Encoder()
+_decoder = msgspec.msgpack.Decoder(dict[str, Record])
+
+_flush_seconds = metrics.state_log_flush_seconds.labels()
+_records_written = metrics.state_log_records.labels()
+
+
+async def encode_frames(records: dict[str, Record]) -> list[bytes]:
+    """Encode ``records``, which must not change meanwhile, letting other tasks run between frames."""
+    frames = []
+    items = iter(records.items())
+    for start in range(0, len(records), FRAME_RECORDS):
+        if start:
+            await asyncio.sleep(0)
+        body = _encoder.encode(dict(islice(items, FRAME_RECORDS)))
+        frames.append(_FRAME_HEADER.pack(len(body), zlib.crc32(body)))
+        frames.append(body)
+    return frames
+
+
+def read_frames(data: bytes, offset: int) -> Iterator[tuple[dict[str, Record], int]]:
+    """Yield each intact frame from ``offset`` on, with the offset just past it."""
+    view = memoryview(data)
+    while offset + _FRAME_HEADER.size <= len(data):
+        length, crc = _FRAME_HEADER.unpack_from(data, offset)
+        start = offset + _FRAME_HEADER.size
+        body = view[start:start + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            return
+        try:
+            records = _decoder.decode(body)
+        except msgspec.DecodeError:
+            return
+        offset = start + length
+        yield records, offset
+
+
+class StateLog:
+    """Last known position of every named player, saved off the event loop.
+
+    ``record`` only touches two dicts. Every ``interval`` seconds the
+    positions changed since the last flush are appended to the log and
+    fsynced on a single worker thread, so batches land in order. Once the
+    log outgrows ``compact_bytes`` the whole table is written as a new
+    snapshot on that thread too, and the log starts over.
+    """
+
+    def __init__(self, directory: str, interval: float = 1.0, compact_bytes: int = 4 << 20) -> None:
+        self.directory = directory
+        self.interval = interval
+        self.compact_bytes = compact_bytes
+        self.records: dict[str, Record] = {}
+        self._pending: dict[str, Record] = {}
+        self._generation = 1
+        # only touched on the writer thread once open() has returned
+        self._log: Optional[IO[bytes]] = None
+        self._log_bytes = 0
+        self._lock: Optional[IO[str]] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-log")
+        self._task: Optional[asyncio.Task] = None
+
+    # --- lifecycle ---
+
+    def open(self) -> bool:
+        """Lock the directory and load the saved state; False if another process holds it."""
+        os.makedirs(self.directory, exist_ok=True)
+        lock = open(os.path.join(self.directory, "lock"), "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return False
+        self._lock = lock
+
+        start = time.perf_counter()
+        snapshot_generation = self._load_snapshot()
+        self._load_log(snapshot_generation)
+        logger.info(
+            "Restored %d saved players from %s in %.1f ms",
+            len(self.records), self.directory, (time.perf_counter() - start) * 1000,
+        )
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write out everything still pending, compact, and release the directory."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock is None:
+            return
+        await self.flush()
+        await self.compact()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close)
+        self._executor.shutdown()
+
+    # --- recording ---
+
+    def record(self, key: str, x: int, y: int, direction: int) -> None:
+        self.records[key] = self._pending[key] = (x, y, direction)
+
+    def room(self, name: str) -> "RoomLog":
+        return RoomLog(self, name)
+
+    async def flush(self) -> None:
+        """Append the positions recorded since the last flush."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        start = time.perf_counter()
+        try:
+            frames = await encode_frames(batch)
+        except asyncio.CancelledError:
+            # stopping: leave the batch for the final flush
+            batch.update(self._pending)
+            self._pending = batch
+            raise
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._append, frames)
+        _flush_seconds.observe(time.perf_counter() - start)
+        _records_written.inc(len(batch))
+
+    async def compact(self) -> None:
+        """Replace the snapshot with the current table and start a new log."""
+        records = self.records.copy()
+        frames = await encode_frames(records)
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._write_snapshot, len(records), frames)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+                if self._log_bytes >= self.compact_bytes:
+                    await self.compact()
+            except OSError:
+                logger.exception("Writing the state log in %s failed", self.directory)
+
+    # --- files (writer thread, or before start) ---
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load_snapshot(self) -> int:
+        path = self._path(SNAPSHOT_FILE)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        header = _FILE_HEADER.size + _COUNT.size
+        magic, generation = _FILE_HEADER.unpack_from(data) if len(data) >= header else (b"", 0)
+        records: dict[str, Record] = {}
+        end = header
+        for frame, end in read_frames(data, header):
+            records.update(frame)
+        if magic != SNAPSHOT_MAGIC or end != len(data) or len(records) != _COUNT.unpack_from(data, _FILE_HEADER.size)[0]:
+            # snapshots are replaced atomically, so this is real damage: don't paper over it
+            raise ValueError(f"{path} is not a readable state snapshot")
+        self.records = records
+        return generation
+
+    def _load_log(self, snapshot_generation: int) -> None:
+        path = self._path(LOG_FILE)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        generation = 0
+        if len(data) >= _FILE_HEADER.size:
+            magic, generation = _FILE_HEADER.unpack_from(data)
+            if magic != LOG_MAGIC:
+                raise ValueError(f"{path} is not a state log")
+        if generation <= snapshot_generation:
+            # no log yet, or one the snapshot already covers
+            self._start_log(snapshot_generation + 1)
+            return
+
+        end = _FILE_HEADER.size
+        for records, end in read_frames(data, end):
+            self.records.update(records)
+        if end < len(data):
+            logger.warning("Dropping %d bytes of torn state log in %s", len(data) - end, path)
+        self._generation = generation
+        self._log = open(path, "r+b")
+        self._log.truncate(end)
+        self._log.seek(end)
+        self._log_bytes = end
+
+    def _start_log(self, generation: int) -> None:
+        if self._log is not None:
+            self._log.close()
+        self._generation = generation
+        self._log = open(self._path(LOG_FILE), "wb")
+        self._log.write(_FILE_HEADER.pack(LOG_MAGIC, generation))
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._log_bytes = _FILE_HEADER.size
+
+    def _append(self, frames: list[bytes]) -> None:
+        self._log.writelines(frames)
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._log_bytes += sum(map(len, frames))
+
+    def _write_snapshot(self, count: int, frames: list[bytes]) -> None:
+        path = self._path(SNAPSHOT_FILE)
+        with open(path + ".tmp", "wb") as f:
+            f.write(_FILE_HEADER.pack(SNAPSHOT_MAGIC, self._generation))
+            f.write(_COUNT.pack(count))
+            f.writelines(frames)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        directory = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        self._start_log(self._generation + 1)
+
+    def _close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if self._lock is not None:
+            self._lock.close()  # releases the flock
+            self._lock = None
+
+
+class RoomLog:
+    """A ``StateLog`` seen from one room, for the players that joined it by name."""
+
+    __slots__ = ("log", "prefix", "players")
+
+    def __init__(self, log: StateLog, room: str) -> None:
+        self.log = log
+        self.prefix = room + "/"
+        self.players: set[str] = set()
+
+    def join(self, client_id: str) -> Optional[Record]:
+        """Start saving ``client_id``; returns where it was last saved in this room."""
+        self.players.add(client_id)
+        return self.log.records.get(self.prefix + client_id)
+
+    def leave(self, client_id: str) -> None:
+        self.players.discard(client_id)
+
+    def record(self, client_id: str, x: int, y: int, direction: int) -> None:
+        if client_id in self.players:
+            self.log.record(self.prefix + client_id, x, y, direction)
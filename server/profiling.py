@@ -0,0 +1,278 @@
+# server/profiling.py
+"""Opt-in profiling: timing spans and a sampling profiler, saved as Chrome trace files.
+
+With ``settings.PROFILE`` on, the socket handlers, GameLogic, the
+broadcaster, the tick and the event builders record a span per call, and
+payloads one per encoding. Spans are kept in memory and written to
+``settings.PROFILE_DIR`` as Chrome trace JSON (``trace-<pid>-<n>.json``)
+every ``PROFILE_MAX_SPANS`` spans and at shutdown, by a writer thread so
+the event loop doesn't wait on the disk; open them in
+chrome://tracing or Perfetto (ui.perfetto.dev loads the file in the
+browser). Every asyncio task, like each connection, each room's tick loop
+or each outbox writer, gets a track of its own, and spans of coroutines
+cover their awaits too.
+
+The sampling profiler looks at the event loop thread's Python stack every
+``PROFILE_SAMPLE_INTERVAL`` seconds from a thread of its own, for a bounded
+window started at startup (``PROFILE_SAMPLE_SECONDS``) or with
+``POST /profile?seconds=N``. Consecutive samples of the same frames are
+joined into spans on a "samples" track, a flame chart of where the loop
+spent its time, written out when the window ends.
+
+With profiling off the decorators return functions untouched, so the hooks
+cost nothing.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+import msgspec
+
+from server.config import settings
+
+logger = logging.getLogger("server")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Longest window POST /profile starts
+MAX_SAMPLE_SECONDS = 300.0
+
+# Trace tracks: sampled stacks, spans outside of any task, then one per task
+SAMPLES_TID = 0
+NO_TASK_TID = 1
+
+
+class Tracer:
+    """Collects spans of this process and writes them out as Chrome trace files.
+
+    Only used from the event loop thread; files are encoded and written on a
+    worker thread of their own, one at a time so they land in order. A
+    finished task's track name is dropped once a file holding its spans is
+    handed over.
+    """
+
+    def __init__(self, directory: str, max_spans: int) -> None:
+        self.directory = directory
+        self.max_spans = max_spans
+        self.pid = os.getpid()
+        self.files = 0
+        self.epoch = time.perf_counter()
+        self._events: list[dict] = []
+        self._tracks: "weakref.WeakKeyDictionary[asyncio.Task, int]" = weakref.WeakKeyDictionary()
+        self._names = {
+            SAMPLES_TID: _track_name(self.pid, SAMPLES_TID, "samples"),
+            NO_TASK_TID: _track_name(self.pid, NO_TASK_TID, "loop"),
+        }
+        self._next_tid = NO_TASK_TID + 1
+        # tracks of tasks done since the last flush
+        self._finished: list[int] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile")
+
+    def track(self) -> int:
+        """Track of the running asyncio task."""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            return NO_TASK_TID
+        if task is None:
+            return NO_TASK_TID
+        tid = self._tracks.get(task)
+        if tid is None:
+            tid = self._tracks[task] = self._next_tid
+            self._next_tid += 1
+            self._names[tid] = _track_name(self.pid, tid, task.get_name())
+            task.add_done_callback(lambda _: self._finished.append(tid))
+        return tid
+
+    def add(self, name: str, start: float, end: float, tid: Optional[int] = None) -> None:
+        """Record a span between two ``time.perf_counter()`` readings."""
+        self._events.append({
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.epoch) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": self.pid,
+            "tid": self.track() if tid is None else tid,
+        })
+        if len(self._events) >= self.max_spans:
+            self.flush()
+
+    def extend(self, events: list[dict]) -> None:
+        self._events.extend(events)
+
+    def flush(self) -> Optional[str]:
+        """Hand the spans recorded since the last flush to the writer thread; returns the file they go to."""
+        if not self._events:
+            return None
+        events, self._events = self._events, []
+        names = list(self._names.values())
+        for tid in self._finished:
+            del self._names[tid]
+        self._finished.clear()
+        self.files += 1
+        path = os.path.join(self.directory, f"trace-{self.pid}-{self.files}.json")
+        self._executor.submit(self._write, path, names, events)
+        return path
+
+    def close(self) -> None:
+        """Wait for the files handed over so far to be written."""
+        self._executor.shutdown()
+
+    def _write(self, path: str, names: list[dict], events: list[dict]) -> None:
+        # writer thread
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(msgspec.json.encode({"traceEvents": names + events, "displayTimeUnit": "ms"}))
+        except OSError as e:
+            logger.error("Could not write trace file %s: %s", path, e)
+            return
+        logger.info("Wrote %d spans to %s", len(events), path)
+
+
+class Sampler:
+    """Samples the event loop thread's stack from a daemon thread for a bounded window."""
+
+    def __init__(self, tracer: Tracer, interval: float) -> None:
+        self.tracer = tracer
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._events: Optional[list[dict]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float) -> bool:
+        """Sample the calling (event loop) thread for ``seconds``; False if already sampling."""
+        if self.running:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(asyncio.get_running_loop(), threading.get_ident(), seconds),
+            name="profile-sampler",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info("Sampling the event loop every %.1f ms for %.0f s", self.interval * 1000, seconds)
+        return True
+
+    def stop(self) -> None:
+        """End the window early and hand over what was sampled."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._finish()
+
+    def _run(self, loop: asyncio.AbstractEventLoop, thread_id: int, seconds: float) -> None:
+        epoch, pid = self.tracer.epoch, self.tracer.pid
+        events: list[dict] = []
+        # (frame name, when first seen) from the outermost frame in
+        open_frames: list[tuple[str, float]] = []
+
+        def close(depth: int, now: float) -> None:
+            for name, start in open_frames[depth:]:
+                events.append({
+                    "name": name, "ph": "X", "ts": (start - epoch) * 1e6, "dur": (now - start) * 1e6,
+                    "pid": pid, "tid": SAMPLES_TID,
+                })
+            del open_frames[depth:]
+
+        end = time.perf_counter() + seconds
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if now >= end:
+                break
+            stack = _stack(sys._current_frames().get(thread_id))
+            # frames still on the stack carry on, the rest ended since the last sample
+            depth = 0
+            while depth < len(open_frames) and depth < len(stack) and open_frames[depth][0] == stack[depth]:
+                depth += 1
+            close(depth, now)
+            open_frames.extend((name, now) for name in stack[depth:])
+            self._stop.wait(self.interval)
+        close(0, time.perf_counter())
+
+        self._events = events
+        if not self._stop.is_set():
+            loop.call_soon_threadsafe(self._finish)
+
+    def _finish(self) -> None:
+        events, self._events = self._events, None
+        if events is not None:
+            self.tracer.extend(events)
+            self.tracer.flush()
+
+
+def _stack(frame) -> list[str]:
+    """Frame names of a stack, outermost first."""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _track_name(pid: int, tid: int, name: str) -> dict:
+    return {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+
+
+tracer: Optional[Tracer] = Tracer(settings.PROFILE_DIR, settings.PROFILE_MAX_SPANS) if settings.PROFILE else None
+sampler: Optional[Sampler] = Sampler(tracer, settings.PROFILE_SAMPLE_INTERVAL) if tracer is not None else None
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator recording a span per call (named after the function by
+    default) while profiling is on; returns the function as is otherwise."""
+    def decorator(function: F) -> F:
+        if tracer is None:
+            return function
+        label = name or function.__qualname__
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    tracer.add(label, start, time.perf_counter())
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    tracer.add(label, start, time.perf_counter())
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def start() -> None:
+    """Open the startup sampling window, if one is configured."""
+    if sampler is not None and settings.PROFILE_SAMPLE_SECONDS > 0:
+        sampler.start(settings.PROFILE_SAMPLE_SECONDS)
+
+
+def stop() -> None:
+    """Stop sampling and write out every span still in memory."""
+    if sampler is not None:
+        sampler.stop()
+    if tracer is not None:
+        tracer.flush()
+        tracer.close()
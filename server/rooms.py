@@ -0,0 +1,242 @@
+# server/rooms.py
+import logging
+import multiprocessing
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import count
+from typing import Optional
+
+from server import metrics
+from server.backends import create_backend
+from server.config import settings
+from server.game.npcs import NpcEngine
+from server.game.pathfinding import Pathfinder
+from server.game.routes import RouteManager
+from server.game.tick import TickLoop
+from server.game.tilemap import TileMap
+from server.journal import Journal, RoomJournal
+from server.persistence import RoomLog, StateLog
+from server.sockets.heartbeat import Heartbeat
+from server.state import ServerState
+
+logger = logging.getLogger("server")
+
+ROOM_NAME = re.compile(r"[A-Za-z0-9_-]{1,32}")
+
+# Players and NPCs of a room share its u16 wire ids
+MAX_IDS = 0x10000
+# Map sizes and coordinates are u16 on the wire too, the chunk radius u8
+MAX_MAP_SIDE = 0xFFFF
+MAX_CHUNK_RADIUS = 0xFF
+
+
+class Room:
+    """One world instance with its own players, NPCs, map, backend, tick loop and heartbeat.
+
+    NPC route searches run in ``paths`` when it is given.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        tiles: TileMap,
+        log: Optional[RoomLog] = None,
+        journal: Optional[RoomJournal] = None,
+        paths: Optional[Executor] = None,
+    ) -> None:
+        self.name = name
+        self.state = ServerState(tiles=tiles, log=log, journal=journal)
+        self.backend = create_backend(self.state, name)
+        pathfinder = Pathfinder(self.state.occupancy, settings.PATH_CACHE_SIZE, settings.PATH_MAX_NODES)
+        self.npcs: Optional[NpcEngine] = None
+        if settings.NPC_COUNT > 0:
+            if settings.BACKEND == "local":
+                self.npcs = NpcEngine(
+                    self.state,
+                    pathfinder,
+                    settings.NPC_MOVE_CHANCE,
+                    settings.NPC_CHASE_RADIUS,
+                    settings.ROUTE_PATIENCE,
+                    settings.NPC_PATHS_PER_TICK,
+                    paths,
+                    settings.NPC_SEED,
+                )
+                self.npcs.spawn(min(settings.NPC_COUNT, MAX_IDS - settings.MAX_PLAYERS))
+            else:
+                logger.warning("NPCs need the local backend; room %s has none", name)
+        self.tick_loop = TickLoop(
+            name,
+            self.state,
+            self.backend,
+            RouteManager(self.state, pathfinder, settings.ROUTE_PATIENCE),
+            settings.TICK_RATE or settings.MOVE_TO_RATE or 1.0,
+            settings.TICK_INPUT_BUFFER,
+            settings.DELTA_SNAPSHOTS and settings.TICK_RATE > 0,
+            settings.SNAPSHOT_BUFFER,
+            self.npcs,
+        )
+        self.heartbeat = Heartbeat(self.state, settings.HEARTBEAT_INTERVAL, settings.IDLE_TIMEOUT)
+
+    @property
+    def full(self) -> bool:
+        players = self.state.count() - (len(self.npcs) if self.npcs else 0)
+        return players >= settings.MAX_PLAYERS or not self.state.occupancy.free_count
+
+    async def start(self) -> None:
+        if not 0 <= settings.MAP_CHUNK_RADIUS <= MAX_CHUNK_RADIUS:
+            raise ValueError(
+                f"MAP_CHUNK_RADIUS is {settings.MAP_CHUNK_RADIUS}; it must be 0 to {MAX_CHUNK_RADIUS} to fit the wire protocols"
+            )
+        await self.backend.start()
+        if settings.TICK_RATE > 0 or settings.MOVE_TO_RATE > 0 or self.npcs:
+            self.tick_loop.start()
+        if settings.HEARTBEAT_INTERVAL > 0:
+            self.heartbeat.start()
+
+    async def stop(self) -> None:
+        await self.heartbeat.stop()
+        await self.tick_loop.stop()
+        if self.npcs is not None:
+            self.npcs.close()
+        await self.backend.stop()
+
+
+class RoomManager:
+    """Creates rooms on demand and spreads players over their instances.
+
+    A client asks for a room by name (``settings.DEFAULT_ROOM`` if it doesn't).
+    Once that room holds ``settings.MAX_PLAYERS`` players, newcomers go to
+    ``<name>-2``, then ``<name>-3`` and so on. Extra instances are closed when
+    their last local player leaves. Map files are opened once and shared by
+    every room using them. With ``settings.STATE_DIR`` set, every room saves
+    its named players to one ``StateLog``; with ``settings.JOURNAL_FILE``
+    set, every room records to one ``Journal``. With ``settings.NPC_PATH_WORKERS``
+    set, NPC routes of every room are searched in one process pool.
+    """
+
+    def __init__(self) -> None:
+        self.rooms: dict[str, Room] = {}
+        self._maps: dict[str, TileMap] = {}
+        self.log: Optional[StateLog] = None
+        self.journal: Optional[Journal] = None
+        self.paths: Optional[ProcessPoolExecutor] = None
+
+    async def start(self) -> None:
+        if settings.NPC_COUNT > 0 and settings.NPC_PATH_WORKERS > 0:
+            # spawned, not forked: the workers only need the maps, not this event loop
+            self.paths = ProcessPoolExecutor(settings.NPC_PATH_WORKERS, multiprocessing.get_context("spawn"))
+        if settings.JOURNAL_FILE:
+            self.journal = Journal(settings.JOURNAL_FILE)
+            self.journal.open()
+            self.journal.start()
+            logger.info("Recording journal to %s", settings.JOURNAL_FILE)
+        if settings.STATE_DIR:
+            log = StateLog(settings.STATE_DIR, settings.STATE_FLUSH_INTERVAL, settings.STATE_COMPACT_BYTES)
+            if log.open():
+                self.log = log
+                log.start()
+            else:
+                logger.warning("State directory %s is in use by another process; not saving players", settings.STATE_DIR)
+        await self._create(settings.DEFAULT_ROOM, settings.DEFAULT_ROOM)
+
+    async def stop(self) -> None:
+        for room in list(self.rooms.values()):
+            await room.stop()
+        self.rooms.clear()
+        for tiles in self._maps.values():
+            tiles.close()
+        self._maps.clear()
+        if self.log is not None:
+            await self.log.stop()
+            self.log = None
+        if self.journal is not None:
+            await self.journal.stop()
+            self.journal = None
+        if self.paths is not None:
+            self.paths.shutdown(cancel_futures=True)
+            self.paths = None
+
+    async def assign(self, requested: Optional[str] = None) -> Optional[Room]:
+        """Return a room with space for one more player, or None if none can be had."""
+        base = requested or settings.DEFAULT_ROOM
+        if not ROOM_NAME.fullmatch(base):
+            return None
+        for instance in count(1):
+            name = base if instance == 1 else f"{base}-{instance}"
+            room = self.rooms.get(name)
+            if room is None:
+                if len(self.rooms) >= settings.MAX_ROOMS:
+                    return None
+                try:
+                    room = await self._create(name, base)
+                except ValueError as e:
+                    logger.error("Could not open room %s: %s", name, e)
+                    return None
+            if not room.full:
+                return room
+
+    async def release(self, room: Room) -> None:
+        """Close ``room`` if nobody here is using it any more."""
+        if room.name == settings.DEFAULT_ROOM or room.state.local_count():
+            return
+        if self.rooms.get(room.name) is room:
+            del self.rooms[room.name]
+            await room.stop()
+            logger.info("Closed room %s", room.name)
+
+    async def _create(self, name: str, base: str) -> Room:
+        tiles = self._tiles(base)
+        log = self.log.room(name) if self.log is not None else None
+        journal = self.journal.room(name, tiles) if self.journal is not None else None
+        room = self.rooms[name] = Room(name, tiles, log, journal, self.paths)
+        await room.start()
+        logger.info("Opened room %s (%dx%d)", name, room.state.width, room.state.height)
+        return room
+
+    def _tiles(self, base: str) -> TileMap:
+        """The map of rooms named after ``base``; raises ValueError if it can't be used."""
+        path = settings.ROOM_MAPS.get(base)
+        if path is None:
+            if base in settings.ROOM_GRIDS:
+                width, height = settings.ROOM_GRIDS[base]
+            else:
+                path = settings.MAP_FILE
+                width, height = settings.GRID_WIDTH, settings.GRID_HEIGHT
+            if path is None:
+                _check_size(f"grid of room {base}", width, height)
+                return TileMap.blank(width, height)
+        tiles = self._maps.get(path)
+        if tiles is None:
+            tiles = TileMap.open(path)
+            try:
+                _check_size(f"map {path}", tiles.width, tiles.height)
+            except ValueError:
+                tiles.close()
+                raise
+            self._maps[path] = tiles
+            logger.info("Loaded map %s (%dx%d, %d-tile chunks)", path, tiles.width, tiles.height, tiles.chunk_size)
+        return tiles
+
+
+def _check_size(what: str, width: int, height: int) -> None:
+    if not (0 < width <= MAX_MAP_SIDE and 0 < height <= MAX_MAP_SIDE):
+        raise ValueError(f"{what} is {width}x{height}; sides must be 1 to {MAX_MAP_SIDE} tiles to fit the wire protocols")
+
+
+# Create a single shared instance
+rooms = RoomManager()
+
+metrics.connected_clients.set_function(
+    lambda: [((name,), room.state.local_count()) for name, room in rooms.rooms.items()]
+)
+metrics.rooms_open.set_function(lambda: [((), len(rooms.rooms))])
+
+
+def _outbox_depths():
+    for name, room in rooms.rooms.items():
+        depths = room.state.queue_depths().values()
+        yield (name, "max"), max(depths, default=0)
+        yield (name, "sum"), sum(depths)
+
+
+metrics.outbox_depth.set_function(_outbox_depths)
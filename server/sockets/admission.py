@@ -0,0 +1,47 @@
+# server/sockets/admission.py
+import asyncio
+import time
+from typing import Callable
+
+from server.sockets.ratelimit import TokenBucket
+
+
+class Admission:
+    """Paces how fast new connections are let into the game.
+
+    Connections are let in at ``rate`` per second with room for a ``burst``,
+    in the order they arrived; up to ``queue`` more wait their turn and any
+    beyond that are turned away. Each join sends the newcomer every player
+    it can see, so a connect storm let in all at once would stall the loop.
+    A rate of 0 admits everyone at once.
+    """
+
+    def __init__(self, rate: float, burst: int, queue: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.queue = queue
+        self.clock = clock
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._bucket = TokenBucket(rate, max(1, burst), clock())
+        # asyncio.Lock wakes waiters first come, first served
+        self._lock = asyncio.Lock()
+
+    async def admit(self) -> bool:
+        """Wait for this connection's turn; False if too many are already waiting."""
+        if self.rate <= 0 or (not self.waiting and self._bucket.take(self.clock())):
+            self.admitted += 1
+            return True
+        if self.waiting >= self.queue:
+            self.rejected += 1
+            return False
+        self.waiting += 1
+        try:
+            async with self._lock:
+                bucket = self._bucket
+                while not bucket.take(self.clock()):
+                    await asyncio.sleep((1.0 - bucket.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+        self.admitted += 1
+        return True
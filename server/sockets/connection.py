@@ -0,0 +1,64 @@
+# server/sockets/connection.py
+from typing import TYPE_CHECKING, Any, Literal, Optional
+
+from litestar import WebSocket
+from litestar.exceptions import WebSocketDisconnect
+
+from server.config import settings
+
+if TYPE_CHECKING:
+    from server.rooms import Room
+
+JSON_PROTOCOL = "iso.json.v1"
+BINARY_PROTOCOL = "iso.bin.v1"
+# the same protocols, with large frames deflated (see server.events.binary.DEFLATED)
+DEFLATE_SUFFIX = ".deflate"
+SUBPROTOCOLS = (
+    BINARY_PROTOCOL + DEFLATE_SUFFIX, BINARY_PROTOCOL,
+    JSON_PROTOCOL + DEFLATE_SUFFIX, JSON_PROTOCOL,
+)
+
+
+class GameSocket(WebSocket):
+    """WebSocket that negotiates the wire protocol through the subprotocol header.
+
+    The first protocol offered by the client that the server supports wins;
+    clients that offer none get JSON. The ``.deflate`` variants are only
+    supported while ``settings.COMPRESSION_LEVEL`` is above 0. Frames are
+    received whether they arrive as text or binary. ``room`` is set once the
+    client has been placed in one.
+    """
+
+    protocol: str = JSON_PROTOCOL
+    room: Optional["Room"] = None
+
+    @property
+    def binary(self) -> bool:
+        return self.protocol.startswith(BINARY_PROTOCOL)
+
+    @property
+    def deflate(self) -> bool:
+        return self.protocol.endswith(DEFLATE_SUFFIX)
+
+    async def accept(self, subprotocols: str | None = None, headers: Any = None) -> None:
+        if subprotocols is None:
+            offered = self.scope.get("subprotocols") or ()
+            subprotocols = next((p for p in offered if _supported(p)), None)
+        if subprotocols is not None:
+            self.protocol = subprotocols
+        await super().accept(subprotocols, headers)
+
+    async def receive_data(self, mode: Literal["text", "binary"]) -> str | bytes:
+        if self.connection_state == "init":
+            await self.accept()
+        event = await self.receive()
+        if event["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(detail="disconnect event", code=event["code"])
+        data = event.get("bytes")
+        return data if data is not None else event.get("text") or ""
+
+
+def _supported(protocol: str) -> bool:
+    if protocol.endswith(DEFLATE_SUFFIX) and settings.COMPRESSION_LEVEL <= 0:
+        return False
+    return protocol in SUBPROTOCOLS
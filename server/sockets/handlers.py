@@ -2,61 +2,257 @@
 import uuid
 import json
 import logging
-from litestar import WebSocket
-
-from server.state import server_state
-from server.events.builders import (
-    init_event,
-    player_join_event,
-    player_leave_event,
-    player_update_event,
-)
-from server.events.broadcaster import broadcast
+import re
+from functools import partial
+from typing import Optional
+
+from server import metrics, profiling
+from server.state import PlayerView
+from server.events import binary
+from server.events.builders import cached_init_event, player_update_event
+from server.config import settings
+from server.game.directions import DIRECTION_CODES, DIRECTIONS
 from server.game.logic import GameLogic
+from server.rooms import Room, rooms
+from server.sockets.admission import Admission
+from server.sockets.connection import GameSocket
+from server.sockets.ratelimit import InputLimiter
 
 logger = logging.getLogger("server")
 
+input_limiter = InputLimiter(settings.INPUT_RATE, settings.INPUT_BURST)
+metrics.inputs.set_function(lambda: (
+    (("accepted",), input_limiter.totals.accepted),
+    (("throttled",), input_limiter.totals.throttled),
+    (("rejected",), input_limiter.totals.rejected),
+))
+# clients listed by game_input_offender_inputs
+INPUT_OFFENDERS = 10
+metrics.input_offenders.set_function(lambda: [
+    ((room, client_id, outcome), value)
+    for (room, client_id), counters in input_limiter.offenders(INPUT_OFFENDERS)
+    for outcome, value in counters.as_dict().items()
+])
+
+admission = Admission(settings.ADMIT_RATE, settings.ADMIT_BURST, settings.ADMIT_QUEUE)
+metrics.admissions.set_function(lambda: (
+    (("admitted",), admission.admitted),
+    (("refused",), admission.rejected),
+))
+metrics.admission_waiting.set_function(lambda: [((), admission.waiting)])
+
+# ?player=name: a stable id whose position is saved across visits (see server.persistence)
+PLAYER_NAME = re.compile(r"[A-Za-z0-9_-]{1,32}")
+
+_received = metrics.messages_received.labels()
+_received_bytes = metrics.bytes_received.labels()
 
-async def handle_accept(socket: WebSocket) -> str:
-    """Register a new client and notify others."""
-    client_id = str(uuid.uuid4())
-    server_state.register_client(client_id, socket)
 
-    await socket.send_text(init_event(client_id, server_state.all_clients()))
-    await broadcast(
-        player_join_event(client_id, server_state.get_client(client_id)),
-        exclude=client_id,
-    )
-    logger.info("Client connected: %s", client_id)
+@profiling.traced()
+async def handle_accept(socket: GameSocket) -> Optional[str]:
+    """Place a new client in a room and notify the players who can see it.
+
+    A client connecting with ``?player=name`` uses that name as its id and,
+    when the server saves state, comes back where it last stood in the room.
+    New clients wait for ``admission`` first and are refused if too many
+    already wait.
+    """
+    player = socket.query_params.get("player")
+    if player is not None and not PLAYER_NAME.fullmatch(player):
+        logger.warning("Rejected invalid player name %r", player)
+        await socket.close(code=1008)  # policy violation
+        return None
+    if not await admission.admit():
+        logger.warning("Refused a connection: %d already waiting to be admitted", admission.waiting)
+        await socket.close(code=1013)  # try again later
+        return None
+    room = await rooms.assign(socket.query_params.get("room"))
+    if room is None:
+        logger.warning("No room available for %s", socket.query_params.get("room"))
+        await socket.close(code=1013)  # try again later
+        return None
+    socket.room = room
+    state = room.state
+
+    client_id = player or str(uuid.uuid4())
+    if player is not None and state.slot_of(player) is not None:
+        logger.warning("Player %s is already in room %s", player, room.name)
+        await socket.close(code=1008)
+        return None
+    pos, direction = None, "down"
+    if player is not None and state.log is not None:
+        saved = state.log.join(player)
+        # the map may have changed since, or someone else stands there now
+        if saved is not None and state.occupancy.in_bounds(*saved[:2]) and state.occupancy.is_free(*saved[:2]):
+            pos, direction = (saved[0], saved[1]), DIRECTIONS[saved[2]]
+    if not await join_room(room, socket, client_id, pos, direction):
+        if state.log is not None:
+            state.log.leave(client_id)
+        logger.warning("No free tile to spawn on in room %s", room.name)
+        await socket.close(code=1013)
+        return None
+    logger.info("Client connected: %s (room %s)", client_id, room.name)
     return client_id
 
 
-async def handle_disconnect(socket: WebSocket) -> None:
-    """Remove client on disconnect and notify others."""
-    client_id = server_state.get_client_by_socket(socket)
+async def join_room(
+    room: Room,
+    socket: GameSocket,
+    client_id: str,
+    pos: Optional[tuple[int, int]] = None,
+    direction: str = "down",
+) -> bool:
+    """Register a client in ``room``, send it the room and notify the players who can see it.
+
+    Returns False if there is no free tile to spawn on.
+    """
+    state = room.state
+    try:
+        state.register_client(
+            client_id, socket, pos, direction,
+            on_evict=partial(evict_client, room), binary=socket.binary, deflate=socket.deflate,
+        )
+    except ValueError:
+        return False
+
+    store = state.store
+    slot = state.slot_of(client_id)
+    if state.journal is not None:
+        x, y = store.position(slot)
+        state.journal.join(client_id, x, y, store.directions[slot], socket.binary)
+    room.heartbeat.seen(client_id)
+    store.outboxes[slot].put(cached_init_event(
+        client_id, slot, state.init_cache, state.interest.watchers(slot),
+        player_count=state.count(), room=room.name, grid=(state.width, state.height),
+        chunk_size=state.tiles.chunk_size, chunk_radius=state.chunks.radius,
+    ))
+    # init only lists the others; tell the client where it spawned
+    store.outboxes[slot].put(player_update_event(client_id, PlayerView(store, slot)), key=client_id)
+    await room.backend.join(client_id)
+    return True
+
+
+@profiling.traced()
+async def handle_disconnect(socket: GameSocket) -> None:
+    """Remove client on disconnect and notify the players who could see it."""
+    room = socket.room
+    if room is None:
+        return
+    client_id = room.state.get_client_by_socket(socket)
     if client_id:
-        server_state.remove_client(client_id)
-        await broadcast(player_leave_event(client_id))
+        if room.state.journal is not None:
+            room.state.journal.leave(client_id)
+        room.tick_loop.discard(client_id)
+        room.heartbeat.discard(client_id)
+        input_limiter.discard((room.name, client_id))
+        await room.backend.leave(client_id)
         logger.info("Client disconnected: %s", client_id)
+    await rooms.release(room)
+
+
+@profiling.traced()
+async def evict_client(room: Room, client_id: str) -> None:
+    """Drop a client whose outbox gave up on it and notify the others."""
+    if room.state.journal is not None and room.state.slot_of(client_id) is not None:
+        room.state.journal.leave(client_id)
+    room.tick_loop.discard(client_id)
+    room.heartbeat.discard(client_id)
+    input_limiter.discard((room.name, client_id))
+    await room.backend.evict(client_id)
+    await rooms.release(room)
 
 
-async def handle_receive(socket: WebSocket, data: str) -> None:
+@metrics.timed(metrics.receive_seconds.labels())
+@profiling.traced()
+async def handle_receive(socket: GameSocket, data: bytes) -> None:
     """Process incoming messages from a client."""
-    client_id = server_state.get_client_by_socket(socket)
+    _received.inc()
+    _received_bytes.inc(len(data))
+    room = socket.room
+    if room is None:
+        return
+    client_id = room.state.get_client_by_socket(socket)
     if not client_id:
         return
+    if room.state.journal is not None:
+        room.state.journal.input(client_id, data if isinstance(data, bytes) else data.encode())
+    room.heartbeat.seen(client_id)
+    # the same id may be in several rooms, each with its own budget
+    key = (room.name, client_id)
 
-    try:
-        parsed = json.loads(data)
-    except json.JSONDecodeError:
-        logger.warning("Invalid JSON from %s: %s", client_id, data)
+    if socket.binary:
+        message = binary.decode_message(data)
+        parsed = {message[0]: message[1]} if message else {}
+    else:
+        try:
+            parsed = json.loads(data)
+        except json.JSONDecodeError:
+            input_limiter.reject(key)
+            logger.warning("Invalid JSON from %s: %s", client_id, data)
+            return
+        if not isinstance(parsed, dict):
+            parsed = {}
+
+    if parsed.get("pong"):
+        return  # only here to show the client is alive
+
+    ack = parsed.get("ack")
+    if ack is not None:
+        if type(ack) is int:  # not a bool
+            room.tick_loop.snapshots.ack(client_id, ack)
         return
 
-    move = parsed.get("move")
-    if not isinstance(move, str) or move not in {"up", "down", "left", "right", "up_left", "up_right", "down_left", "down_right"}:
-        logger.warning("Invalid move from %s: %s", client_id, move)
+    move_to = parsed.get("move_to")
+    if move_to is not None:
+        handle_move_to(room, client_id, move_to)
         return
 
-    if GameLogic.move_player(client_id, move):
-        current = server_state.get_client(client_id)
-        await broadcast(player_update_event(client_id, current))
+    # a frame carries either one "move" or a "moves" list
+    moves = parsed.get("moves")
+    if moves is None:
+        moves = [parsed.get("move")]
+    elif not isinstance(moves, list) or len(moves) > settings.MAX_MOVES_PER_FRAME:
+        input_limiter.reject(key)
+        logger.warning("Invalid moves from %s: %s", client_id, moves)
+        return
+
+    accepted = []
+    for move in moves:
+        if not isinstance(move, str) or move not in DIRECTION_CODES:
+            input_limiter.reject(key)
+            logger.warning("Invalid move from %s: %s", client_id, move)
+        elif input_limiter.allow(key):
+            accepted.append(move)
+    if not accepted:
+        return
+
+    if settings.TICK_RATE > 0:
+        for move in accepted:
+            room.tick_loop.queue_input(client_id, move)
+        return
+
+    state = room.state
+    room.tick_loop.routes.cancel(client_id)
+    old = state.store.position(state.slot_of(client_id))
+    moved = False
+    for move in accepted:
+        moved = GameLogic.move_player(state, client_id, move) or moved
+    if moved:
+        await room.backend.move(client_id, old)
+
+
+def handle_move_to(room: Room, client_id: str, goal: object) -> None:
+    """Send a client walking to ``goal`` along a route found on the server."""
+    state = room.state
+    if (
+        not isinstance(goal, list) or len(goal) != 2
+        or not all(type(v) is int for v in goal)
+        or not state.occupancy.in_bounds(*goal)
+    ):
+        input_limiter.reject((room.name, client_id))
+        logger.warning("Invalid move_to from %s: %s", client_id, goal)
+        return
+    if settings.TICK_RATE <= 0 and settings.MOVE_TO_RATE <= 0:
+        return  # nothing walks routes
+    if input_limiter.allow((room.name, client_id)) and not room.tick_loop.move_to(client_id, (goal[0], goal[1])):
+        logger.debug("No route for %s to %s", client_id, goal)
@@ -0,0 +1,77 @@
+# server/sockets/heartbeat.py
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from server.events.builders import ping_event
+from server.state import ServerState
+
+logger = logging.getLogger("server")
+
+
+class Heartbeat:
+    """Pings quiet clients of one room and evicts the ones that stay silent.
+
+    Any frame from a client counts as a sign of life. Every ``interval``
+    seconds, clients that sent nothing for at least that long are pinged
+    (clients answer with a pong) and those silent for ``timeout`` seconds
+    are evicted like a client whose send failed, so dead or half-open
+    connections stop costing broadcast work long before TCP gives up.
+    """
+
+    def __init__(self, state: ServerState, interval: float, timeout: float) -> None:
+        self.state = state
+        self.interval = interval
+        self.timeout = timeout
+        self.last_seen: dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def seen(self, client_id: str) -> None:
+        self.last_seen[client_id] = time.monotonic()
+
+    def discard(self, client_id: str) -> None:
+        self.last_seen.pop(client_id, None)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def check(self, now: float) -> tuple[int, int]:
+        """Ping or evict every quiet client; returns how many of each."""
+        store = self.state.store
+        ping = ping_event()  # one payload shared by every client pinged
+        pinged = evicted = 0
+        for client_id, seen in list(self.last_seen.items()):
+            quiet = now - seen
+            if quiet < self.interval:
+                continue
+            slot = store.slot_by_id.get(client_id)
+            outbox = store.outboxes[slot] if slot is not None else None
+            if outbox is None:
+                del self.last_seen[client_id]
+            elif quiet >= self.timeout:
+                del self.last_seen[client_id]
+                outbox.evict("idle", f"silent for {quiet:.0f}s")
+                evicted += 1
+            else:
+                outbox.put(ping, key="ping")
+                pinged += 1
+        return pinged, evicted
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.check(time.monotonic())
+            except Exception:
+                logger.exception("Heartbeat check failed")
@@ -0,0 +1,104 @@
+# server/sockets/ratelimit.py
+import heapq
+import logging
+import time
+from typing import Callable, Hashable
+
+logger = logging.getLogger("server")
+
+# Log a warning each time a client's throttled count crosses a multiple of this
+THROTTLE_LOG_EVERY = 100
+
+
+class InputCounters:
+    """Accepted, throttled (over the rate limit) and rejected (malformed) inputs."""
+
+    __slots__ = ("accepted", "throttled", "rejected")
+
+    def __init__(self) -> None:
+        self.accepted = 0
+        self.throttled = 0
+        self.rejected = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {"accepted": self.accepted, "throttled": self.throttled, "rejected": self.rejected}
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, holding at most ``capacity``."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class InputLimiter:
+    """Per-client input rate limiting with counters.
+
+    Clients are told apart by a key, e.g. (room name, client id) as the same
+    id may be connected to several rooms. Each gets a token bucket refilling at ``rate`` moves per second
+    with room for a ``burst``; moves beyond that are dropped and counted as
+    throttled. A rate of 0 disables limiting but still counts inputs.
+    ``clock`` tells the time in seconds; a journal replay swaps in its own.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self._buckets: dict[Hashable, TokenBucket] = {}
+        self._counters: dict[Hashable, InputCounters] = {}
+        self.totals = InputCounters()
+
+    def _counters_for(self, key: Hashable) -> InputCounters:
+        counters = self._counters.get(key)
+        if counters is None:
+            counters = self._counters[key] = InputCounters()
+        return counters
+
+    def allow(self, key: Hashable) -> bool:
+        """Spend a token for one input. Returns False if it should be dropped."""
+        counters = self._counters_for(key)
+        if self.rate > 0:
+            bucket = self._buckets.get(key)
+            now = self.clock()
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            if not bucket.take(now):
+                counters.throttled += 1
+                self.totals.throttled += 1
+                if counters.throttled % THROTTLE_LOG_EVERY == 0:
+                    logger.warning("Client %s has been throttled %d times", key, counters.throttled)
+                return False
+        counters.accepted += 1
+        self.totals.accepted += 1
+        return True
+
+    def reject(self, key: Hashable) -> None:
+        """Count a malformed or invalid input."""
+        self._counters_for(key).rejected += 1
+        self.totals.rejected += 1
+
+    def discard(self, key: Hashable) -> None:
+        self._buckets.pop(key, None)
+        self._counters.pop(key, None)
+
+    def offenders(self, count: int) -> list[tuple[Hashable, InputCounters]]:
+        """The ``count`` connected clients with the most throttled and rejected inputs, worst first."""
+        return heapq.nlargest(
+            count,
+            ((key, counters) for key, counters in self._counters.items() if counters.throttled or counters.rejected),
+            key=lambda item: item[1].throttled + item[1].rejected,
+        )
@@ -1,23 +1,190 @@
 # server/state.py
-from typing import Optional, TypedDict
+from array import array
+from collections.abc import Mapping
+from typing import Any, Awaitable, Callable, Iterator, Optional, TypedDict
 from litestar import WebSocket
 
+from server.config import settings
+from server.events.builders import InitCache
+from server.events.outbox import Outbox
+from server.game.chunks import ChunkStreamer
+from server.game.directions import DIRECTIONS, DIRECTION_CODES
+from server.game.interest import InterestManager
+from server.game.occupancy import OccupancyGrid
+from server.game.tilemap import TileMap
+from server.journal import RoomJournal
+from server.persistence import RoomLog
+
 
 class ClientInfo(TypedDict):
     socket: WebSocket
+    outbox: Outbox
     position: list[int]
     direction: str
 
 
-class ServerState:
-    """Global in-memory server state.
+class PlayerStore:
+    """Struct-of-arrays player storage.
 
-    This manages all connected clients and their associated data.
-    For scalability, this can later be replaced with Redis or a database.
+    Each player gets a dense integer slot. Positions live in one contiguous
+    ``array('i')`` as x, y pairs and directions in a ``bytearray`` of
+    direction codes. Slots of removed players are reused, so a slot stays
+    stable for as long as its player is connected. Players replicated from
+    other server processes have no socket or outbox.
     """
 
     def __init__(self) -> None:
-        self.connected_clients: dict[str, ClientInfo] = {}
+        self.ids: list[Optional[str]] = []
+        self.sockets: list[Any] = []
+        self.outboxes: list[Optional[Outbox]] = []
+        self.positions = array("i")
+        self.directions = bytearray()
+        self.slot_by_id: dict[str, int] = {}
+        self.slot_by_socket: dict[Any, int] = {}
+        self._free: list[int] = []
+
+    def add(self, client_id: str, socket: Any, outbox: Optional[Outbox], x: int, y: int, direction: int) -> int:
+        """Allocate a slot for a player and return it."""
+        if self._free:
+            slot = self._free.pop()
+            self.ids[slot] = client_id
+            self.sockets[slot] = socket
+            self.outboxes[slot] = outbox
+            self.positions[2 * slot] = x
+            self.positions[2 * slot + 1] = y
+            self.directions[slot] = direction
+        else:
+            slot = len(self.ids)
+            self.ids.append(client_id)
+            self.sockets.append(socket)
+            self.outboxes.append(outbox)
+            self.positions.append(x)
+            self.positions.append(y)
+            self.directions.append(direction)
+        self.slot_by_id[client_id] = slot
+        if socket is not None:
+            self.slot_by_socket[socket] = slot
+        return slot
+
+    def remove(self, slot: int) -> None:
+        """Release a slot for reuse."""
+        self.slot_by_id.pop(self.ids[slot], None)
+        if self.sockets[slot] is not None:
+            self.slot_by_socket.pop(self.sockets[slot], None)
+        self.ids[slot] = None
+        self.sockets[slot] = None
+        self.outboxes[slot] = None
+        self._free.append(slot)
+
+    def position(self, slot: int) -> tuple[int, int]:
+        positions, index = self.positions, 2 * slot
+        return positions[index], positions[index + 1]
+
+    def move(self, slot: int, x: int, y: int, direction: int) -> None:
+        positions, index = self.positions, 2 * slot
+        positions[index] = x
+        positions[index + 1] = y
+        self.directions[slot] = direction
+
+    def __len__(self) -> int:
+        return len(self.slot_by_id)
+
+
+class PlayerView(Mapping):
+    """Dict-like view of one player slot, keeping the ``ClientInfo`` shape.
+
+    Reading ``"position"`` returns a fresh list; assign a new list to
+    ``view["position"]`` to move the player.
+    """
+
+    __slots__ = ("_store", "slot")
+    _keys = ("socket", "outbox", "position", "direction")
+
+    def __init__(self, store: PlayerStore, slot: int) -> None:
+        self._store = store
+        self.slot = slot
+
+    def __getitem__(self, key: str) -> Any:
+        store, slot = self._store, self.slot
+        if key == "position":
+            return [store.positions[2 * slot], store.positions[2 * slot + 1]]
+        if key == "direction":
+            return DIRECTIONS[store.directions[slot]]
+        if key == "socket":
+            return store.sockets[slot]
+        if key == "outbox":
+            return store.outboxes[slot]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        store, slot = self._store, self.slot
+        if key == "position":
+            store.positions[2 * slot] = value[0]
+            store.positions[2 * slot + 1] = value[1]
+        elif key == "direction":
+            store.directions[slot] = DIRECTION_CODES[value]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class ClientsView(Mapping):
+    """Read-only ``{client_id: PlayerView}`` mapping over the store."""
+
+    __slots__ = ("_store",)
+
+    def __init__(self, store: PlayerStore) -> None:
+        self._store = store
+
+    def __getitem__(self, client_id: str) -> PlayerView:
+        return PlayerView(self._store, self._store.slot_by_id[client_id])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.slot_by_id)
+
+    def __len__(self) -> int:
+        return len(self._store.slot_by_id)
+
+    def __contains__(self, client_id: object) -> bool:
+        return client_id in self._store.slot_by_id
+
+
+class ServerState:
+    """In-memory state of one room.
+
+    This manages the room's connected clients, their associated data, its
+    tile map (a blank ``width`` x ``height`` one unless ``tiles`` is given)
+    and which tiles are blocked or taken. With
+    several worker processes each one keeps a full replica, and the
+    backend in ``server.backends`` keeps the replicas in sync. Players
+    that joined ``log`` have their positions saved as they change, and
+    ``journal`` records what is sent to the room's local clients.
+    """
+
+    def __init__(
+        self,
+        width: int = settings.GRID_WIDTH,
+        height: int = settings.GRID_HEIGHT,
+        tiles: Optional[TileMap] = None,
+        log: Optional[RoomLog] = None,
+        journal: Optional[RoomJournal] = None,
+    ) -> None:
+        self.tiles = tiles if tiles is not None else TileMap.blank(width, height)
+        self.width = self.tiles.width
+        self.height = self.tiles.height
+        self.store = PlayerStore()
+        self.connected_clients = ClientsView(self.store)
+        self.init_cache = InitCache(self.store)
+        self.interest = InterestManager(self.store, settings.VIEW_RADIUS)
+        self.occupancy = OccupancyGrid(self.tiles)
+        self.chunks = ChunkStreamer(self.tiles, settings.MAP_CHUNK_RADIUS)
+        self.log = log
+        self.journal = journal
 
     # --- Client lifecycle ---
 
@@ -25,41 +192,107 @@ class ServerState:
         self,
         client_id: str,
         socket: WebSocket,
-        pos: tuple[int, int] = (5, 5),
+        pos: Optional[tuple[int, int]] = None,
         direction: str = "down",
+        on_evict: Optional[Callable[[str], Awaitable[None]]] = None,
+        binary: bool = False,
+        deflate: bool = False,
     ) -> None:
-        """Add a new client to the state."""
-        self.connected_clients[client_id] = {
-            "socket": socket,
-            "position": list(pos),
-            "direction": direction,
-        }
+        """Add a new client to the state, with its own outbound queue.
+
+        Without ``pos`` the client spawns on a random free tile; an explicit
+        ``pos`` outside the map or not free raises ValueError.
+        """
+        if pos is None:
+            pos = self.occupancy.random_free()
+            if pos is None:
+                raise ValueError("no free tile to spawn on")
+        elif not (self.occupancy.in_bounds(*pos) and self.occupancy.is_free(*pos)):
+            raise ValueError(f"can't spawn on {pos}: outside the map or not free")
+        outbox = Outbox(client_id, socket, on_evict, binary=binary, journal=self.journal, deflate=deflate)
+        slot = self.store.add(client_id, socket, outbox, pos[0], pos[1], DIRECTION_CODES[direction])
+        self.interest.add(slot, pos[0], pos[1], viewer=True)
+        self.occupancy.enter(*pos)
+        if self.log is not None:
+            self.log.record(client_id, pos[0], pos[1], DIRECTION_CODES[direction])
+
+    def register_remote(self, client_id: str, pos: tuple[int, int], direction: str = "down") -> int:
+        """Add a player connected to another server process; returns its slot.
+
+        Raises ValueError if ``pos`` is outside the map or an obstacle. It
+        may hold other players: each process places its own players.
+        """
+        if not (self.occupancy.in_bounds(*pos) and self.occupancy.walkable(*pos)):
+            raise ValueError(f"can't place a player on {pos}: outside the map or blocked")
+        slot = self.store.add(client_id, None, None, pos[0], pos[1], DIRECTION_CODES[direction])
+        self.interest.add(slot, pos[0], pos[1])
+        self.occupancy.enter(*pos)
+        return slot
 
     def remove_client(self, client_id: str) -> Optional[ClientInfo]:
         """Remove client by ID and return its info if it existed."""
-        return self.connected_clients.pop(client_id, None)
+        slot = self.store.slot_by_id.get(client_id)
+        if slot is None:
+            return None
+        info: ClientInfo = dict(PlayerView(self.store, slot))  # type: ignore[assignment]
+        self.interest.remove(slot, *info["position"])
+        self.occupancy.leave(*info["position"])
+        self.store.remove(slot)
+        self.init_cache.discard(slot)
+        if info["outbox"] is not None:
+            info["outbox"].close()
+            self.chunks.discard(client_id)
+            if self.log is not None:
+                self.log.leave(client_id)
+        return info
+
+    def move(self, slot: int, x: int, y: int, direction: int) -> None:
+        """Move the player in ``slot`` to (x, y), which the caller checked is free."""
+        store = self.store
+        old = store.position(slot)
+        store.move(slot, x, y, direction)
+        self.interest.move(slot, old, (x, y))
+        self.occupancy.move(old, (x, y))
+        self.init_cache.discard(slot)
+        if self.log is not None:
+            self.log.record(store.ids[slot], x, y, direction)
 
-    def get_client(self, client_id: str) -> Optional[ClientInfo]:
+    def get_client(self, client_id: str) -> Optional[PlayerView]:
         """Lookup client info by ID."""
-        return self.connected_clients.get(client_id)
+        slot = self.store.slot_by_id.get(client_id)
+        return None if slot is None else PlayerView(self.store, slot)
 
     def get_client_by_socket(self, socket: WebSocket) -> Optional[str]:
         """Find the client_id for a given WebSocket, or None if not found."""
-        return next(
-            (cid for cid, info in self.connected_clients.items() if info["socket"] == socket),
-            None,
-        )
+        slot = self.store.slot_by_socket.get(socket)
+        return None if slot is None else self.store.ids[slot]
+
+    def slot_of(self, client_id: str) -> Optional[int]:
+        """Return the store slot for a client, or None if not connected."""
+        return self.store.slot_by_id.get(client_id)
+
+    def is_local(self, slot: int) -> bool:
+        """True if the player in ``slot`` is connected to this process."""
+        return self.store.outboxes[slot] is not None
 
     # --- Utility ---
 
-    def all_clients(self) -> dict[str, ClientInfo]:
+    def all_clients(self) -> ClientsView:
         """Return all currently connected clients."""
         return self.connected_clients
 
     def count(self) -> int:
         """Return how many clients are connected."""
-        return len(self.connected_clients)
+        return len(self.store)
 
+    def local_count(self) -> int:
+        """Return how many clients are connected to this process."""
+        return len(self.store.slot_by_socket)
 
-# Create a single shared instance
-server_state = ServerState()
+    def queue_depths(self) -> dict[str, int]:
+        """Return the number of queued outbound messages per client."""
+        outboxes = self.store.outboxes
+        return {
+            cid: outboxes[slot].depth
+            for cid, slot in self.store.slot_by_id.items() if outboxes[slot] is not None
+        }